@@ -0,0 +1,193 @@
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class AdmissionController:
+    """
+    Caps the number of interviews running at once.
+    Past `max_active`, new interviews wait in FIFO order and position()
+    tells the candidate where they stand (0 = admitted). A waiting entry
+    nobody asked about for `wait_timeout` seconds is dropped (the candidate
+    left), an active one without a turn for `idle_timeout` seconds frees
+    its slot. `max_active` 0 admits everyone.
+    """
+
+    def __init__(self, max_active: int = 0, wait_timeout: float = 30.0,
+                 idle_timeout: float = 1800.0):
+        self.max_active = max_active
+        self.wait_timeout = wait_timeout
+        self.idle_timeout = idle_timeout
+        # session -> last activity (turn or poll)
+        self._active: Dict[str, float] = {}
+        self._waiting: "OrderedDict[str, float]" = OrderedDict()
+        self._cond = threading.Condition()
+
+        self.admitted = 0
+        self.queued = 0
+        self.expired = 0
+
+    def _has_room(self) -> bool:
+        return self.max_active <= 0 or len(self._active) < self.max_active
+
+    def _expire(self, now: float) -> None:
+        for sessions, timeout in ((self._waiting, self.wait_timeout),
+                                  (self._active, self.idle_timeout)):
+            if timeout <= 0:
+                continue
+            for session, seen in list(sessions.items()):
+                if now - seen > timeout:
+                    del sessions[session]
+                    self.expired += 1
+                    self._cond.notify_all()
+
+    def _promote(self, now: float) -> None:
+        while self._waiting and self._has_room():
+            session, _ = self._waiting.popitem(last=False)
+            self._active[session] = now
+            self.admitted += 1
+            self._cond.notify_all()
+
+    def _next_expiry(self, now: float) -> Optional[float]:
+        """Seconds until the longest idle interview frees its slot"""
+        if self.idle_timeout <= 0 or not self._active:
+            return None
+        return max(0.0, min(self._active.values()) + self.idle_timeout - now)
+
+    def _poll(self, session: str, now: float) -> Optional[int]:
+        if session in self._waiting:
+            self._waiting[session] = now
+        self._expire(now)
+        self._promote(now)
+        return self._position(session)
+
+    def _position(self, session: str) -> Optional[int]:
+        if session in self._active:
+            return 0
+        if session in self._waiting:
+            return list(self._waiting).index(session) + 1
+        return None
+
+    def request(self, session: str) -> int:
+        """Asks for a slot; returns 0 if admitted, else the queue position"""
+        with self._cond:
+            now = time.monotonic()
+            self._expire(now)
+            new = session not in self._active and session not in self._waiting
+            if new:
+                self._waiting[session] = now
+            self._promote(now)
+            if session in self._waiting:
+                self._waiting[session] = now
+                # had to queue
+                self.queued += new
+            return self._position(session)
+
+    def position(self, session: str) -> Optional[int]:
+        """Queue position (0 = admitted), None if unknown or expired; counts as a poll"""
+        with self._cond:
+            return self._poll(session, time.monotonic())
+
+    def wait(self, session: str, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the session is admitted; False on timeout, expiry or
+        release. Wakes up when an idle interview's slot is due to free up.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        poll = self.wait_timeout / 2 if self.wait_timeout > 0 else None
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                position = self._poll(session, now)
+                if position is None:
+                    return False
+                if position == 0:
+                    return True
+                waits = [t for t in (poll, self._next_expiry(now)) if t is not None]
+                if deadline is not None:
+                    if deadline <= now:
+                        return False
+                    waits.append(deadline - now)
+                self._cond.wait(min(waits) if waits else None)
+
+    async def await_admission(self, session: str, timeout: Optional[float] = None,
+                              poll: float = 0.05) -> bool:
+        """wait() for coroutines : polls, the event loop keeps running"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            position = self.position(session)
+            if position is None:
+                return False
+            if position == 0:
+                return True
+            if deadline is not None and deadline <= time.monotonic():
+                return False
+            await asyncio.sleep(poll)
+
+    def touch(self, session: str) -> int:
+        """
+        A turn of a running interview : refreshes its slot. One that lost
+        its slot while idle, or resumed on this worker, asks for one again
+        like request() : admitted if there is room, queued otherwise.
+        Returns the queue position (0 = admitted).
+        """
+        with self._cond:
+            if session in self._active:
+                self._active[session] = time.monotonic()
+                return 0
+        return self.request(session)
+
+    def release(self, session: str) -> None:
+        """Frees the slot (or queue place) of a finished or abandoned interview"""
+        with self._cond:
+            self._active.pop(session, None)
+            self._waiting.pop(session, None)
+            self._promote(time.monotonic())
+            # a wait() for this session ends
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"active": len(self._active), "waiting": len(self._waiting),
+                    "admitted": self.admitted, "queued": self.queued,
+                    "expired": self.expired}
+
+
+# degradation modes, cheapest to give up first
+DEGRADATION_MODES = ("brief_feedback", "cached_questions")
+
+
+class DegradationPolicy:
+    """
+    Turns degradation modes on while the LLM backlog (calls waiting for
+    the rate limiter) is at or above their threshold; 0 disables a mode.
+      brief_feedback   : the closing study feedback lists the topics to
+                         review instead of asking the LLM
+      cached_questions : a new interview takes the closest cached question
+                         set instead of generating one
+    `used` counts how often each mode was applied.
+    """
+
+    def __init__(self, backlog: Callable[[], int],
+                 thresholds: Optional[Dict[str, int]] = None):
+        self.backlog = backlog
+        self.thresholds = dict(thresholds or {})
+        for mode in self.thresholds:
+            if mode not in DEGRADATION_MODES:
+                raise ValueError(f"Unknown degradation mode: {mode}")
+        self.used: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def active(self, mode: str) -> bool:
+        threshold = self.thresholds.get(mode, 0)
+        if threshold <= 0 or self.backlog() < threshold:
+            return False
+        with self._lock:
+            self.used[mode] += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {mode: self.used[mode] for mode in DEGRADATION_MODES}
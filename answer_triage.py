@@ -0,0 +1,156 @@
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+from verdict_cache import answer_fingerprint
+
+
+# (question, answer, earlier answers of the session) -> certainly incorrect?
+TriageRule = Callable[[str, str, Sequence[str]], bool]
+
+# built-in rules, in the order they are tried : "one_word" is left out, a
+# correct answer can be a single word or number ("404", "O(1)", "yield")
+TRIAGE_RULES = ("empty", "keyboard_mash", "repeats_question", "duplicate")
+
+_WORD = re.compile(r"[a-z0-9]+")
+_ALPHA_WORD = re.compile(r"[a-z]{4,}")
+_CONSONANT_RUN = re.compile(r"[bcdfghjklmnpqrstvwxz]{6,}")
+_REPEATED_CHAR = re.compile(r"(.)\1{3,}")
+_KEYBOARD_RUNS = ("qwer", "wert", "asdf", "sdfg", "dfgh", "fghj", "ghjk",
+                  "hjkl", "zxcv", "xcvb", "uiop", "yuio", "jkl")
+
+# a pasted answer is one of at least this many words : shorter correct
+# answers (a status code, a keyword) may rightly repeat
+_PASTE_MIN_WORDS = 3
+
+# a question opening with these is answered yes or no : restating it with
+# "yes" / "no" in front is a correct answer
+_YES_NO_OPENERS = frozenset("""
+is are was were am do does did can could will would should shall has have had
+""".split())
+
+# words that carry no content when comparing an answer to its question
+STOPWORDS = frozenset("""
+a an the is are was were be been being am do does did to of in on for at by
+with from as and or but if then so that this these those it its what which who
+whom how why when where can could would should will shall may might must i you
+he she we they me my your our their them us there here about into than not no
+yes just also very some any all each
+""".split())
+
+
+def _words(text: str):
+    return _WORD.findall(text.lower())
+
+
+def _is_yes_no_question(question: str) -> bool:
+    # the last clause : "In Python, is a tuple immutable?"
+    for clause in reversed(re.split(r"[,:;]", question)):
+        words = _words(clause)
+        if words:
+            return words[0] in _YES_NO_OPENERS
+    return False
+
+
+def _is_mash_word(word: str) -> bool:
+    if _REPEATED_CHAR.search(word):
+        return True
+    if any(run in word for run in _KEYBOARD_RUNS):
+        return True
+    # acronyms (sql, https) and some words (lengths) have no vowels either
+    return len(word) >= 6 and (not re.search(r"[aeiouy]", word)
+                               or bool(_CONSONANT_RUN.search(word)))
+
+
+class AnswerTriage:
+    """
+    Cheap local checks run before an answer is sent to the LLM.
+    A rule returns True when the answer is certainly incorrect; the first
+    rule that fires settles the answer and no LLM call is made. Built-in
+    rules are picked by name, others can be added with `register`.
+    `saved` counts the LLM calls avoided per rule.
+    """
+
+    def __init__(self, rules: Iterable[str] = TRIAGE_RULES,
+                 min_words: int = 2, max_overlap: float = 1.0):
+        self.min_words = min_words
+        self.max_overlap = max_overlap
+        self.saved: Counter = Counter()
+        self._lock = threading.Lock()
+
+        builtin = {
+            "empty": self._empty,
+            "one_word": self._one_word,
+            "keyboard_mash": self._keyboard_mash,
+            "repeats_question": self._repeats_question,
+            "duplicate": self._duplicate,
+        }
+        self._rules: Dict[str, TriageRule] = {}
+        for name in rules:
+            if name not in builtin:
+                raise ValueError(f"Unknown triage rule: {name}")
+            self._rules[name] = builtin[name]
+
+    def register(self, name: str, rule: TriageRule) -> None:
+        """Adds a rule, tried after the ones already registered"""
+        self._rules[name] = rule
+
+    @property
+    def rules(self):
+        return list(self._rules)
+
+    def check(self, question: str, answer: str,
+              history: Sequence[str] = ()) -> Optional[str]:
+        """Name of the rule marking the answer incorrect, None if the LLM must decide"""
+        for name, rule in self._rules.items():
+            if rule(question, answer, history):
+                with self._lock:
+                    self.saved[name] += 1
+                return name
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"saved": sum(self.saved.values()), **self.saved}
+
+    # built-in rules
+
+    def _empty(self, question: str, answer: str, history: Sequence[str]) -> bool:
+        # nothing but whitespace and punctuation
+        return not _words(answer)
+
+    def _one_word(self, question: str, answer: str, history: Sequence[str]) -> bool:
+        return len(_words(answer)) < self.min_words
+
+    def _keyboard_mash(self, question: str, answer: str,
+                       history: Sequence[str]) -> bool:
+        words = _ALPHA_WORD.findall(answer.lower())
+        if not words:
+            return False
+        mashed = sum(_is_mash_word(word) for word in words)
+        return mashed * 2 >= len(words)
+
+    def _repeats_question(self, question: str, answer: str,
+                          history: Sequence[str]) -> bool:
+        # share of the answer's content words already in the question; by
+        # default all of them : the answer adds nothing of its own
+        if _is_yes_no_question(question):
+            # "Yes, a tuple is immutable" restates it and is right
+            return False
+        content = [w for w in _words(answer) if w not in STOPWORDS]
+        if not content:
+            # "yes" / "no" : only the LLM can tell
+            return False
+        asked = set(_words(question))
+        overlap = sum(w in asked for w in content) / len(content)
+        return overlap >= self.max_overlap
+
+    def _duplicate(self, question: str, answer: str,
+                   history: Sequence[str]) -> bool:
+        # the same text pasted for another question, or repeated on a retry
+        if len(_words(answer)) < _PASTE_MIN_WORDS:
+            return False
+        fingerprint = answer_fingerprint(answer)
+        return any(answer_fingerprint(earlier) == fingerprint
+                   for earlier in history)
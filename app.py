@@ -1,23 +1,35 @@
 import streamlit as st
-import threading
 import queue
+import os
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.errors import StreamlitAPIException
 import interview_bot
-from interview_bot import create_interview_graph, InterviewState
+from session_io import AWAITING_ANSWER, SessionIO
+from session_store import (MemoryMessageBus, MemorySessionStore,
+                           SqliteMessageBus, SqliteSessionStore,
+                           purge_session, session_output)
 
 # Initialize session state
 if 'messages' not in st.session_state:
     st.session_state.messages = []
-if 'user_input_queue' not in st.session_state:
-    st.session_state.user_input_queue = queue.Queue()
 if 'bot_output_queue' not in st.session_state:
     st.session_state.bot_output_queue = queue.Queue()
 if 'interview_started' not in st.session_state:
     st.session_state.interview_started = False
 if 'waiting_for_input' not in st.session_state:
     st.session_state.waiting_for_input = False
-if 'interview_thread' not in st.session_state:
-    st.session_state.interview_thread = None
+if 'interview_id' not in st.session_state:
+    st.session_state.interview_id = None
+if 'session_io' not in st.session_state:
+    st.session_state.session_io = None
+if 'settled_count' not in st.session_state:
+    # messages drawn by the last full run
+    st.session_state.settled_count = 0
+if 'admission_requested_at' not in st.session_state:
+    # set while the interview waits in line for a slot
+    st.session_state.admission_requested_at = None
 if 'interview_completed' not in st.session_state:
     st.session_state.interview_completed = False
 if 'flag' not in st.session_state:
@@ -29,6 +41,62 @@ if 'flag' not in st.session_state:
 # Page config
 st.set_page_config(page_title="AI Interview Simulator", page_icon="🤖", layout="wide")
 
+
+@st.cache_resource
+def _warm_up_llms():
+    """Create the shared LLM clients once per process, not per session"""
+    interview_bot.warm_up_llms(
+        ping=os.getenv("LLM_WARM_UP_PING", "false").lower() == "true")
+    return True
+
+
+_warm_up_llms()
+
+
+@st.cache_resource
+def _metrics_endpoint():
+    """Prometheus /metrics and /sessions JSON, once per process"""
+    port = int(os.getenv("METRICS_PORT", "0"))
+    return interview_bot.metrics.serve(port) if port else None
+
+
+_metrics_endpoint()
+
+
+@st.cache_resource
+def _session_backend():
+    """
+    Where transcripts and the bot/candidate channels live. With SESSION_DB
+    it is a SQLite file every app process shares, so a session can move to
+    another worker (with CHECKPOINT_DB for the interview itself).
+    """
+    path = os.getenv("SESSION_DB", "")
+    if path:
+        return SqliteSessionStore(path), SqliteMessageBus(
+            path, poll_interval=float(os.getenv("SESSION_POLL_INTERVAL", "0.05")))
+    return MemorySessionStore(), MemoryMessageBus()
+
+
+session_store, message_bus = _session_backend()
+
+
+def _open_channels(interview_id: str) -> None:
+    """Points this browser session at the interview's output channel on the bus"""
+    st.session_state.bot_output_queue = session_output(message_bus, interview_id)
+    st.session_state.session_io = SessionIO(st.session_state.bot_output_queue)
+
+
+def _save_session() -> None:
+    """Keeps the transcript in the session store for whichever worker serves it next"""
+    if st.session_state.interview_id:
+        session_store.save(st.session_state.interview_id,
+                           {"messages": st.session_state.messages})
+
+
+def _forget_session(interview_id: str) -> None:
+    session_store.delete(interview_id)
+    purge_session(message_bus, interview_id)
+
 # Custom CSS for better chat UI
 st.markdown("""
 <style>
@@ -94,43 +162,201 @@ st.markdown('<div id="sticky-title">🤖 AI Interview Simulator</div>', unsafe_a
 st.markdown("---")
 
 
-def run_interview():
-    """Run the interview in a separate thread"""
-    try:
-        initial_state: InterviewState = {
-            "role": "",
-            "questions": [],
-            "answers": [],
-            "requirements": "",
-            "greeting_shown": False,
-            "question_weights": {},
-            "user_score": 0.0,
-            "wrong_questions": [],
-            "total_possible_score": 0.0
-        }
+@st.cache_resource
+def _turn_pool():
+    """Workers shared by every session; a turn holds one only while the bot works"""
+    return ThreadPoolExecutor(
+        max_workers=int(os.getenv("TURN_WORKERS", "16")),
+        thread_name_prefix="interview-turn")
 
-        app = create_interview_graph()
-        result = app.invoke(initial_state)
 
-        # Send completion message via the module-level queue (set by main thread)
-        try:
-            if interview_bot.bot_output_queue is not None:
-                interview_bot.bot_output_queue.put(
-                    "🎉 Interview process completed!")
-            else:
-                # fallback to printing if queue not available
-                print("🎉 Interview process completed!")
-        except Exception:
-            # ensure background thread doesn't touch Streamlit session_state directly
-            print("🎉 Interview process completed! (couldn't put into queue)")
+def run_turn(session_io: SessionIO, interview_id: str, answer=None,
+             queued_at=None):
+    """Advance the interview until it needs the next answer"""
+    if queued_at is not None:
+        interview_bot.metrics.queue_wait(
+            interview_id, "turn", time.monotonic() - queued_at)
+    try:
+        # this session's channels travel with the graph config, so
+        # concurrent interviews never share queues
+        result = interview_bot.advance_interview(
+            interview_id, session_io, answer)
+
+        # Send completion message via the session's channel (never touch
+        # Streamlit session_state from a worker thread)
+        if result is not None:
+            session_io.send("🎉 Interview process completed!")
+        else:
+            session_io.await_answer()
+    except interview_bot.Cancelled:
+        # restarted or left during the turn : nobody reads this chat any more
+        pass
+    except interview_bot.InterviewNotFound:
+        # finished or discarded meanwhile (another tab, a stale page)
+        session_io.send("⚠️ This interview has already ended. "
+                        "Restart to begin a new one.")
     except Exception as e:
+        session_io.send(f"❌ Error: {str(e)}")
+
+
+# the UI wakes up when the bot has output, or after this many seconds
+UI_WAIT_TIMEOUT = float(os.getenv("UI_WAIT_TIMEOUT", "5"))
+# messages arriving closer together than this are shown in one rerun
+BURST_GAP = 0.05
+# messages redrawn by the live fragment before a full rerun takes them over
+UI_LIVE_MESSAGES = int(os.getenv("UI_LIVE_MESSAGES", "30"))
+
+
+def _handle_bot_message(bot_message: str):
+    """Adds a bot message to the chat and updates the input state"""
+    if bot_message is AWAITING_ANSWER:
+        # the interview is suspended : the candidate's turn
+        st.session_state.waiting_for_input = True
+        return
+
+    # Skip rendering any helper/welcome text that might have been emitted
+    lower_msg = bot_message.lower()
+    # If the bot greeting is emitted, hide the welcome/info block
+    # immediately so the welcome panel cannot appear anymore.
+    if "hello, i am" in lower_msg and "taking your interview" in lower_msg:
+        st.session_state.flag = False
+    skip_keywords = ["welcome", "start interview", "how it works"]
+    if any(k in lower_msg for k in skip_keywords):
+        # do not add welcome/how-it-works helper text to chat messages
+        pass
+    else:
+        st.session_state.messages.append(
+            {"role": "assistant", "content": bot_message})
+
+    # If worker sent the completion message, mark interview completed
+    if "interview process completed" in bot_message.lower() or "🎉 interview process completed" in bot_message:
+        st.session_state.interview_completed = True
+        st.session_state.waiting_for_input = False
+        _forget_session(st.session_state.interview_id)
+
+
+def _receive_bot_messages(timeout: float = 0) -> bool:
+    """
+    Moves the bot's messages into the chat.
+    Blocks up to `timeout` seconds for the first one, then keeps collecting
+    while the rest of a burst arrives. Returns True if anything arrived.
+    """
+    bot_queue = st.session_state.bot_output_queue
+    try:
+        if timeout > 0:
+            bot_message = bot_queue.get(timeout=timeout)
+        else:
+            bot_message = bot_queue.get_nowait()
+    except queue.Empty:
+        return False
+
+    while True:
+        _handle_bot_message(bot_message)
         try:
-            if interview_bot.bot_output_queue is not None:
-                interview_bot.bot_output_queue.put(f"❌ Error: {str(e)}")
-            else:
-                print(f"❌ Error: {str(e)}")
-        except Exception:
-            print(f"❌ Error: {str(e)}")
+            bot_message = bot_queue.get(timeout=BURST_GAP)
+        except queue.Empty:
+            if not st.session_state.interview_completed:
+                _save_session()
+            return True
+
+
+def _resume_interview(interview_id: str) -> bool:
+    """
+    Picks up a suspended interview by id (the `interview` query parameter),
+    e.g. after a restart or on another worker sharing CHECKPOINT_DB.
+    The question it waits on is shown again; the answer resumes it.
+    """
+    pending = interview_bot.interview_prompt(interview_id)
+    if pending is None:
+        return False
+    # counted against the cap again; when every slot is taken, its next
+    # turn waits in line
+    interview_bot.admission.touch(interview_id)
+
+    st.session_state.interview_started = True
+    st.session_state.interview_completed = False
+    st.session_state.flag = False
+    st.session_state.interview_id = interview_id
+    _open_channels(interview_id)
+
+    # the transcript so far, when the store has it
+    saved = session_store.load(interview_id) or {}
+    st.session_state.messages = saved.get("messages", [])
+    resumed = "🔁 Resuming your interview."
+    if not st.session_state.bot_output_queue.empty():
+        # the previous worker's last messages are still on the bus
+        st.session_state.messages.append({"role": "assistant", "content": resumed})
+        st.session_state.waiting_for_input = False
+        return True
+
+    if pending["retry"]:
+        resumed += " Please try again:"
+    st.session_state.messages += [
+        {"role": "assistant", "content": resumed},
+        {"role": "assistant", "content": pending["question"]}]
+    st.session_state.waiting_for_input = True
+    return True
+
+
+if not st.session_state.interview_started and st.query_params.get("interview"):
+    if not _resume_interview(st.query_params["interview"]):
+        # finished, discarded or unknown here : start over
+        del st.query_params["interview"]
+
+
+def _begin_interview():
+    """Runs the first turn of an admitted interview"""
+    requested_at = st.session_state.admission_requested_at
+    st.session_state.admission_requested_at = None
+    interview_bot.metrics.queue_wait(
+        st.session_state.interview_id, "admission",
+        time.monotonic() - requested_at)
+
+    # First turn runs on the shared pool; the interview is suspended
+    # (no thread held) whenever it waits for the candidate
+    _turn_pool().submit(run_turn, st.session_state.session_io,
+                        st.session_state.interview_id, None,
+                        time.monotonic())
+
+
+# the waiting room checks for a free slot this often
+ADMISSION_POLL_INTERVAL = float(os.getenv("ADMISSION_POLL_INTERVAL", "2"))
+
+
+@st.fragment(run_every=ADMISSION_POLL_INTERVAL)
+def _waiting_room():
+    """Place in line while every interview slot is taken; starts the interview once admitted"""
+    interview_id = st.session_state.interview_id
+    position = interview_bot.admission.position(interview_id)
+    if position is None:
+        # dropped from the line while the page was away : back in line
+        position = interview_bot.admission.request(interview_id)
+    if position == 0:
+        _begin_interview()
+        st.rerun()
+
+    st.info(f"⏳ All interviewers are busy. You are number {position} in line; "
+            "your interview starts automatically.")
+
+
+def _reset_interview():
+    """
+    Drops the current interview (running or waiting) and shows the welcome
+    page. A turn still running is cancelled with its LLM calls.
+    """
+    if st.session_state.interview_id:
+        interview_bot.discard_interview(st.session_state.interview_id)
+        _forget_session(st.session_state.interview_id)
+    st.query_params.pop("interview", None)
+    st.session_state.interview_id = None
+    st.session_state.admission_requested_at = None
+    st.session_state.interview_started = False
+    st.session_state.interview_completed = False
+    st.session_state.messages = []
+    st.session_state.waiting_for_input = False
+    st.session_state.bot_output_queue = queue.Queue()
+    # show the welcome/info block again after restart
+    st.session_state.flag = True
 
 
 # Start interview button (always rendered; disabled when interview already running)
@@ -149,14 +375,17 @@ with col2:
         # hide the welcome/info block
         st.session_state.flag = False
 
-        # Ensure interview_bot module-level queues point to the Streamlit queues
-        interview_bot.user_input_queue = st.session_state.user_input_queue
-        interview_bot.bot_output_queue = st.session_state.bot_output_queue
+        st.session_state.interview_id = uuid.uuid4().hex
+        # Channels of this interview only
+        _open_channels(st.session_state.interview_id)
+        # the id in the URL : a reload or another worker can resume it
+        st.query_params["interview"] = st.session_state.interview_id
 
-        # Start interview in background thread
-        interview_thread = threading.Thread(target=run_interview, daemon=True)
-        interview_thread.start()
-        st.session_state.interview_thread = interview_thread
+        # past MAX_ACTIVE_INTERVIEWS the candidate waits in line and the
+        # interview begins once admitted
+        st.session_state.admission_requested_at = time.monotonic()
+        if interview_bot.admission.request(st.session_state.interview_id) == 0:
+            _begin_interview()
 
         # Trigger a rerun so the UI updates immediately
         try:
@@ -177,56 +406,28 @@ with col2:
             on_click=_start_interview,
         )
 
-# Chat interface
-if st.session_state.interview_started:
-    # Check for new bot messages continuously
-    message_received = False
-    try:
-        while True:
-            bot_message = st.session_state.bot_output_queue.get_nowait()
-            # Skip rendering any helper/welcome text that might have been emitted
-            lower_msg = bot_message.lower()
-            # If the bot greeting is emitted, hide the welcome/info block
-            # immediately so the welcome panel cannot appear anymore.
-            if "hello, i am" in lower_msg and "taking your interview" in lower_msg:
-                st.session_state.flag = False
-            skip_keywords = ["welcome", "start interview", "how it works"]
-            if any(k in lower_msg for k in skip_keywords):
-                # do not add welcome/how-it-works helper text to chat messages
-                pass
-            else:
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": bot_message})
-            message_received = True
-
-            # If worker sent the completion message, mark interview completed
-            if "interview process completed" in bot_message.lower() or "🎉 interview process completed" in bot_message:
-                st.session_state.interview_completed = True
-                st.session_state.waiting_for_input = False
-
-            # Check if this message is asking for input
-            # Look for "Your answer:" prompt specifically
-            if "your answer:" in bot_message.lower() or bot_message.strip().endswith("?"):
-                st.session_state.waiting_for_input = True
-            elif "noted" in bot_message.lower() or "correct" in bot_message.lower() or "incorrect" in bot_message.lower():
-                # After feedback, wait for next question
-                st.session_state.waiting_for_input = False
-    except queue.Empty:
-        pass
+def _render_message(message):
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+
 
-    # Force rerun if we received messages to update UI
-    if message_received:
-        time.sleep(0.1)  # Small delay to batch messages
+def _rerun_live_chat():
+    """Reruns the live fragment only; a full rerun when called from a full run"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
         st.rerun()
 
-    # Display chat messages
-    chat_container = st.container()
-    with chat_container:
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
 
-    # (Processing indicator removed — background updates are shown via messages)
+@st.fragment
+def _live_chat():
+    """
+    Messages since the last full run, and the answer box.
+    While the bot has the turn, its messages are drawn as they arrive;
+    the older messages and the rest of the page are not redrawn.
+    """
+    # Pick up bot messages that arrived since the last run
+    _receive_bot_messages()
 
     # User input
     if st.session_state.waiting_for_input and not st.session_state.interview_completed:
@@ -236,36 +437,75 @@ if st.session_state.interview_started:
             # Add user message to chat
             st.session_state.messages.append(
                 {"role": "user", "content": user_input})
+            _save_session()
 
-            # Send to bot
-            st.session_state.user_input_queue.put(user_input)
+            # Send to bot : resumes the suspended interview on the shared pool
+            _turn_pool().submit(run_turn, st.session_state.session_io,
+                                st.session_state.interview_id, user_input,
+                                time.monotonic())
             st.session_state.waiting_for_input = False
 
-            st.rerun()
+            _rerun_live_chat()
     elif st.session_state.interview_completed:
         st.chat_input("Interview completed!", disabled=True)
     else:
         # Show placeholder when not waiting for input
         st.chat_input("Waiting for next question...", disabled=True)
 
-    # Auto-refresh to check for new messages
-    if not st.session_state.interview_completed:
-        time.sleep(0.5)
+    shown = st.session_state.settled_count
+    for message in st.session_state.messages[shown:]:
+        _render_message(message)
+    shown = len(st.session_state.messages)
+    if st.session_state.waiting_for_input or st.session_state.interview_completed:
+        return
+
+    # The bot's turn : show its messages as they arrive, no polling
+    while not (st.session_state.waiting_for_input or st.session_state.interview_completed):
+        if not _receive_bot_messages(timeout=UI_WAIT_TIMEOUT):
+            # quiet for a while : end the run so pending clicks are handled
+            _rerun_live_chat()
+        for message in st.session_state.messages[shown:]:
+            _render_message(message)
+        shown = len(st.session_state.messages)
+
+    # the answer box follows the turn; a long live part is folded into
+    # the page so each fragment run stays small
+    if shown - st.session_state.settled_count > UI_LIVE_MESSAGES:
         st.rerun()
+    _rerun_live_chat()
+
+
+# Waiting room
+if st.session_state.admission_requested_at is not None:
+    _waiting_room()
+
+    st.markdown("---")
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        if st.button("🚪 Leave the Queue", use_container_width=True):
+            _reset_interview()
+            st.rerun()
+
+# Chat interface
+elif st.session_state.interview_started:
+    # Display chat messages : drawn here only on a full rerun (page load,
+    # start, every UI_LIVE_MESSAGES messages); the live fragment below
+    # draws the newer ones
+    chat_container = st.container()
+    with chat_container:
+        for message in st.session_state.messages:
+            _render_message(message)
+    st.session_state.settled_count = len(st.session_state.messages)
+
+    # (Processing indicator removed — background updates are shown via messages)
+    _live_chat()
 
     # Restart button
     st.markdown("---")
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if st.button("🔄 Restart Interview", use_container_width=True):
-            st.session_state.interview_started = False
-            st.session_state.interview_completed = False
-            st.session_state.messages = []
-            st.session_state.waiting_for_input = False
-            st.session_state.user_input_queue = queue.Queue()
-            st.session_state.bot_output_queue = queue.Queue()
-            # show the welcome/info block again after restart
-            st.session_state.flag = True
+            _reset_interview()
             st.rerun()
 else:
     # Welcome message (only show when allowed)
@@ -0,0 +1,159 @@
+import logging
+import re
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# "1: CORRECT", "2. INCORRECT", "3) correct" ...
+_VERDICT_LINE = re.compile(
+    r"^\s*(?:ANSWER\s*)?(\d+)\s*[:.)\-]\s*\**\s*(INCORRECT|CORRECT)\b", re.IGNORECASE)
+
+
+def build_batch_prompt(requirements: str, items: List[Tuple[str, str]]) -> str:
+    """One evaluation prompt for several (question, answer) pairs"""
+    answers = "\n\n".join(
+        f"{i}. Question: {question}\n   User Answer: {answer}"
+        for i, (question, answer) in enumerate(items, 1))
+
+    return f"""You are a VERY STRICT evaluator. Evaluate each of these {requirements} interview answers:
+
+{answers}
+
+For each answer, decide if it is technically correct for {requirements}.
+Reply with exactly one line per answer in this EXACT format and nothing else:
+1: CORRECT
+2: INCORRECT"""
+
+
+def parse_batch_verdicts(text: str, count: int) -> Dict[int, bool]:
+    """Maps item number (1-based) to its verdict; unparsable items are left out"""
+    verdicts: Dict[int, bool] = {}
+    for line in text.splitlines():
+        match = _VERDICT_LINE.match(line)
+        if not match:
+            continue
+        number = int(match.group(1))
+        if 1 <= number <= count and number not in verdicts:
+            verdicts[number] = match.group(2).upper() == "CORRECT"
+    return verdicts
+
+
+class BatchEvaluator:
+    """
+    Collects submitted answers and grades them together in one LLM call.
+    A batch is sent once `batch_size` answers are waiting or `flush_timeout`
+    seconds after its first answer, whichever comes first. Items missing
+    from the batched reply are graded one by one with `fallback`; a batch
+    that timed out fails all its items with the TimeoutError.
+    """
+
+    def __init__(self, requirements: str,
+                 invoke: Callable[[str], Optional[str]],
+                 fallback: Callable[[str, str], Optional[bool]],
+                 executor: Executor,
+                 batch_size: int = 5, flush_timeout: float = 10.0,
+                 cache=None):
+        self.requirements = requirements
+        self.invoke = invoke
+        self.fallback = fallback
+        self.executor = executor
+        self.batch_size = max(1, batch_size)
+        self.flush_timeout = flush_timeout
+        # optional VerdictCache : hits never reach a batch
+        self.cache = cache
+
+        self.llm_calls = 0
+        self.fallback_calls = 0
+
+        self._items: List[Tuple[str, str, Future]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def submit(self, question: str, answer: str) -> Future:
+        """Queues an answer; the future resolves to True/False/None"""
+        future: Future = Future()
+        batch = None
+
+        if self.cache is not None:
+            cached = self.cache.get(self.requirements, question, answer)
+            if cached is not None:
+                future.set_result(cached)
+                return future
+
+        with self._lock:
+            self._items.append((question, answer, future))
+            if len(self._items) >= self.batch_size:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_timeout, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if batch:
+            self.executor.submit(self._run, batch)
+        return future
+
+    def flush(self) -> None:
+        """Sends whatever is waiting without waiting for a full batch"""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self.executor.submit(self._run, batch)
+
+    def _take(self) -> List[Tuple[str, str, Future]]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._items = self._items, []
+        return batch
+
+    def close(self) -> None:
+        """Drops the waiting answers (their futures are cancelled) and the timer"""
+        with self._lock:
+            batch = self._take()
+        for _, _, future in batch:
+            future.cancel()
+
+    def _run(self, batch: List[Tuple[str, str, Future]]) -> None:
+        try:
+            self._grade(batch)
+        finally:
+            # aborted midway (cancelled session) : nobody waits for the rest
+            for _, _, future in batch:
+                future.cancel()
+
+    def _grade(self, batch: List[Tuple[str, str, Future]]) -> None:
+        verdicts: Dict[int, bool] = {}
+
+        if len(batch) > 1:
+            prompt = build_batch_prompt(
+                self.requirements, [(q, a) for q, a, _ in batch])
+            try:
+                self.llm_calls += 1
+                text = self.invoke(prompt)
+                if text is not None:
+                    verdicts = parse_batch_verdicts(text, len(batch))
+            except TimeoutError as e:
+                # asking again per item would only wait longer
+                for _, _, future in batch:
+                    future.set_exception(e)
+                return
+            except Exception:
+                logger.exception("Batch evaluation failed")
+
+        # per-item fallback for anything the batch didn't settle
+        for number, (question, answer, future) in enumerate(batch, 1):
+            if number in verdicts:
+                if self.cache is not None:
+                    self.cache.put(self.requirements, question, answer,
+                                   verdicts[number])
+                future.set_result(verdicts[number])
+                continue
+            try:
+                self.fallback_calls += 1
+                future.set_result(self.fallback(question, answer))
+            except Exception as e:
+                future.set_exception(e)
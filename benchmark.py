@@ -0,0 +1,710 @@
+"""
+Headless load test for the interview graph.
+
+Runs N interviews concurrently against a deterministic local stub chat
+model, with scripted candidates, and reports throughput, per-node latency
+percentiles, LLM call counts and peak memory. Runs fully offline.
+
+    python benchmark.py --sessions 50 --profile mixed --latency 0.3 --error-rate 0.02
+
+With a cassette, LLM responses are recorded once (from the stub or, with
+--live, the real providers) and replayed in later runs, so builds can be
+compared on the same responses and latencies:
+
+    python benchmark.py --live --record --cassette baseline.json --sessions 5
+    python benchmark.py --cassette baseline.json --replay-latency --sessions 5
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.types import Command
+
+import interview_bot
+from admission import AdmissionController, DegradationPolicy
+from answer_triage import TRIAGE_RULES, AnswerTriage
+from llm_cassette import Cassette
+from metrics import InterviewMetrics
+from question_bank import QuestionBank
+from reference_answers import ReferenceScorer, ReferenceStore
+from rate_limiter import RateLimitScheduler
+from session_io import AsyncSessionIO, SessionIO
+from score_bounds import PASS_RATIO
+from sqlite_checkpointer import SqliteCheckpointer
+from verdict_cache import VerdictCache
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+# answers containing this marker are graded CORRECT by the stub
+CORRECT_MARKER = "correct-answer"
+
+PROFILES = ["correct", "wrong", "mixed", "idk"]
+
+
+# stub chat model
+
+class StubBehaviour:
+    """
+    Latency, injected errors and call counts shared by every stub client.
+    Delays and errors come from one seeded random stream, so a run with
+    the same arguments makes the same draws. Hung calls come from a second
+    stream : turning them on leaves the other draws unchanged.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0,
+                 questions_per_reply: int = 0, hang_rate: float = 0.0):
+        self.latency = latency
+        self.questions_per_reply = questions_per_reply
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self._random = random.Random(seed)
+        self._hang_random = random.Random(seed + 1)
+        self._lock = threading.Lock()
+        self.calls: Counter = Counter()
+        self.errors = 0
+        self.hangs = 0
+
+    def draw(self, kind: str):
+        """Counts a call; returns (delay, fail)"""
+        with self._lock:
+            self.calls[kind] += 1
+            delay = max(0.0, self._random.gauss(
+                self.latency, self.latency * self.jitter))
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def hang(self) -> bool:
+        """Whether this call hangs, i.e. never answers"""
+        if not self.hang_rate:
+            return False
+        with self._lock:
+            hang = self._hang_random.random() < self.hang_rate
+            self.hangs += hang
+        return hang
+
+
+def _prompt_text(messages) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def _prompt_kind(text: str) -> str:
+    if "generating interview questions" in text:
+        return "generate"
+    if "Evaluate each of these" in text:
+        return "batch-evaluate"
+    if "Evaluate this" in text:
+        return "evaluate"
+    if "study feedback" in text:
+        return "feedback"
+    return "other"
+
+
+def _verdict(answer: str) -> str:
+    return "CORRECT" if CORRECT_MARKER in answer else "INCORRECT"
+
+
+def _generated_questions(text: str, questions_per_reply: int = 0) -> List[dict]:
+    topic = re.search(r"should test (.+?) knowledge", text)
+    topic = topic.group(1) if topic else "the role"
+    count = re.search(r"Generate exactly (\d+)", text)
+    count = int(count.group(1)) if count else interview_bot.POSITION_QUESTION_COUNT
+    if questions_per_reply:
+        count = min(count, questions_per_reply)
+    # a top-up lists the questions already asked : continue after them
+    offset = len(re.findall(r"^\s*- Question \d+ about", text, re.M))
+
+    questions = []
+    for i in range(offset + 1, offset + count + 1):
+        item = {"question": f"Question {i} about {topic}?", "weight": i % 10 + 1}
+        if "<a correct answer" in text:
+            item["answer"] = f"The {CORRECT_MARKER} to question {i} about {topic}."
+            item["key_points"] = [CORRECT_MARKER, f"question {i} about {topic}"]
+        questions.append(item)
+    return questions
+
+
+def stub_reply(text: str, questions_per_reply: int = 0) -> str:
+    """
+    The stub's answer to one of the bot's prompts.
+    `questions_per_reply` caps generated questions, to exercise top-ups.
+    """
+    kind = _prompt_kind(text)
+
+    if kind == "generate":
+        questions = _generated_questions(text, questions_per_reply)
+        if "JSON schema" in text:
+            return "```json\n" + json.dumps({"questions": questions}, indent=1) + "\n```"
+        return "\n\n".join(
+            f"QUESTION: {q['question']}\n"
+            + (f"ANSWER: {q['answer']}\nKEY POINTS: {'; '.join(q['key_points'])}\n"
+               if "answer" in q else "")
+            + f"WEIGHT: {q['weight']}"
+            for q in questions)
+
+    if kind == "batch-evaluate":
+        answers = re.findall(r"User Answer: (.*)", text)
+        return "\n".join(f"{i}: {_verdict(answer)}"
+                         for i, answer in enumerate(answers, 1))
+
+    if kind == "evaluate":
+        answers = re.findall(r"User Answer: (.*)", text)
+        return _verdict(answers[-1] if answers else "")
+
+    if kind == "feedback":
+        return "Review the fundamentals behind each question and practice with small projects."
+
+    return "OK"
+
+
+def _message(text: str, prompt: str, chunk: bool = False):
+    usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4,
+             "total_tokens": (len(prompt) + len(text)) // 4}
+    if chunk:
+        return AIMessageChunk(content=text, usage_metadata=usage)
+    return AIMessage(content=text, usage_metadata=usage)
+
+
+# a hung call without a timeout gives up after this long
+HANG_SECONDS = 600.0
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model answering the bot's prompts.
+    A hung call waits out the call's `timeout` and raises TimeoutError,
+    as a provider client does.
+    """
+
+    behaviour: Any = None
+    chunk_size: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-stub"
+
+    def _draw(self, text: str, timeout: Optional[float] = None) -> float:
+        delay, fail = self.behaviour.draw(_prompt_kind(text))
+        if self.behaviour.hang():
+            time.sleep(timeout or HANG_SECONDS)
+            raise TimeoutError("Request timed out: injected hang")
+        if fail:
+            time.sleep(delay)
+            raise RuntimeError("429 RESOURCE_EXHAUSTED: injected rate limit")
+        return delay
+
+    async def _adraw(self, text: str, timeout: Optional[float] = None) -> float:
+        delay, fail = self.behaviour.draw(_prompt_kind(text))
+        if self.behaviour.hang():
+            await asyncio.sleep(timeout or HANG_SECONDS)
+            raise TimeoutError("Request timed out: injected hang")
+        if fail:
+            await asyncio.sleep(delay)
+            raise RuntimeError("429 RESOURCE_EXHAUSTED: injected rate limit")
+        return delay
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = _prompt_text(messages)
+        time.sleep(self._draw(text, kwargs.get("timeout")))
+        return ChatResult(generations=[ChatGeneration(
+            message=_message(stub_reply(text, self.behaviour.questions_per_reply), text))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = _prompt_text(messages)
+        await asyncio.sleep(await self._adraw(text, kwargs.get("timeout")))
+        return ChatResult(generations=[ChatGeneration(
+            message=_message(stub_reply(text, self.behaviour.questions_per_reply), text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = _prompt_text(messages)
+        time.sleep(self._draw(text, kwargs.get("timeout")))
+        reply = stub_reply(text, self.behaviour.questions_per_reply)
+        for i in range(0, len(reply), self.chunk_size):
+            # prompt usage comes with the first chunk
+            yield ChatGenerationChunk(message=_message(
+                reply[i:i + self.chunk_size], "" if i else text, chunk=True))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        text = _prompt_text(messages)
+        await asyncio.sleep(await self._adraw(text, kwargs.get("timeout")))
+        reply = stub_reply(text, self.behaviour.questions_per_reply)
+        for i in range(0, len(reply), self.chunk_size):
+            yield ChatGenerationChunk(message=_message(
+                reply[i:i + self.chunk_size], "" if i else text, chunk=True))
+
+
+# simulated candidates
+
+def candidate_answer(profile: str, session: int, topic: str,
+                     question: str, retry: bool) -> str:
+    """Scripted answer of a candidate following `profile`"""
+    starting = interview_bot.STARTING_QUESTIONS
+    if question == starting[0]:
+        return f"Candidate {session}"
+    if question == starting[1]:
+        return "Backend developer"
+    if question == starting[2]:
+        return topic
+
+    if profile == "mixed":
+        # stable per question : a third each right, wrong and passed;
+        # half of the second chances are right
+        roll = zlib.crc32(question.encode()) % 6
+        if retry:
+            profile = "correct" if roll % 2 else "wrong"
+        else:
+            profile = ("correct", "wrong", "idk")[roll % 3]
+
+    if profile == "correct":
+        return f"This is the {CORRECT_MARKER} to: {question}"
+    if profile == "idk":
+        return "I don't know"
+    return "Something unrelated"
+
+
+# measurements
+
+class NodeTimer(BaseCallbackHandler):
+    """Wall time of every graph-node run, from LangGraph's chain callbacks"""
+
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[Any, tuple] = {}
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # only the node itself, not routers or runnables nested in it
+        if node and kwargs.get("name") == node:
+            with self._lock:
+                self._started[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id) -> None:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                node, at = started
+                self.samples[node].append(time.perf_counter() - at)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        # await_answer ends with the interrupt that suspends the graph
+        self._finish(run_id)
+
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def _summary(samples: List[float]) -> Dict[str, Any]:
+    return {"count": len(samples),
+            "p50": percentile(samples, 50), "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "max": max(samples) if samples else None}
+
+
+# session drivers
+
+def _pending_prompt(snapshot) -> Optional[dict]:
+    """The interrupt payload of a suspended interview, None once it is over"""
+    if not snapshot.next:
+        return None
+    for task in snapshot.tasks:
+        for pending in task.interrupts:
+            return pending.value
+    return None
+
+
+def _passed(state: dict) -> bool:
+    total = state.get("total_possible_score", 0)
+    return total > 0 and state.get("user_score", 0) >= PASS_RATIO * total
+
+
+def run_session(graph, index: int, args, timer: NodeTimer) -> Dict[str, Any]:
+    """Drives one interview to the end on the calling thread"""
+    thread_id = uuid.uuid4().hex
+    topic = _topic(index, args)
+    config = {"configurable": {"thread_id": thread_id, "session_io": SessionIO()},
+              "callbacks": [timer]}
+
+    metrics = interview_bot.metrics
+    admission = interview_bot.admission
+
+    queued = time.perf_counter()
+    admission.request(thread_id)
+    admission.wait(thread_id)
+    started = time.perf_counter()
+    metrics.turn_started(thread_id)
+    graph.invoke(interview_bot.new_interview_state(thread_id), config)
+    turns = 0
+    while True:
+        snapshot = graph.get_state(config)
+        prompt = _pending_prompt(snapshot)
+        metrics.turn_finished(thread_id, suspended=prompt is not None)
+        if prompt is None:
+            break
+        if args.think_time:
+            time.sleep(args.think_time)
+        answer = candidate_answer(args.profile, index, topic,
+                                  prompt["question"], prompt["retry"])
+        metrics.turn_started(thread_id)
+        graph.invoke(Command(resume=answer), config)
+        turns += 1
+
+    state = snapshot.values
+    graph.checkpointer.delete_thread(thread_id)
+    admission.release(thread_id)
+    metrics.finish_session(thread_id)
+    return {"seconds": time.perf_counter() - started, "turns": turns,
+            "admission_seconds": started - queued,
+            "score": state.get("user_score", 0),
+            "passed": _passed(state),
+            "settled_early": state.get("outcome_settled", False)}
+
+
+async def arun_session(graph, index: int, args, timer: NodeTimer) -> Dict[str, Any]:
+    """run_session() on the async graph"""
+    thread_id = uuid.uuid4().hex
+    topic = _topic(index, args)
+    config = {"configurable": {"thread_id": thread_id,
+                               "session_io": AsyncSessionIO()},
+              "callbacks": [timer]}
+
+    metrics = interview_bot.metrics
+    admission = interview_bot.admission
+
+    queued = time.perf_counter()
+    position = admission.request(thread_id)
+    while position:
+        await asyncio.sleep(0.01)
+        position = admission.position(thread_id)
+    started = time.perf_counter()
+    metrics.turn_started(thread_id)
+    await graph.ainvoke(interview_bot.new_interview_state(thread_id), config)
+    turns = 0
+    while True:
+        snapshot = await graph.aget_state(config)
+        prompt = _pending_prompt(snapshot)
+        metrics.turn_finished(thread_id, suspended=prompt is not None)
+        if prompt is None:
+            break
+        if args.think_time:
+            await asyncio.sleep(args.think_time)
+        answer = candidate_answer(args.profile, index, topic,
+                                  prompt["question"], prompt["retry"])
+        metrics.turn_started(thread_id)
+        await graph.ainvoke(Command(resume=answer), config)
+        turns += 1
+
+    state = snapshot.values
+    await graph.checkpointer.adelete_thread(thread_id)
+    admission.release(thread_id)
+    metrics.finish_session(thread_id)
+    return {"seconds": time.perf_counter() - started, "turns": turns,
+            "admission_seconds": started - queued,
+            "score": state.get("user_score", 0),
+            "passed": _passed(state),
+            "settled_early": state.get("outcome_settled", False)}
+
+
+def _topic(index: int, args) -> str:
+    # distinct topics miss the question-bank, shared ones hit it
+    if args.topics > 0:
+        return f"topic-{index % args.topics}"
+    return f"topic-{index}"
+
+
+# setup and report
+
+def configure(args) -> StubBehaviour:
+    """Points the interview engine at the stub and fresh in-memory caches"""
+    behaviour = StubBehaviour(args.latency, args.jitter, args.error_rate,
+                              args.seed, args.questions_per_reply, args.hang_rate)
+    if not args.live:
+        for provider in ("google", "groq"):
+            interview_bot.llm_registry.register(
+                provider, lambda model, api_key: StubChatModel(behaviour=behaviour))
+
+    interview_bot.llm_cassette = None
+    if args.cassette:
+        interview_bot.llm_cassette = Cassette(
+            args.cassette, mode="record" if args.record else "replay",
+            reproduce_latency=args.replay_latency)
+
+    interview_bot.question_bank = QuestionBank(directory="")
+    interview_bot.metrics = InterviewMetrics(session_dir=args.session_metrics or "")
+    interview_bot.answer_triage = AnswerTriage(
+        rules=() if args.no_triage else TRIAGE_RULES)
+    interview_bot.REFERENCE_ANSWERS = args.references
+    interview_bot.GENERATION_FORMAT = args.generation_format
+    interview_bot.reference_store = ReferenceStore()
+    interview_bot.reference_scorer = ReferenceScorer()
+    interview_bot.verdict_cache = VerdictCache()
+    interview_bot.rate_limiter = RateLimitScheduler(
+        requests_per_minute=args.requests_per_minute,
+        tokens_per_minute=args.tokens_per_minute)
+    interview_bot.admission = AdmissionController(max_active=args.max_active,
+                                                  wait_timeout=0, idle_timeout=0)
+    interview_bot.degradation = DegradationPolicy(
+        lambda: interview_bot.rate_limiter.backlog,
+        {"brief_feedback": args.degrade_feedback,
+         "cached_questions": args.degrade_questions})
+    interview_bot.LLM_CALL_TIMEOUT = args.call_timeout
+    interview_bot.SESSION_DEADLINE = args.session_deadline
+    interview_bot.PIPELINED_EVALUATION = not args.sequential
+    interview_bot.ADAPTIVE_TERMINATION = args.adaptive
+    interview_bot.ADAPTIVE_MIN_QUESTIONS = args.min_questions
+    interview_bot.HEAVY_QUESTIONS_FIRST = args.heavy_first
+    interview_bot.QUESTION_STREAMING = not args.no_streaming
+    return behaviour
+
+
+def run(args) -> Dict[str, Any]:
+    behaviour = configure(args)
+    timer = NodeTimer()
+    checkpointer = (SqliteCheckpointer(args.checkpoint_db)
+                    if args.checkpoint_db else InMemorySaver())
+    graph = interview_bot.create_interview_graph(
+        checkpointer=checkpointer, use_async=args.use_async)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+
+    if args.use_async:
+        async def run_all():
+            return await asyncio.gather(*(
+                arun_session(graph, i, args, timer) for i in range(args.sessions)))
+        sessions = asyncio.run(run_all())
+    else:
+        with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+            sessions = list(executor.map(
+                lambda i: run_session(graph, i, args, timer), range(args.sessions)))
+
+    elapsed = time.perf_counter() - started
+    cassette = interview_bot.llm_cassette
+    if cassette is not None and cassette.mode == "record":
+        cassette.save()
+    peak_traced = None
+    if args.trace_memory:
+        peak_traced = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(interview_bot.metrics.render())
+
+    finished = list(interview_bot.metrics.finished.values())
+    turns = sum(s["turns"] for s in sessions)
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "json"},
+        "elapsed_seconds": elapsed,
+        "sessions_per_second": len(sessions) / elapsed,
+        "turns_per_second": turns / elapsed,
+        "turns": turns,
+        "session_seconds": _summary([s["seconds"] for s in sessions]),
+        "admission_seconds": _summary([s["admission_seconds"] for s in sessions]),
+        "scores": sorted(Counter(s["score"] for s in sessions).items()),
+        "passed": sum(s["passed"] for s in sessions),
+        "settled_early": sum(s["settled_early"] for s in sessions),
+        "nodes": {node: _summary(samples)
+                  for node, samples in sorted(timer.samples.items())},
+        "llm_calls": dict(behaviour.calls),
+        "llm_purposes": interview_bot.metrics.llm_totals(),
+        "bot_seconds": _summary([s["bot_seconds"] for s in finished]),
+        "think_seconds": _summary([s["think_seconds"] for s in finished]),
+        "llm_errors_injected": behaviour.errors,
+        "llm_hangs_injected": behaviour.hangs,
+        "rate_limiter": {"granted": interview_bot.rate_limiter.granted,
+                         "waited": interview_bot.rate_limiter.waited,
+                         "backoffs": interview_bot.rate_limiter.backoffs},
+        "verdict_cache": interview_bot.verdict_cache.stats(),
+        "triage": interview_bot.answer_triage.stats(),
+        "reference_scoring": interview_bot.reference_scorer.stats(),
+        "admission": interview_bot.admission.stats(),
+        "degradation": interview_bot.degradation.stats(),
+        "cassette": cassette.stats() if cassette is not None else None,
+        "peak_rss_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                        if resource else None),
+        "peak_traced_mb": peak_traced / 2 ** 20 if peak_traced else None,
+    }
+
+
+def _ms(seconds: Optional[float]) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    config = report["config"]
+    print(f"sessions: {config['sessions']}  profile: {config['profile']}  "
+          f"engine: {'async' if config['use_async'] else 'threads'}  "
+          f"latency: {config['latency']}s  error-rate: {config['error_rate']}")
+    print(f"elapsed: {report['elapsed_seconds']:.2f}s  "
+          f"sessions/s: {report['sessions_per_second']:.2f}  "
+          f"turns/s: {report['turns_per_second']:.1f}")
+    print(f"passed: {report['passed']}/{config['sessions']}  "
+          f"settled early: {report['settled_early']}")
+
+    session = report["session_seconds"]
+    print(f"session time (ms)  p50: {_ms(session['p50'])}  "
+          f"p95: {_ms(session['p95'])}  p99: {_ms(session['p99'])}")
+    admission = report["admission_seconds"]
+    if config["max_active"]:
+        print(f"admission wait (ms)  p50: {_ms(admission['p50'])}  "
+              f"p95: {_ms(admission['p95'])}  max: {_ms(admission['max'])}")
+
+    print(f"\n{'node':<22}{'runs':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for node, stats in report["nodes"].items():
+        print(f"{node:<22}{stats['count']:>8}{_ms(stats['p50']):>10}"
+              f"{_ms(stats['p95']):>10}{_ms(stats['p99']):>10}{_ms(stats['max']):>10}")
+
+    calls = report["llm_calls"]
+    print(f"\nLLM calls: {sum(calls.values())} {calls}  "
+          f"injected errors: {report['llm_errors_injected']}  "
+          f"hangs: {report['llm_hangs_injected']}")
+    print(f"\n{'purpose':<16}{'calls':>7}{'errors':>8}{'retries':>9}"
+          f"{'mean ms':>10}{'prompt tok':>12}{'compl tok':>11}")
+    for purpose, stats in report["llm_purposes"].items():
+        calls = stats.get("calls", 0)
+        mean = stats.get("seconds", 0) / calls if calls else None
+        print(f"{purpose:<16}{calls:>7.0f}{stats.get('errors', 0):>8.0f}"
+              f"{stats.get('retries', 0):>9.0f}{_ms(mean):>10}"
+              f"{stats.get('prompt_tokens', 0):>12.0f}"
+              f"{stats.get('completion_tokens', 0):>11.0f}")
+    bot, think = report["bot_seconds"], report["think_seconds"]
+    print(f"per session  bot time p50/p95 (ms): {_ms(bot['p50'])}/{_ms(bot['p95'])}  "
+          f"think time p50/p95 (ms): {_ms(think['p50'])}/{_ms(think['p95'])}")
+    print(f"rate limiter: {report['rate_limiter']}  "
+          f"verdict cache: {report['verdict_cache']}")
+    print(f"triage: {report['triage']}  "
+          f"reference scoring: {report['reference_scoring']}")
+    if any(report["degradation"].values()):
+        print(f"degradation: {report['degradation']}")
+    if report["cassette"]:
+        print(f"cassette: {report['cassette']}")
+    print(f"peak RSS: {report['peak_rss_mb']:.1f} MB" if report["peak_rss_mb"]
+          else "peak RSS: -", end="")
+    if report["peak_traced_mb"]:
+        print(f"  peak traced: {report['peak_traced_mb']:.1f} MB", end="")
+    print()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20,
+                        help="concurrent interviews")
+    parser.add_argument("--profile", choices=PROFILES, default="mixed",
+                        help="scripted candidate answers")
+    parser.add_argument("--topics", type=int, default=0,
+                        help="distinct requirements across sessions (0 = one per session)")
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="mean stub LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3,
+                        help="latency standard deviation, as a fraction of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="share of LLM calls failing with a rate-limit error")
+    parser.add_argument("--hang-rate", type=float, default=0.0,
+                        help="share of LLM calls that never answer and end "
+                             "at their timeout")
+    parser.add_argument("--call-timeout", type=float, default=60.0,
+                        help="seconds one LLM call may take (0 = no limit)")
+    parser.add_argument("--session-deadline", type=float, default=0.0,
+                        help="seconds an interview may take overall "
+                             "(0 = no limit)")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="seconds each candidate takes per answer")
+    parser.add_argument("--requests-per-minute", type=float, default=0,
+                        help="shared LLM request budget (0 = unlimited)")
+    parser.add_argument("--tokens-per-minute", type=float, default=0,
+                        help="shared LLM token budget (0 = unlimited)")
+    parser.add_argument("--sequential", action="store_true",
+                        help="grade each answer before the next question "
+                             "instead of in background")
+    parser.add_argument("--no-streaming", action="store_true",
+                        help="generate questions without streaming")
+    parser.add_argument("--no-triage", action="store_true",
+                        help="send every answer to the LLM")
+    parser.add_argument("--references", action="store_true",
+                        help="generate reference answers and pre-score against them")
+    parser.add_argument("--generation-format", choices=["text", "json"],
+                        default="text", help="question generation output format")
+    parser.add_argument("--questions-per-reply", type=int, default=0,
+                        help="cap on questions per stub generation reply, to "
+                             "exercise top-ups (0 = all)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="end the technical questions once pass/fail "
+                             "is decided")
+    parser.add_argument("--min-questions", type=int, default=10,
+                        help="position questions asked before --adaptive "
+                             "may stop")
+    parser.add_argument("--heavy-first", action="store_true",
+                        help="ask heavier position questions first")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="drive the async graph on one event loop")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report tracemalloc peak (slower)")
+    parser.add_argument("--cassette",
+                        help="replay LLM responses from this cassette file")
+    parser.add_argument("--record", action="store_true",
+                        help="record the cassette instead of replaying it")
+    parser.add_argument("--replay-latency", action="store_true",
+                        help="wait the recorded latency on replay")
+    parser.add_argument("--live", action="store_true",
+                        help="call the real providers instead of the stub (needs API keys)")
+    parser.add_argument("--metrics",
+                        help="write the Prometheus metrics to this file")
+    parser.add_argument("--session-metrics",
+                        help="write a JSON summary per session into this directory")
+    parser.add_argument("--max-active", type=int, default=0,
+                        help="interviews running at once, the rest wait "
+                             "for admission (0 = all)")
+    parser.add_argument("--degrade-feedback", type=int, default=0,
+                        help="LLM backlog giving brief feedback (0 = never)")
+    parser.add_argument("--degrade-questions", type=int, default=0,
+                        help="LLM backlog serving cached question sets "
+                             "(0 = never)")
+    parser.add_argument("--checkpoint-db",
+                        help="checkpoint interviews into this SQLite file "
+                             "instead of memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
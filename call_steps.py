@@ -0,0 +1,47 @@
+from typing import Generator, Tuple
+
+
+# steps : a generator holding the logic of an operation once, for threads and
+# event loops alike. It yields each blocking call it needs as ("name", *args)
+# and gets the call's result back (or its exception, raised at the yield);
+# what it returns is the operation's result. run_steps() performs the calls
+# on a `calls` namespace of plain functions, arun_steps() on one of coroutines
+Steps = Generator[Tuple, object, object]
+
+
+def run_steps(steps: Steps, calls):
+    """Runs steps to their result, blocking on each call they yield"""
+    result, error = None, None
+    while True:
+        try:
+            if error is not None:
+                request = steps.throw(error)
+            else:
+                request = steps.send(result)
+        except StopIteration as done:
+            return done.value
+        finally:
+            error = None
+        try:
+            result = getattr(calls, request[0])(*request[1:])
+        except BaseException as e:
+            result, error = None, e
+
+
+async def arun_steps(steps: Steps, calls):
+    """run_steps() for coroutines : each call is awaited"""
+    result, error = None, None
+    while True:
+        try:
+            if error is not None:
+                request = steps.throw(error)
+            else:
+                request = steps.send(result)
+        except StopIteration as done:
+            return done.value
+        finally:
+            error = None
+        try:
+            result = await getattr(calls, request[0])(*request[1:])
+        except BaseException as e:
+            result, error = None, e
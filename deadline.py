@@ -0,0 +1,66 @@
+import threading
+import time
+from typing import Optional
+
+
+class Cancelled(BaseException):
+    """
+    The interview was restarted or abandoned while work was running.
+    Like asyncio.CancelledError it is a BaseException, so the
+    `except Exception` fallbacks around LLM calls let it through.
+    """
+
+
+class DeadlineExceeded(TimeoutError):
+    """The interview's overall deadline has passed"""
+
+
+class SessionBudget:
+    """
+    Time an interview's LLM work may still take.
+    `deadline` is a wall-clock time (time.time()) so it survives a restart
+    with the rest of the interview state; 0 means none. Each call gets at
+    most `call_timeout` seconds (0 : no limit) and never more than what is
+    left before the deadline. cancel() stops the session's work : waits
+    give up and no new call is sent.
+    """
+
+    def __init__(self, call_timeout: float = 0.0, deadline: float = 0.0):
+        self.call_timeout = call_timeout
+        self.deadline = deadline
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, None without one"""
+        if not self.deadline:
+            return None
+        return self.deadline - time.time()
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self) -> None:
+        """Raises Cancelled once the session is cancelled"""
+        if self.cancelled:
+            raise Cancelled()
+
+    def timeout(self) -> Optional[float]:
+        """
+        Seconds the next call may take, None for no limit.
+        Raises Cancelled or DeadlineExceeded when no call should start.
+        """
+        self.check()
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded("Interview deadline exceeded")
+        limits = [t for t in (self.call_timeout, remaining) if t]
+        return min(limits) if limits else None
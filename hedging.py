@@ -0,0 +1,263 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# what the running call is for ("evaluate", "generate" ...) : a call is
+# hedged against the latency of calls of the same purpose
+_call_purpose: contextvars.ContextVar = contextvars.ContextVar(
+    "call_purpose", default="")
+
+
+@contextmanager
+def call_purpose(purpose: str):
+    """Tags the LLM calls made inside the block with their purpose"""
+    token = _call_purpose.set(purpose)
+    try:
+        yield
+    finally:
+        _call_purpose.reset(token)
+
+
+class LatencyStats:
+    """Rolling latency window and error counts for one provider and purpose"""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.wins = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self._samples.append(seconds)
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {"calls": self.calls, "errors": self.errors, "wins": self.wins,
+                "p50": self.percentile(50), "p95": self.percentile(95),
+                "p99": self.percentile(99)}
+
+
+def _valid(response) -> bool:
+    content = getattr(response, "content", None)
+    return isinstance(content, str) and bool(content.strip())
+
+
+class HedgedLLM:
+    """
+    Races a primary and a secondary chat model.
+    The prompt goes to the primary first; if it hasn't answered within the
+    hedge deadline (a percentile of its recent latency for calls of the same
+    purpose, see call_purpose()), the secondary gets the same prompt and the
+    first valid response wins. Long generation calls are thus measured
+    against each other, not against short evaluations. An error from either
+    side fails over to the other. The losing call is ignored; call options
+    (timeout) go to every provider, so it still ends in time.
+    `providers` are (name, get_client) pairs, primary first.
+    """
+
+    def __init__(self, providers: List[Tuple[str, Callable]], executor: Executor,
+                 percentile: float = 95, initial_delay: float = 2.0,
+                 min_delay: float = 0.5, min_samples: int = 20):
+        self.providers = providers
+        self.executor = executor
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.hedges = 0
+        # provider -> purpose -> stats
+        self.latency: Dict[str, Dict[str, LatencyStats]] = {
+            name: defaultdict(LatencyStats) for name, _ in providers}
+        self._lock = threading.Lock()
+
+    def _stats(self, name: str, purpose: str) -> LatencyStats:
+        with self._lock:
+            return self.latency[name][purpose]
+
+    def hedge_delay(self, purpose: str = "") -> float:
+        """Seconds to wait for the primary before hedging a call of `purpose`"""
+        primary = self._stats(self.providers[0][0], purpose)
+        if len(primary) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, primary.percentile(self.percentile))
+
+    def _call(self, name: str, get_client, prompt, kwargs, purpose: str):
+        stats = self._stats(name, purpose)
+        started = time.monotonic()
+        try:
+            response = get_client().invoke(prompt, **kwargs)
+        except Exception:
+            stats.record_error()
+            raise
+        stats.record(time.monotonic() - started)
+        return response
+
+    def invoke(self, prompt, **kwargs):
+        running = {}
+        errors = []
+        providers = list(self.providers)
+        purpose = _call_purpose.get()
+
+        name, get_client = providers.pop(0)
+        running[self.executor.submit(
+            self._call, name, get_client, prompt, kwargs, purpose)] = name
+        timeout = self.hedge_delay(purpose)
+
+        while running:
+            done, _ = wait(list(running), timeout=timeout,
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = running.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if _valid(response):
+                    self._stats(name, purpose).wins += 1
+                    # losers are left to finish on their own
+                    for other in running:
+                        other.cancel()
+                    return response
+                errors.append(ValueError(f"Empty response from {name}"))
+
+            # hedge on deadline, fail over on error
+            if providers and (not done or not running):
+                if not done:
+                    self.hedges += 1
+                name, get_client = providers.pop(0)
+                running[self.executor.submit(
+                    self._call, name, get_client, prompt, kwargs, purpose)] = name
+            if not providers:
+                timeout = None
+
+        raise errors[-1] if errors else RuntimeError("No LLM provider answered")
+
+    def stream(self, prompt, **kwargs):
+        """Streams from the first provider that starts answering"""
+        errors = []
+        for name, get_client in self.providers:
+            chunks = get_client().stream(prompt, **kwargs)
+            try:
+                first = next(chunks)
+            except StopIteration:
+                return
+            except Exception as e:
+                self._stats(name, _call_purpose.get()).record_error()
+                errors.append(e)
+                continue
+            yield first
+            yield from chunks
+            return
+        raise errors[-1] if errors else RuntimeError("No LLM provider answered")
+
+    async def _acall(self, name: str, get_client, prompt, kwargs, purpose: str):
+        stats = self._stats(name, purpose)
+        started = time.monotonic()
+        try:
+            response = await get_client().ainvoke(prompt, **kwargs)
+        except Exception:
+            stats.record_error()
+            raise
+        stats.record(time.monotonic() - started)
+        return response
+
+    async def ainvoke(self, prompt, **kwargs):
+        """invoke() for coroutines; the losing call is cancelled"""
+        running = {}
+        errors = []
+        providers = list(self.providers)
+        purpose = _call_purpose.get()
+
+        name, get_client = providers.pop(0)
+        running[asyncio.ensure_future(
+            self._acall(name, get_client, prompt, kwargs, purpose))] = name
+        timeout = self.hedge_delay(purpose)
+
+        try:
+            while running:
+                done, _ = await asyncio.wait(list(running), timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    name = running.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    if _valid(response):
+                        self._stats(name, purpose).wins += 1
+                        return response
+                    errors.append(ValueError(f"Empty response from {name}"))
+
+                # hedge on deadline, fail over on error
+                if providers and (not done or not running):
+                    if not done:
+                        self.hedges += 1
+                    name, get_client = providers.pop(0)
+                    running[asyncio.ensure_future(self._acall(
+                        name, get_client, prompt, kwargs, purpose))] = name
+                if not providers:
+                    timeout = None
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise errors[-1] if errors else RuntimeError("No LLM provider answered")
+
+    async def astream(self, prompt, **kwargs):
+        """stream() for coroutines"""
+        errors = []
+        for name, get_client in self.providers:
+            chunks = get_client().astream(prompt, **kwargs).__aiter__()
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                self._stats(name, _call_purpose.get()).record_error()
+                errors.append(e)
+                continue
+            yield first
+            async for chunk in chunks:
+                yield chunk
+            return
+        raise errors[-1] if errors else RuntimeError("No LLM provider answered")
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            latency = {name: dict(purposes)
+                       for name, purposes in self.latency.items()}
+        primary = self.providers[0][0]
+        return {"hedges": self.hedges,
+                "hedge_delay": {purpose: self.hedge_delay(purpose)
+                                for purpose in latency[primary]},
+                "providers": {name: {purpose: stats.summary()
+                                     for purpose, stats in purposes.items()}
+                              for name, purposes in latency.items()}}
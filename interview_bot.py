@@ -1,17 +1,49 @@
-from langchain_groq import ChatGroq
-from langchain_google_genai import ChatGoogleGenerativeAI
-import time
-from typing import Dict, List, TypedDict
+import asyncio
+from typing import Dict, List, Optional, Tuple, TypedDict
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.types import Command, interrupt
+import atexit
+import copy
+import inspect
+import json
+import logging
 import os
 import re
+import time
 from dotenv import load_dotenv
-import streamlit as st
-import queue
+import uuid
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from question_bank import QuestionBank
+from question_feed import QuestionFeed
+from admission import AdmissionController, DegradationPolicy
+from answer_triage import TRIAGE_RULES, AnswerTriage
+from batch_evaluator import BatchEvaluator
+from call_steps import arun_steps, run_steps
+from deadline import Cancelled, SessionBudget
+from hedging import HedgedLLM, call_purpose
+from llm_cassette import Cassette
+from metrics import InterviewMetrics
+from langchain_core.runnables import RunnableConfig
+from llm_registry import LLMRegistry
+from rate_limiter import (PRIORITY_EVALUATE, PRIORITY_FEEDBACK,
+                          PRIORITY_GENERATE, RateLimitScheduler)
+from session_io import current_io, session_io_from_config
+from verdict_cache import VerdictCache, answer_fingerprint
+from question_parser import (MAX_WEIGHT, GeneratedQuestionSet,
+                             JsonQuestionStreamParser, QuestionStreamParser)
+from reference_answers import ReferenceScorer, ReferenceStore
+from score_bounds import PASS_RATIO, settled_outcome
+from sqlite_checkpointer import SqliteCheckpointer
 
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class InterviewState(TypedDict):
     role: str
@@ -23,381 +55,1600 @@ class InterviewState(TypedDict):
     user_score: float
     wrong_questions: List[str]
     total_possible_score: float
+    session_id: str
+    # turn-by-turn progress, so the graph can suspend between answers
+    stage: str
+    question_index: int
+    current_question: str
+    last_answer: str
+    awaiting_retry: bool
+    generation_done: bool
+    generation_notice_shown: bool
+    pending_answers: Dict[str, str]
+    retry_questions: List[str]
+    retry_index: int
+    # wall-clock time the interview must be over by, 0 : none
+    deadline: float
+    # adaptive mode : pass/fail was decided before every question was asked
+    outcome_settled: bool
 
 
 # Input-output helper
-user_input_queue = None
-bot_output_queue = None
+# each interview gets its own SessionIO through the graph config;
+# without one (CLI mode) the standard input/output is used
 
 
-def initialize_queues():
-    """Initialize the queues from session state if running in Streamlit"""
-    global user_input_queue, bot_output_queue
-    # If queues are already set (by the main thread), don't touch streamlit state.
-    if user_input_queue is not None and bot_output_queue is not None:
-        return
-
-    # Otherwise, attempt to initialize from Streamlit session state.
-    try:
-        if hasattr(st, 'session_state'):
-            user_input_queue = st.session_state.get('user_input_queue')
-            bot_output_queue = st.session_state.get('bot_output_queue')
-    except Exception:
-        # In background threads accessing st.session_state can raise; just skip.
-        pass
-
-
-def input_user() -> str:
+def input_user(prompt: str = "") -> str:
     """
-    Receives user response from the UI via Streamlit app.
-    In CLI mode, falls back to standard input.
+    Reads the candidate's answer from standard input (CLI mode).
+    With a session channel, answers come through advance_interview().
     """
-    initialize_queues()
-
-    # Check if running in Streamlit mode
-    if bot_output_queue is not None and user_input_queue is not None:
-
-        # Wait for user input from UI with proper timeout
-        while True:
-            try:
-                user_response = user_input_queue.get(
-                    timeout=1.0)  # ✅ Changed to 1.0
-                return user_response
-            except queue.Empty:
-                continue
-    else:
-        # Fallback to CLI mode
-        return input()
+    return input(prompt)
 
 
 def print_bot(message: str) -> None:
     """
-    Sends bot response to the UI via Streamlit app.
+    Sends bot response to the UI via the session's channel.
     In CLI mode, falls back to standard print.
     """
-    initialize_queues()
+    io = current_io.get()
 
-    # Check if running in Streamlit mode
-    if bot_output_queue is not None:
-        bot_output_queue.put(message)
-        # ✅ Increased delay and removed duplicate import
-        time.sleep(0.2)
+    # Check if running with a session channel
+    if io is not None:
+        io.send(message)
     else:
         # Fallback to CLI mode
         print(message)
 
 # node implementation
 
+# shared chat-model clients, reused across sessions and threads
+llm_registry = LLMRegistry(pool_size=int(os.getenv("LLM_POOL_SIZE", "1")))
+
+
+# hedging : race Gemini against Groq once Gemini is slower than usual
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() == "true"
+
+hedged_llm = HedgedLLM(
+    [("google", lambda: llm_registry.get(
+        "google", "gemini-2.0-flash-lite", os.getenv("GEMINI_API_KEY"))),
+     ("groq", lambda: llm_registry.get(
+         "groq", "llama-3.1-8b-instant", os.getenv("GROQ_API_KEY")))],
+    ThreadPoolExecutor(max_workers=int(os.getenv("HEDGE_WORKERS", "16")),
+                       thread_name_prefix="llm-hedge"),
+    percentile=float(os.getenv("HEDGE_PERCENTILE", "95")),
+    initial_delay=float(os.getenv("HEDGE_INITIAL_DELAY", "2.0")),
+    min_delay=float(os.getenv("HEDGE_MIN_DELAY", "0.5")))
+
+
+# record/replay : LLM responses stored in (or served from) a cassette file
+llm_cassette = None
+if os.getenv("LLM_CASSETTE"):
+    llm_cassette = Cassette(
+        os.getenv("LLM_CASSETTE"),
+        mode=os.getenv("LLM_CASSETTE_MODE", "replay"),
+        reproduce_latency=os.getenv(
+            "LLM_CASSETTE_LATENCY", "false").lower() == "true",
+        passthrough=os.getenv(
+            "LLM_CASSETTE_PASSTHROUGH", "false").lower() == "true")
+    if llm_cassette.mode == "record":
+        atexit.register(llm_cassette.save)
+
+
+def _provider_llm():
+    if LLM_HEDGING:
+        return hedged_llm
+
+    return llm_registry.get("google", "gemini-2.0-flash-lite",
+                            os.getenv("GEMINI_API_KEY"))
+
+
+def get_llm():
+    """Returns the shared chat model used by all nodes"""
+    if llm_cassette is None:
+        return _provider_llm()
+
+    # offline replay needs no client
+    if llm_cassette.mode == "replay" and not llm_cassette.passthrough:
+        return llm_cassette.wrap(None)
+    return llm_cassette.wrap(_provider_llm())
+
+
+def warm_up_llms(ping: bool = False) -> None:
+    """Creates the shared clients at process start"""
+    llm_registry.warm_up("google", "gemini-2.0-flash-lite",
+                         os.getenv("GEMINI_API_KEY"), ping=ping)
+    if LLM_HEDGING:
+        llm_registry.warm_up("groq", "llama-3.1-8b-instant",
+                             os.getenv("GROQ_API_KEY"), ping=ping)
+
+
+# one scheduler per process : every session shares the API key's budget.
+# Unlimited unless set to the key's quota (it depends on the provider tier)
+rate_limiter = RateLimitScheduler(
+    requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+    tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")))
+
+# interviews running at once : past the cap, new ones wait in line (app.py)
+admission = AdmissionController(
+    max_active=int(os.getenv("MAX_ACTIVE_INTERVIEWS", "0")),
+    wait_timeout=float(os.getenv("ADMISSION_WAIT_TIMEOUT", "30")),
+    idle_timeout=float(os.getenv("ADMISSION_IDLE_TIMEOUT", "1800")))
+
+# cheaper answers while too many LLM calls wait for the rate limiter
+degradation = DegradationPolicy(
+    lambda: rate_limiter.backlog,
+    {"brief_feedback": int(os.getenv("DEGRADE_FEEDBACK_BACKLOG", "16")),
+     "cached_questions": int(os.getenv("DEGRADE_QUESTIONS_BACKLOG", "32"))})
+
+# expected completion size per priority class, until real usage is known
+_COMPLETION_TOKENS = {
+    PRIORITY_EVALUATE: 10,
+    PRIORITY_GENERATE: 1500,
+    PRIORITY_FEEDBACK: 500,
+}
+
+# latency, token and cost instrumentation shared by every session
+metrics = InterviewMetrics(
+    session_dir=os.getenv("METRICS_SESSION_DIR", ""),
+    prompt_price=float(os.getenv("LLM_PROMPT_PRICE", "0")),
+    completion_price=float(os.getenv("LLM_COMPLETION_PRICE", "0")))
+
+# what an LLM call is for, unless the caller says otherwise
+_PURPOSES = {
+    PRIORITY_EVALUATE: "evaluate",
+    PRIORITY_GENERATE: "generate",
+    PRIORITY_FEEDBACK: "feedback",
+}
+
+# session of the running interview, used for fair scheduling
+_current_session: contextvars.ContextVar = contextvars.ContextVar(
+    "current_session", default="")
+
+
+# seconds one LLM call may take, and a whole interview; 0 : no limit
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
+SESSION_DEADLINE = float(os.getenv("SESSION_DEADLINE", "0"))
+
+# session -> its time budget, cancelled when the interview is discarded
+_session_budgets: Dict[str, SessionBudget] = {}
+_session_budgets_guard = threading.Lock()
+
+# budget the running interview's LLM calls are made under; background
+# work started by a node inherits it with the context
+_current_budget: contextvars.ContextVar = contextvars.ContextVar(
+    "current_budget", default=SessionBudget(LLM_CALL_TIMEOUT))
+
+
+def _session_budget(session_id: str) -> SessionBudget:
+    with _session_budgets_guard:
+        budget = _session_budgets.get(session_id)
+        if budget is None:
+            budget = SessionBudget(LLM_CALL_TIMEOUT)
+            _session_budgets[session_id] = budget
+        return budget
+
+
+def _drop_budget(session_id: str) -> None:
+    with _session_budgets_guard:
+        _session_budgets.pop(session_id, None)
+
+
+def _submit(executor, fn, *args):
+    """Submits to a worker pool, keeping the caller's session context"""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _estimate_tokens(prompt, priority: int) -> int:
+    return len(str(prompt)) // 4 + _COMPLETION_TOKENS.get(priority, 100)
+
+
+def _is_rate_limit(e: Exception) -> bool:
+    message = str(e).lower()
+    return any(k in message for k in
+               ("rate_limit", "rate limit", "429", "resource_exhausted"))
+
+
+def _is_timeout(e: Exception) -> bool:
+    if isinstance(e, TimeoutError):
+        return True
+    # provider SDKs have their own types : ReadTimeout, APITimeoutError ...
+    message = f"{type(e).__name__} {e}".lower()
+    return any(k in message for k in ("timeout", "timed out", "deadline"))
+
+
+def _raise_failure(e: Exception) -> None:
+    """Re-raises a failed call; provider timeouts become TimeoutError"""
+    if isinstance(e, TimeoutError) or not _is_timeout(e):
+        raise e
+    raise TimeoutError(f"LLM call timed out: {e}") from e
+
+
+def _call_options(timeout: Optional[float]) -> dict:
+    # the client aborts the request itself : no thread or connection is left behind
+    return {"timeout": timeout} if timeout is not None else {}
+
+
+def _token_counts(prompt, content: str, usage) -> Tuple[int, int]:
+    """(prompt, completion) tokens; estimated when the provider reports none"""
+    if usage and usage.get("total_tokens"):
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    return len(str(prompt)) // 4, len(content) // 4
+
+
+def _stream_usage(chunks) -> Dict[str, int]:
+    usage: Dict[str, int] = {}
+    for chunk in chunks:
+        for key, value in (getattr(chunk, "usage_metadata", None) or {}).items():
+            if isinstance(value, int):
+                usage[key] = usage.get(key, 0) + value
+    return usage
+
+
+def _record_call(purpose: str, prompt, started: float, waited: float,
+                 content: str = "", usage=None, error: bool = False,
+                 session: Optional[str] = None) -> None:
+    prompt_tokens, completion_tokens = _token_counts(prompt, content, usage)
+    if session is None:
+        session = _current_session.get()
+    metrics.llm_call(session, purpose,
+                     time.monotonic() - started, waited,
+                     prompt_tokens, completion_tokens, error=error)
+
 
-def safe_llm_invoke(llm, prompt, max_retries=3):
-    """Safely invoke LLM with retry logic"""
+def _back_off_or_raise(e: Exception, attempt: int, max_retries: int,
+                       purpose: str) -> None:
+    """Pauses before a rate-limited call is sent again, re-raises other failures"""
+    if _is_rate_limit(e) and attempt < max_retries - 1:
+        metrics.retry(_current_session.get(), purpose)
+        # one shared pause instead of every session backing off alone
+        rate_limiter.backoff(2 ** attempt)
+    else:
+        _raise_failure(e)
+
+
+def _invoke_steps(llm, prompt, max_retries=3, priority=PRIORITY_EVALUATE,
+                  purpose=None):
+    """
+    An LLM call through the shared rate-limit scheduler, with retries, as steps.
+    It is bounded by the session's budget : TimeoutError once it runs out,
+    Cancelled if the interview is discarded meanwhile.
+    """
+    estimate = _estimate_tokens(prompt, priority)
+    purpose = purpose or _PURPOSES.get(priority, "other")
+    budget = _current_budget.get()
     for attempt in range(max_retries):
+        waited = yield ("acquire", priority, estimate, budget.timeout)
+        timeout = budget.timeout()
+        started = time.monotonic()
         try:
-            response = llm.invoke(prompt)
-            return response
+            response = yield ("invoke", llm, prompt, timeout, budget, purpose)
         except Exception as e:
-            if "rate_limit" in str(e).lower() and attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print_bot(f"Rate limit hit. Waiting {wait_time} seconds...")
-                time.sleep(wait_time)
-                continue
-            else:
-                raise e
+            _record_call(purpose, prompt, started, waited, error=True)
+            _back_off_or_raise(e, attempt, max_retries, purpose)
+            continue
+        usage = getattr(response, "usage_metadata", None) or {}
+        if usage.get("total_tokens"):
+            rate_limiter.record(usage["total_tokens"] - estimate)
+        _record_call(purpose, prompt, started, waited,
+                     str(response.content), usage)
+        return response
     return None
 
 
+def _stream_steps(llm, prompt, max_retries=3, priority=PRIORITY_GENERATE,
+                  purpose=None):
+    """
+    Streams LLM chunks with the same scheduling and retry logic as
+    _invoke_steps(). Retries only while nothing has been streamed yet.
+    """
+    estimate = _estimate_tokens(prompt, priority)
+    purpose = purpose or _PURPOSES.get(priority, "other")
+    budget = _current_budget.get()
+    for attempt in range(max_retries):
+        waited = yield ("acquire", priority, estimate, budget.timeout)
+        timeout = budget.timeout()
+        started = time.monotonic()
+        try:
+            stream, first = yield ("open_stream", llm, prompt, timeout, budget)
+        except Exception as e:
+            _record_call(purpose, prompt, started, waited, error=True)
+            _back_off_or_raise(e, attempt, max_retries, purpose)
+            continue
+        if first is None:
+            _record_call(purpose, prompt, started, waited)
+            # nothing was streamed : the exhausted stream iterates as empty
+            return stream
+        # the stream may be closed later, outside the session's context
+        session = _current_session.get()
+        return (yield ("chain", first, stream, lambda chunks: _record_call(
+            purpose, prompt, started, waited,
+            "".join(str(c.content) for c in chunks), _stream_usage(chunks),
+            session=session), budget.timeout))
+    return None
+
+
+def _chain_first(first, stream, done, check):
+    # `done` gets the chunks seen, also when the consumer stops early;
+    # `check` ends the stream of a cancelled or overdue session
+    chunks = [first]
+    try:
+        yield first
+        for chunk in stream:
+            check()
+            chunks.append(chunk)
+            yield chunk
+    except Exception as e:
+        _raise_failure(e)
+    finally:
+        # closing the provider's stream releases its connection
+        stream.close()
+        done(chunks)
+
+
+async def _abounded(awaitable, timeout: Optional[float], budget: SessionBudget,
+                    poll: float = 0.05):
+    """
+    Awaits an LLM call for at most `timeout` seconds. Unlike a thread, the
+    call is cancelled, connection included, as soon as the session is.
+    """
+    task = asyncio.ensure_future(awaitable)
+    limit = None if timeout is None else time.monotonic() + timeout
+    try:
+        while not task.done():
+            budget.check()
+            wait = poll
+            if limit is not None:
+                wait = min(wait, limit - time.monotonic())
+                if wait <= 0:
+                    raise TimeoutError(f"LLM call timed out after {timeout:.1f}s")
+            await asyncio.wait([task], timeout=wait)
+        return task.result()
+    finally:
+        task.cancel()
+
+
+async def _achain_first(first, stream, done, check):
+    chunks = [first]
+    try:
+        yield first
+        async for chunk in stream:
+            check()
+            chunks.append(chunk)
+            yield chunk
+    except Exception as e:
+        _raise_failure(e)
+    finally:
+        await stream.aclose()
+        done(chunks)
+
+
+class _ThreadCalls:
+    """The calls steps yield, made by blocking the running thread"""
+
+    @staticmethod
+    def acquire(priority, estimate, check):
+        return rate_limiter.acquire(priority, _current_session.get(), estimate,
+                                    check=check)
+
+    @staticmethod
+    def invoke(llm, prompt, timeout, budget, purpose):
+        with call_purpose(purpose):
+            return llm.invoke(prompt, **_call_options(timeout))
+
+    @staticmethod
+    def open_stream(llm, prompt, timeout, budget):
+        """(stream, first chunk), the chunk None when nothing is streamed"""
+        stream = llm.stream(prompt, **_call_options(timeout))
+        return stream, next(stream, None)
+
+    @staticmethod
+    def chain(first, stream, done, check):
+        return _chain_first(first, stream, done, check)
+
+    @staticmethod
+    def next_chunk(chunks):
+        return next(chunks, None)
+
+    @staticmethod
+    def close_stream(chunks):
+        chunks.close()
+
+    @staticmethod
+    def next_generated(feed):
+        return feed.get()
+
+    @staticmethod
+    def admitted(session, timeout):
+        return admission.wait(session, timeout)
+
+    @staticmethod
+    def verdicts(state):
+        _reconcile_verdicts(state, wait=True)
+
+    @staticmethod
+    def run_graph(graph, graph_input, config):
+        return graph.invoke(graph_input, config)
+
+    @staticmethod
+    def prune(checkpointer, thread_id):
+        checkpointer.prune(thread_id)
+
+    @staticmethod
+    def graph_state(graph, config):
+        return graph.get_state(config)
+
+
+class _LoopCalls:
+    """The calls steps yield, awaited on the running event loop"""
+
+    @staticmethod
+    async def acquire(priority, estimate, check):
+        return await rate_limiter.aacquire(
+            priority, _current_session.get(), estimate, check=check)
+
+    @staticmethod
+    async def invoke(llm, prompt, timeout, budget, purpose):
+        # the call's task takes the purpose with the context;
+        # past its timeout, or once the session is cancelled, it is cancelled
+        with call_purpose(purpose):
+            return await _abounded(
+                llm.ainvoke(prompt, **_call_options(timeout)), timeout, budget)
+
+    @staticmethod
+    async def open_stream(llm, prompt, timeout, budget):
+        stream = llm.astream(prompt, **_call_options(timeout)).__aiter__()
+        try:
+            return stream, await _abounded(stream.__anext__(), timeout, budget)
+        except StopAsyncIteration:
+            return stream, None
+
+    @staticmethod
+    async def chain(first, stream, done, check):
+        return _achain_first(first, stream, done, check)
+
+    @staticmethod
+    async def next_chunk(chunks):
+        try:
+            return await chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    @staticmethod
+    async def close_stream(chunks):
+        await chunks.aclose()
+
+    @staticmethod
+    async def next_generated(feed):
+        return await feed.aget()
+
+    @staticmethod
+    async def admitted(session, timeout):
+        return await admission.await_admission(session, timeout)
+
+    @staticmethod
+    async def verdicts(state):
+        await _await_verdicts(state)
+
+    @staticmethod
+    async def run_graph(graph, graph_input, config):
+        return await graph.ainvoke(graph_input, config)
+
+    @staticmethod
+    async def prune(checkpointer, thread_id):
+        await checkpointer.aprune(thread_id)
+
+    @staticmethod
+    async def graph_state(graph, config):
+        return await graph.aget_state(config)
+
+
+def safe_llm_invoke(llm, prompt, max_retries=3, priority=PRIORITY_EVALUATE,
+                    purpose=None):
+    """Safely invoke LLM from a thread : _invoke_steps() run to its response"""
+    return run_steps(_invoke_steps(llm, prompt, max_retries, priority, purpose),
+                     _ThreadCalls)
+
+
+# question-bank : parsed position-questions cached per requirements
+question_bank = QuestionBank(
+    directory=os.getenv("QUESTION_BANK_DIR", ".question_bank"),
+    max_entries=int(os.getenv("QUESTION_BANK_SIZE", "128")),
+    ttl=float(os.getenv("QUESTION_BANK_TTL", str(7 * 24 * 3600))),
+    variants=int(os.getenv("QUESTION_BANK_VARIANTS", "3")))
+
+POSITION_QUESTION_COUNT = 23
+
+# stream generation and hand out questions as they are parsed
+QUESTION_STREAMING = os.getenv("QUESTION_STREAMING", "true").lower() == "true"
+
+# reference answer and key points generated with each position question,
+# letting answers that clearly match skip the LLM judge
+REFERENCE_ANSWERS = os.getenv("REFERENCE_ANSWERS", "false").lower() == "true"
+
+# question -> reference, filled by generation and the question-bank
+reference_store = ReferenceStore(
+    capacity=int(os.getenv("REFERENCE_STORE_SIZE", "4096")))
+
+
+# "text" : QUESTION/WEIGHT lines, "json" : a schema-validated JSON object
+GENERATION_FORMAT = os.getenv("GENERATION_FORMAT", "text").lower()
+
+# follow-up requests asking only for the questions still missing
+GENERATION_TOP_UPS = int(os.getenv("GENERATION_TOP_UPS", "2"))
+
+
+def _format_instructions(requirements: str) -> str:
+    if GENERATION_FORMAT == "json":
+        example = {"question": f"What is {requirements} used for?", "weight": 7}
+        if REFERENCE_ANSWERS:
+            example["answer"] = "<a correct answer in one or two sentences>"
+            example["key_points"] = ["<point>", "<point>", "<point>"]
+        return f"""Reply with only a JSON object matching this JSON schema, no other text:
+
+    {json.dumps(GeneratedQuestionSet.model_json_schema())}
+
+    Example:
+
+    {json.dumps({"questions": [example]})}"""
+
+    reference = ""
+    if REFERENCE_ANSWERS:
+        reference = """
+    ANSWER: <a correct answer in one or two sentences>
+    KEY POINTS: <point>; <point>; <point>"""
+
+    return f"""Follow this EXACT format:
+
+    QUESTION: What is {requirements} used for?{reference}
+    WEIGHT: 7
+
+    QUESTION: How do you implement features in {requirements}?{reference}
+    WEIGHT: 8
+
+    QUESTION: What are best practices in {requirements}?{reference}
+    WEIGHT: 6"""
+
+
+def _reference_rule() -> str:
+    if not REFERENCE_ANSWERS:
+        return ""
+    return " Give each question a short correct ANSWER and 2-4 KEY POINTS a good answer must mention, separated by semicolons."
+
+
+def _questions_prompt(requirements: str) -> str:
+    return f"""You are generating interview questions. {_format_instructions(requirements)}
+
+    Generate exactly {POSITION_QUESTION_COUNT} questions following this format. Each question should test {requirements} knowledge. Use weights 1-10 based on difficulty.{_reference_rule()}"""
+
+
+def _top_up_prompt(requirements: str, existing, missing: int) -> str:
+    """Asks only for the questions a short set is missing"""
+    asked = "\n".join(f"    - {question}" for question, _ in existing)
+    return f"""You are generating interview questions to complete a set. {_format_instructions(requirements)}
+
+    Generate exactly {missing} NEW questions following this format. Each question should test {requirements} knowledge. Use weights 1-10 based on difficulty.{_reference_rule()}
+    Do not repeat or rephrase any of these existing questions:
+
+{asked}"""
+
+
+def _question_parser(limit: int):
+    if GENERATION_FORMAT == "json":
+        return JsonQuestionStreamParser(limit)
+    return QuestionStreamParser(limit)
+
+
+def _emit_questions(on_question, pairs, references=None) -> None:
+    # references first : a question may be asked as soon as it is emitted
+    if references:
+        for question, _ in pairs:
+            reference_store.put(question, references.get(question))
+    if on_question is not None:
+        for question, weight in pairs:
+            on_question(question, weight)
+
+
+def _bank_questions(requirements: str, position_questions, references) -> None:
+    # only complete sets go into the bank
+    if len(position_questions) == POSITION_QUESTION_COUNT:
+        question_bank.put(requirements, position_questions, references)
+
+
+def _round_emitter(on_question, parser, seen: set, questions: list):
+    """Emits newly parsed pairs, dropping questions the set already has"""
+    def emit(parsed) -> None:
+        fresh = []
+        for question, weight in parsed:
+            key = answer_fingerprint(question)
+            if key not in seen:
+                seen.add(key)
+                fresh.append((question, weight))
+        questions.extend(fresh)
+        _emit_questions(on_question, fresh, parser.references)
+    return emit
+
+
+def _round_steps(llm, prompt: str, limit: int, on_question, seen: set,
+                 purpose: str = "generate"):
+    """One generation request as steps; returns (pairs, references) or None"""
+    parser = _question_parser(limit)
+    questions: list = []
+    emit = _round_emitter(on_question, parser, seen, questions)
+
+    if QUESTION_STREAMING:
+        # parse while streaming : each pair is usable once it is complete
+        chunks = yield from _stream_steps(llm, prompt, purpose=purpose)
+        if chunks is None:
+            return None
+
+        while True:
+            chunk = yield ("next_chunk", chunks)
+            if chunk is None:
+                break
+            emit(parser.feed(chunk.content))
+            if parser.done:
+                yield ("close_stream", chunks)
+                break
+        emit(parser.close())
+    else:
+        response = yield from _invoke_steps(
+            llm, prompt, priority=PRIORITY_GENERATE, purpose=purpose)
+
+        if response is None:
+            return None
+
+        # parse
+        emit(parser.feed(response.content.strip()) + parser.close())
+
+    return questions, parser.references
+
+
+def _use_cached(on_question, cached):
+    position_questions, references = cached
+    _emit_questions(on_question, position_questions, references)
+    return position_questions
+
+
+def _missing_count(position_questions) -> int:
+    return POSITION_QUESTION_COUNT - len(position_questions)
+
+
+def _resumed_set(existing):
+    """(pairs, references) of the questions a resumed interview already has"""
+    references = {}
+    for question, _ in existing:
+        reference = reference_store.get(question)
+        if reference is not None:
+            references[question] = reference
+    return list(existing), references
+
+
+def _generation_steps(llm, requirements: str, on_question=None, existing=()):
+    """
+    Returns (question, weight) pairs from the question-bank or the LLM.
+    `on_question` is called with each pair as soon as it is parsed.
+    A short set is completed by top-up requests for the missing ones.
+    `existing` pairs (a resumed interview's) are kept : only the rest
+    is generated. A first request that times out falls back to the
+    closest cached set.
+    """
+
+    cached = question_bank.get_with_references(requirements)
+    if cached is None and degradation.active("cached_questions"):
+        # LLM saturated : a close cached set rather than a new one
+        cached = question_bank.closest(requirements)
+        if cached is not None:
+            metrics.llm_call_saved(_current_session.get(), "cached_questions")
+    if cached is not None:
+        return _use_cached(on_question, cached)
+
+    seen = {answer_fingerprint(question) for question, _ in existing}
+    if existing:
+        position_questions, references = _resumed_set(existing)
+    else:
+        try:
+            generated = yield from _round_steps(
+                llm, _questions_prompt(requirements), POSITION_QUESTION_COUNT,
+                on_question, seen)
+        except TimeoutError:
+            cached = question_bank.closest(requirements)
+            if cached is None:
+                raise
+            return _use_cached(on_question, cached)
+        if generated is None:
+            return None
+        position_questions, references = generated
+
+    # a resumed set gets one more request : the one it lost
+    for _ in range(GENERATION_TOP_UPS + bool(existing)):
+        missing = _missing_count(position_questions)
+        if missing <= 0:
+            break
+        try:
+            topped_up = yield from _round_steps(
+                llm, _top_up_prompt(requirements, position_questions, missing),
+                missing, on_question, seen, purpose="top-up")
+        except Exception:
+            # the set stays short : the interview goes on with it
+            logger.warning("Question top-up failed", exc_info=True)
+            break
+        if not topped_up or not topped_up[0]:
+            break
+        position_questions.extend(topped_up[0])
+        references.update(topped_up[1])
+
+    _bank_questions(requirements, position_questions, references)
+    return position_questions
+
+
+# basic questions = 5
+BASIC_QUESTIONS = [
+    "Where are you currently living?",
+    "Tell us about your previous work experience.",
+    "Which university did you graduate from?",
+    "What was your major?",
+    "What are your future career plans?"
+]
+
+# personal = 2
+PERSONAL_QUESTIONS = [
+    "What activities do you pursue outside of work?",
+    "Why do you think you are a good candidate for this position?"
+]
+
+# background question-generation : session_id -> feed
+_generation_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GENERATION_WORKERS", "4")),
+    thread_name_prefix="question-generation")
+_question_feeds: Dict[str, QuestionFeed] = {}
+
+
+def _feed_steps(llm, requirements: str, feed: QuestionFeed, existing=()):
+    """Runs question generation and hands the results to the feed"""
+    try:
+        generated = yield from _generation_steps(
+            llm, requirements, on_question=feed.put, existing=existing)
+    except Cancelled:
+        # the interview is gone; finishing the feed still wakes its reader
+        generated = None
+    except Exception:
+        logger.exception("Question generation failed")
+        generated = None
+
+    feed.finish(failed=generated is None)
+
+
+# event-loop tasks of async interviews, kept alive until they finish
+_background_tasks: set = set()
+
+
+def _running_loop():
+    """The event loop running in this thread, None outside async interviews"""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _spawn(coroutine):
+    """Runs a coroutine as a task of the running loop, keeping the context"""
+    task = asyncio.ensure_future(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def start_question_generation(session_id: str, llm, requirements: str,
+                              existing=()) -> QuestionFeed:
+    """
+    Starts generating position questions without blocking the interview.
+    Inside an event loop it runs as a task, otherwise on a worker thread.
+    """
+    feed = QuestionFeed()
+    _question_feeds[session_id] = feed
+    if _running_loop() is not None:
+        _spawn(arun_steps(_feed_steps(llm, requirements, feed, existing),
+                          _LoopCalls))
+    else:
+        _submit(_generation_executor, run_steps,
+                _feed_steps(llm, requirements, feed, existing), _ThreadCalls)
+    return feed
+
+
+def _join_position_questions(state: InterviewState, generated) -> List[str]:
+    """Adds generated position questions to the state as they arrive"""
+    joined = []
+    position_count = sum(
+        1 for q in state["question_weights"].values()
+        if q.get("type") == "position-related")
+    for question, weight in generated:
+        if question in state["question_weights"]:
+            continue
+        if position_count >= POSITION_QUESTION_COUNT:
+            break
+        position_count += 1
+        state["question_weights"][question] = {
+            "type": "position-related", "weight": weight, "score": 0}
+        reference = reference_store.get(question)
+        if reference is not None:
+            state["question_weights"][question]["reference"] = reference
+        state["questions"].append(question)
+        state["total_possible_score"] += weight
+        joined.append(question)
+    return joined
+
+
+# starting-questions
+STARTING_QUESTIONS = [
+    "What is your name?",
+    "What position have you applied for?",
+    "What were the requirements for that?"
+]
+
+
+def new_interview_state(session_id: str = "") -> InterviewState:
+    """Initial state of a fresh interview"""
+    return {
+        "role": "",
+        "questions": [],
+        "answers": [],
+        "requirements": "",
+        "greeting_shown": False,
+        "question_weights": {},
+        "user_score": 0.0,
+        "wrong_questions": [],
+        "total_possible_score": 0.0,
+        "session_id": session_id,
+        "stage": "starting",
+        "question_index": 0,
+        "current_question": "",
+        "last_answer": "",
+        "awaiting_retry": False,
+        "generation_done": False,
+        "generation_notice_shown": False,
+        "pending_answers": {},
+        "retry_questions": [],
+        "retry_index": 0,
+        "deadline": time.time() + SESSION_DEADLINE if SESSION_DEADLINE > 0 else 0.0,
+        "outcome_settled": False
+    }
+
+
 # node-1 : Question-Generator
 def node_1_generate_questions(state: InterviewState) -> InterviewState:
-    """Generates interview questions and weights only"""
+    """Greets the candidate and sets up the starting questions"""
 
     # greeting user
     if not state.get("greeting_shown", False):
         print_bot("Hello, I am Anishom and I will be taking your interview today.")
         state["greeting_shown"] = True
 
-    # starting-questions
-    starting_questions = [
-        "What is your name?",
-        "What position have you applied for?",
-        "What were the requirements for that?"
-    ]
-
-    # get answers
-    answers = []
-    for question in starting_questions:
-        print_bot(f"\n{question}")
-        answer = input_user()
-        answers.append(answer)
+    if not state.get("session_id"):
+        state["session_id"] = uuid.uuid4().hex
+    _current_session.set(state["session_id"])
 
-    state["questions"] = starting_questions
-    state["answers"] = answers
-    state["requirements"] = answers[2]
+    state["questions"] = list(STARTING_QUESTIONS)
+    state["answers"] = []
     state["question_weights"] = {}
     state["user_score"] = 0.0
     state["wrong_questions"] = []
     state["total_possible_score"] = 0.0
+    state["stage"] = "starting"
+    state["question_index"] = 0
+
+    return state
 
-    # llm = ChatGroq(model="llama-3.1-8b-instant",
-    #                api_key=os.getenv("GROQ_API_KEY"))
 
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-lite",
-                                 api_key=os.getenv("GEMINI_API_KEY"))
+def _begin_questions(state: InterviewState) -> None:
+    """Starts question generation once the starting answers are in"""
+    state["requirements"] = state["answers"][2]
+    state["stage"] = "questions"
 
-    # basic questions = 5
-    basic_questions = [
-        "Where are you currently living?",
-        "Tell us about your previous work experience.",
-        "Which university did you graduate from?",
-        "What was your major?",
-        "What are your future career plans?"
-    ]
+    # position-related questions = 23 : generated in background
+    # while the basic questions are being asked
+    start_question_generation(
+        state["session_id"], get_llm(), state["requirements"])
 
     # weight(basic-question) = 0
-    for q in basic_questions:
-        state["question_weights"][q] = {"type": "basic", "weight": 0}
+    for q in BASIC_QUESTIONS:
+        state["question_weights"][q] = {"type": "basic", "weight": 0, "score": 0}
+
+    # position-related questions join after these as they are generated
+    state["questions"].extend(BASIC_QUESTIONS)
+
+
+def _generation_feed(state: InterviewState) -> QuestionFeed:
+    feed = _question_feeds.get(state["session_id"])
+    if feed is None:
+        # the worker that was generating is gone (restart, another worker) :
+        # the questions already joined are kept, only the rest is generated
+        existing = []
+        for question, info in state["question_weights"].items():
+            if info.get("type") == "position-related":
+                existing.append((question, info["weight"]))
+                reference_store.put(question, info.get("reference"))
+        feed = start_question_generation(
+            state["session_id"], get_llm(), state["requirements"], existing)
+    return feed
+
+
+def _collect_generated(state: InterviewState) -> None:
+    """Joins the position questions generated so far, without blocking"""
+    if state["generation_done"]:
+        return
 
-    # position-related questions = 23
-    questions_prompt = f"""You are generating interview questions. Follow this EXACT format:
+    feed = _generation_feed(state)
+    _join_position_questions(state, feed.available())
 
-    QUESTION: What is {state['requirements']} used for?
-    WEIGHT: 7
+    if not feed.drained:
+        return
 
-    QUESTION: How do you implement features in {state['requirements']}?
-    WEIGHT: 8
+    if feed.failed:
+        print_bot("Failed to generate questions.")
+
+    # didn't get enough questions from LLM
+    position_count = sum(
+        1 for q in state["questions"]
+        if state["question_weights"].get(q, {}).get("type") == "position-related")
+    if position_count < 5:
+        print_bot(
+            f"Warning: Only generated {position_count} questions. Continuing with what we have...")
 
-    QUESTION: What are best practices in {state['requirements']}?
-    WEIGHT: 6
+    _close_generation(state)
 
-    Generate exactly 23 questions following this format. Each question should test {state['requirements']} knowledge. Use weights 1-10 based on difficulty."""
 
-    print_bot("Generating questions...")
-    response = safe_llm_invoke(llm, questions_prompt)
+def _close_generation(state: InterviewState) -> None:
+    """No more position questions : the personal ones come next"""
+    _question_feeds.pop(state["session_id"], None)
+    state["generation_done"] = True
 
-    if response is None:
-        print_bot("Failed to generate questions.")
-        return state
+    # weight(personal-question) = 0
+    for q in PERSONAL_QUESTIONS:
+        state["question_weights"][q] = {"type": "personal", "weight": 0, "score": 0}
+    state["questions"].extend(PERSONAL_QUESTIONS)
+
+
+def _generation_notice(state: InterviewState, feed: QuestionFeed) -> None:
+    # ran out of questions before generation finished
+    if not feed.ready() and not state["generation_notice_shown"]:
+        print_bot("Generating questions...")
+        state["generation_notice_shown"] = True
+
+
+def _wait_for_generation(state: InterviewState):
+    """Steps waiting for the next position question (or the end of generation)"""
+    feed = _generation_feed(state)
+    _generation_notice(state, feed)
+    item = yield ("next_generated", feed)
+    if item is not None:
+        _join_position_questions(state, [item])
+
+
+# adaptive mode : the technical section ends once the remaining questions
+# can no longer change pass/fail, after at least ADAPTIVE_MIN_QUESTIONS
+ADAPTIVE_TERMINATION = os.getenv(
+    "ADAPTIVE_TERMINATION", "false").lower() == "true"
+ADAPTIVE_MIN_QUESTIONS = int(os.getenv("ADAPTIVE_MIN_QUESTIONS", "10"))
+# heavier position questions first : the outcome settles sooner
+HEAVY_QUESTIONS_FIRST = os.getenv(
+    "HEAVY_QUESTIONS_FIRST", "false").lower() == "true"
+
+
+def _is_position(state: InterviewState, question: str) -> bool:
+    return state["question_weights"].get(
+        question, {}).get("type") == "position-related"
+
+
+def _order_by_weight(state: InterviewState) -> None:
+    """Puts the heaviest of the position questions not asked yet first"""
+    questions = state["questions"]
+    slots = [i for i in range(state["question_index"], len(questions))
+             if _is_position(state, questions[i])]
+    heaviest = sorted((questions[i] for i in slots),
+                      key=lambda q: -state["question_weights"][q]["weight"])
+    for i, question in zip(slots, heaviest):
+        questions[i] = question
+
+
+def _settled_outcome(state: InterviewState) -> Optional[bool]:
+    """Pass/fail once the open answers can't change it, else None"""
+    asked = state["questions"][:state["question_index"]]
+    if sum(_is_position(state, q) for q in asked) < ADAPTIVE_MIN_QUESTIONS:
+        return None
+
+    weights = state["question_weights"]
+    # questions still being generated count at any weight
+    unseen = 0
+    if not state["generation_done"]:
+        unseen = max(0, POSITION_QUESTION_COUNT - sum(
+            1 for info in weights.values()
+            if info.get("type") == "position-related"))
+    open_answers = [weights[q]["weight"]
+                    for q in state["questions"][state["question_index"]:]
+                    if _is_position(state, q)]
+    open_answers += [weights[q]["weight"] for q in state["pending_answers"]]
+    second_chances = [weights[q]["weight"]
+                      for q in state["retry_questions"][state["retry_index"]:]]
+    return settled_outcome(state["user_score"], state["total_possible_score"],
+                           open_answers, second_chances, unseen, MAX_WEIGHT)
+
+
+def _settle_early(state: InterviewState) -> None:
+    """Skips the technical questions left once the outcome is decided"""
+    if not ADAPTIVE_TERMINATION or state.get("outcome_settled"):
+        return
+    index = state["question_index"]
+    remaining = state["questions"][index:]
+    unasked = [q for q in remaining if _is_position(state, q)]
+    if (not unasked and state["generation_done"]
+            and state["retry_index"] >= len(state["retry_questions"])):
+        return
+    if _settled_outcome(state) is None:
+        return
 
-    # parse
-    questions_text = response.content.strip()
-    # print(f"Debug - LLM Response:\n{questions_text[:300]}...")
-    lines = questions_text.split("\n")
-
-    position_questions = []
-    total_weight = 0
-
-    i = 0
-    while i < len(lines) and len(position_questions) < 23:
-        line = lines[i].strip()
-
-        # handle formats: "QUESTION:" and "1. QUESTION:" or numbered variations
-        if "QUESTION:" in line:
-            # extract question text [after "QUESTION:"]
-            question_part = line.split("QUESTION:")[1].strip()
-            # default
-            weight = 5
-
-            # weight : same-line / next-line
-            if "WEIGHT:" in line:
-                # same line
-                parts = line.split("WEIGHT:")
-                if len(parts) > 1:
-                    try:
-                        weight = float(parts[1].strip())
-                        weight = max(1, min(10, weight))
-                    except:
-                        weight = 5
-            elif i + 1 < len(lines) and "WEIGHT:" in lines[i + 1]:
-                # next line
-                try:
-                    weight_line = lines[i + 1].strip()
-                    weight_part = weight_line.split("WEIGHT:")[1].strip()
-                    weight = float(weight_part)
-                    weight = max(1, min(10, weight))
-                except:
-                    weight = 5
-
-            # non-empty questions
-            if question_part:
-                position_questions.append(question_part)
-                state["question_weights"][question_part] = {
-                    "type": "position-related", "weight": weight}
-                total_weight += weight
-
-        i += 1
+    # skipped questions keep their weight, unseen ones don't count
+    state["questions"][index:] = [
+        q for q in remaining if not _is_position(state, q)]
+    state["outcome_settled"] = True
+    print_bot("\nThat's all the technical questions we need.")
+    # questions still being generated aren't waited for : the worker
+    # finishes in background and keeps them in the question bank
+    if not state["generation_done"]:
+        _close_generation(state)
 
-    # didn't get enough questions from LLM
-    if len(position_questions) < 5:
+
+# _next_question() results asking the caller to wait, then ask again
+_WAIT_FOR_GENERATION = object()
+_WAIT_FOR_VERDICTS = object()
+
+
+def _next_question(state: InterviewState):
+    """
+    Picks the question to ask next; "" once every round is over.
+    Never blocks : returns _WAIT_FOR_GENERATION or _WAIT_FOR_VERDICTS
+    when something has to arrive first.
+    """
+
+    if state["stage"] != "done" and _current_budget.get().expired:
+        _close_on_deadline(state)
+
+    if state["stage"] == "starting":
+        question = state["questions"][state["question_index"]]
+        state["question_index"] += 1
+        return question
+
+    if state["stage"] == "questions":
+        _collect_generated(state)
+        _settle_early(state)
+        if HEAVY_QUESTIONS_FIRST:
+            _order_by_weight(state)
+
+        if state["question_index"] < len(state["questions"]):
+            question = state["questions"][state["question_index"]]
+            state["question_index"] += 1
+            return question
+
+        if not state["generation_done"]:
+            return _WAIT_FOR_GENERATION
+
+        # pipelined mode : remaining verdicts, then the deferred second chances
+        if state["pending_answers"]:
+            return _WAIT_FOR_VERDICTS
+        state["stage"] = "retries"
+        _settle_early(state)
+        if state["retry_questions"] and not state.get("outcome_settled"):
+            print_bot(
+                f"\nLet's revisit {len(state['retry_questions'])} question(s) you answered incorrectly.")
+
+    if state["stage"] == "retries":
+        _settle_early(state)
+        if state.get("outcome_settled"):
+            # second chances queued since can't change the outcome either
+            state["retry_index"] = len(state["retry_questions"])
+        if state["retry_index"] < len(state["retry_questions"]):
+            question = state["retry_questions"][state["retry_index"]]
+            state["retry_index"] += 1
+            state["awaiting_retry"] = True
+            return question
+
+        state["stage"] = "done"
         print_bot(
-            f"Warning: Only generated {len(position_questions)} questions. Continuing with what we have...")
+            f"\nEvaluation complete. Total score: {state['user_score']}")
 
-    state["total_possible_score"] = total_weight
+    return ""
 
-    # personal = 2
-    personal_questions = [
-        "What activities do you pursue outside of work?",
-        "Why do you think you are a good candidate for this position?"
-    ]
 
-    # weight(personal-question) = 0
-    for q in personal_questions:
-        state["question_weights"][q] = {"type": "personal", "weight": 0}
+def _close_on_deadline(state: InterviewState) -> None:
+    """The interview's time is up : no more questions, grade what came back"""
+    print_bot("\n⏰ Time is up for this interview.")
+    _reconcile_verdicts(state)
+    # answers whose verdict didn't arrive count as not evaluated
+    state["wrong_questions"].extend(state["pending_answers"])
+    state["pending_answers"].clear()
+    state["stage"] = "done"
+    print_bot(
+        f"\nEvaluation complete. Total score: {state['user_score']}")
 
-    all_questions = basic_questions + position_questions + personal_questions
-    state["questions"].extend(all_questions)
 
-    # print_bot(
-    #     f"✓ Basic: {len(basic_questions)}, Position-related: {len(position_questions)}, Personal: {len(personal_questions)}")
+def _show_question(state: InterviewState, question: str) -> None:
+    state["current_question"] = question
 
+    if question:
+        print_bot(f"\n{question}")
+        # second chance of a deferred retry
+        if state["awaiting_retry"]:
+            print_bot("✗ Incorrect.")
+            print_bot("Please try again:")
+
+
+def node_ask_question(state: InterviewState):
+    """Shows the next question, or closes the question rounds"""
+    question = _next_question(state)
+    while question is _WAIT_FOR_GENERATION or question is _WAIT_FOR_VERDICTS:
+        if question is _WAIT_FOR_GENERATION:
+            yield from _wait_for_generation(state)
+        else:
+            yield ("verdicts", state)
+        # a discard ends the waits above : stop here
+        _current_budget.get().check()
+        question = _next_question(state)
+
+    _show_question(state, question)
     return state
 
 
-# node-2 : Answer-Evaluator
-def node_2_evaluate_answers(state: InterviewState) -> InterviewState:
-    """Evaluates answers using LLM evaluation"""
+def node_await_answer(state: InterviewState) -> InterviewState:
+    """Suspends the interview until the candidate's answer arrives"""
+    # nothing else happens here : the node re-runs from the top on resume
+    state["last_answer"] = interrupt({
+        "question": state["current_question"],
+        "retry": state["awaiting_retry"]})
+    return state
 
-    # receive question-set
-    questions = state["questions"][3:]
-    user_score = 0
-    wrong_questions = []
 
-    # llm = ChatGroq(model="llama-3.1-8b-instant",
-    #                api_key=os.getenv("GROQ_API_KEY"))
+# "don't know" answers are passes, no evaluation needed
+DONTKNOW_PATTERN = re.compile(
+    r"\b(?:don'?t\s?know|dont\s?know|dontknow|idk)\b", re.IGNORECASE)
 
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-lite",
-                                 api_key=os.getenv("GEMINI_API_KEY"))
+# pipelined evaluation : answers are evaluated in background while the
+# next question is shown, second chances are asked at the end.
+# false grades each answer before the next question
+PIPELINED_EVALUATION = os.getenv(
+    "PIPELINED_EVALUATION", "true").lower() == "true"
 
-    # map scores : 0 initially
-    for question in questions:
-        if "score" not in state["question_weights"].get(question, {}):
-            state["question_weights"][question]["score"] = 0
+_evaluation_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EVALUATION_WORKERS", "8")),
+    thread_name_prefix="answer-evaluation")
 
-    # ask one by one
-    dontknow_pattern = re.compile(
-        r"\b(?:don'?t\s?know|dont\s?know|dontknow|idk)\b", re.IGNORECASE)
+# pipelined mode : answers graded together, one LLM call per batch
+EVALUATION_BATCH_SIZE = int(os.getenv("EVALUATION_BATCH_SIZE", "5"))
+EVALUATION_FLUSH_TIMEOUT = float(os.getenv("EVALUATION_FLUSH_TIMEOUT", "10"))
 
-    for question in questions:
-        print_bot(f"\n{question}")
-        user_answer = input_user()
 
-        q_type = state["question_weights"].get(
-            question, {}).get("type", "unknown")
-        weight = state["question_weights"].get(question, {}).get("weight", 0)
+# verdicts memoized per (question, normalized answer)
+verdict_cache = VerdictCache(
+    capacity=int(os.getenv("VERDICT_CACHE_SIZE", "4096")),
+    path=os.getenv("VERDICT_CACHE_PATH", ""))
 
-        # basic and personal questions : just record
-        if q_type in ["basic", "personal"]:
-            state["question_weights"][question]["score"] = 0
-            state["answers"].append(user_answer)
-            continue
 
-        # quick-skip if user explicitly says they don't know
-        if dontknow_pattern.search(user_answer):
-            # pass = score -= 2, save the question
-            print_bot("✗ Moving to next question.")
-            user_score -= 2
-            state["question_weights"][question]["score"] = -2
-            wrong_questions.append(question)
-            state["answers"].append(user_answer)
-            continue
+# local triage : obviously incorrect answers are settled without the LLM
+answer_triage = AnswerTriage(
+    rules=[r.strip() for r in os.getenv(
+        "ANSWER_TRIAGE", ",".join(TRIAGE_RULES)).split(",") if r.strip()],
+    min_words=int(os.getenv("TRIAGE_MIN_WORDS", "2")),
+    max_overlap=float(os.getenv("TRIAGE_MAX_OVERLAP", "1.0")))
+
+
+# reference pre-scoring : answers that clearly match are correct, the
+# rest (never failed on low overlap : it may be a paraphrase) reach the LLM
+reference_scorer = ReferenceScorer(
+    high=float(os.getenv("REFERENCE_HIGH", "0.8")))
 
-        # position-related questions : evaluate using LLM
-        eval_prompt = f"""You are a VERY STRICT evaluator. Evaluate this {state['requirements']} interview answer:
+
+def _local_verdict(state: InterviewState, question: str, answer: str,
+                   history) -> Optional[bool]:
+    """
+    Verdict reached without the LLM : incorrect when a triage rule fires,
+    correct when the answer clearly matches its reference.
+    None leaves the answer to the LLM judge.
+    """
+    rule = answer_triage.check(question, answer, history)
+    verdict = False
+    if rule is None:
+        reference = state["question_weights"].get(question, {}).get("reference")
+        verdict = reference_scorer.verdict(answer, reference)
+        if verdict is None:
+            return None
+        rule = "reference_match"
+
+    metrics.llm_call_saved(state["session_id"], rule)
+    return verdict
+
+
+def _is_correct_verdict(text: str) -> bool:
+    """True for a CORRECT verdict ("INCORRECT" contains "CORRECT" too)"""
+    verdict = text.upper()
+    return "CORRECT" in verdict and "INCORRECT" not in verdict
+
+
+def _evaluation_prompt(requirements: str, question: str, answer: str,
+                       retry: bool = False) -> str:
+    if retry:
+        return f"""You are a VERY STRICT evaluator. Evaluate this {requirements} retry answer:
+                
+                Question: {question}
+                User Answer: {answer}
+                
+                Is this answer correct?
+                Reply with only "CORRECT" or "INCORRECT"."""
+    return f"""You are a VERY STRICT evaluator. Evaluate this {requirements} interview answer:
 
         Question: {question}
-        User Answer: {user_answer}
+        User Answer: {answer}
 
-        Is this answer technically correct for {state['requirements']}?
+        Is this answer technically correct for {requirements}?
         Reply with only "CORRECT" or "INCORRECT"."""
 
-        eval_response = safe_llm_invoke(llm, eval_prompt)
-        if eval_response is None:
-            print_bot("✗ Evaluation failed. Skipping.")
-            wrong_questions.append(question)
-            continue
 
-        is_correct = "CORRECT" in eval_response.content.upper()
+def _evaluation_steps(llm, requirements: str, question: str, answer: str,
+                      retry: bool = False):
+    """
+    Returns True/False for the LLM verdict, None if evaluation failed.
+    Raises TimeoutError if the verdict didn't come in time.
+    """
+    cached = verdict_cache.get(requirements, question, answer)
+    if cached is not None:
+        return cached
+
+    eval_prompt = _evaluation_prompt(requirements, question, answer, retry)
+    try:
+        eval_response = yield from _invoke_steps(
+            llm, eval_prompt, purpose="retry-evaluate" if retry else "evaluate")
+    except TimeoutError:
+        # not a verdict : the caller keeps the answer pending
+        raise
+    except Exception:
+        logger.exception("Evaluation failed")
+        return None
+
+    if eval_response is None:
+        return None
+
+    is_correct = _is_correct_verdict(eval_response.content)
+    verdict_cache.put(requirements, question, answer, is_correct)
+    return is_correct
+
+
+def _evaluate_answer(llm, requirements: str, question: str, answer: str,
+                     retry: bool = False):
+    """_evaluation_steps() run in the calling thread"""
+    return run_steps(
+        _evaluation_steps(llm, requirements, question, answer, retry),
+        _ThreadCalls)
+
+
+def _batch_evaluator(llm, requirements: str) -> BatchEvaluator:
+    """Creates a session's batch evaluator with per-item fallback"""
+
+    # batches may be sent from a timer thread : keep the session context
+    context = contextvars.copy_context()
+
+    def invoke(prompt):
+        response = context.copy().run(
+            safe_llm_invoke, llm, prompt, purpose="batch-evaluate")
+        return response.content if response is not None else None
+
+    def fallback(question, answer):
+        return context.copy().run(
+            _evaluate_answer, llm, requirements, question, answer)
+
+    return BatchEvaluator(
+        requirements, invoke, fallback, _evaluation_executor,
+        batch_size=EVALUATION_BATCH_SIZE,
+        flush_timeout=EVALUATION_FLUSH_TIMEOUT,
+        cache=verdict_cache)
+
+
+# pipelined mode : session_id -> {question: future} and batch evaluator
+_pending_evaluations: Dict[str, Dict[str, object]] = {}
+_session_evaluators: Dict[str, BatchEvaluator] = {}
+
+
+def _submit_evaluation(state: InterviewState, llm, question: str, answer: str,
+                       history=()):
+    """Sends an answer to the background evaluators"""
+    session_id = state["session_id"]
+
+    evaluator = _session_evaluators.get(session_id)
+    if evaluator is None and EVALUATION_BATCH_SIZE > 1:
+        evaluator = _batch_evaluator(llm, state["requirements"])
+        _session_evaluators[session_id] = evaluator
+
+    verdict = _local_verdict(state, question, answer, history)
+    if verdict is not None:
+        future = Future()
+        future.set_result(verdict)
+    elif evaluator is not None:
+        future = evaluator.submit(question, answer)
+    elif _running_loop() is not None:
+        future = _spawn(arun_steps(_evaluation_steps(
+            llm, state["requirements"], question, answer), _LoopCalls))
+    else:
+        future = _submit(_evaluation_executor, _evaluate_answer,
+                         llm, state["requirements"], question, answer)
+
+    _pending_evaluations.setdefault(session_id, {})[question] = future
+    return future
 
-        if is_correct:
+
+def _pending_futures(state: InterviewState) -> Dict[str, object]:
+    """Futures of the answers still waiting for a verdict"""
+    futures = _pending_evaluations.setdefault(state["session_id"], {})
+    for question, answer in state["pending_answers"].items():
+        if question not in futures:
+            # the worker that was evaluating is gone : evaluate again
+            _submit_evaluation(state, get_llm(), question, answer)
+    return futures
+
+
+def _reconcile_verdicts(state: InterviewState, wait: bool = False) -> None:
+    """
+    Applies finished background verdicts in answer order.
+    Incorrect answers are queued for a second chance at the end.
+    A verdict that timed out is asked for once more, unless waiting.
+    """
+    if not state["pending_answers"]:
+        return
+
+    futures = _pending_futures(state)
+    evaluator = _session_evaluators.get(state["session_id"])
+    if wait and evaluator is not None:
+        evaluator.flush()
+    budget = _current_budget.get()
+
+    for question in list(state["pending_answers"]):
+        future = futures[question]
+        if not wait and not future.done():
+            break
+
+        try:
+            is_correct = future.result()
+        except Exception as e:
+            # futures of a discarded interview are cancelled
+            budget.check()
+            if not isinstance(e, TimeoutError):
+                raise
+            if not wait and not budget.expired:
+                # timed out : stays pending, evaluated again in background
+                _submit_evaluation(state, get_llm(), question,
+                                   state["pending_answers"][question])
+                break
+            # out of time again : not evaluated
+            is_correct = None
+
+        del state["pending_answers"][question]
+        futures.pop(question, None)
+        weight = state["question_weights"].get(question, {}).get("weight", 0)
+
+        if is_correct is None:
+            state["wrong_questions"].append(question)
+        elif is_correct:
             # correct = score += weight
-            print_bot("✓ Correct! Well done.")
-            user_score += weight
+            state["user_score"] += weight
             state["question_weights"][question]["score"] = weight
         else:
             # incorrect = score -= 1
-            print_bot("✗ Incorrect.")
-            user_score -= 1
+            state["user_score"] -= 1
             state["question_weights"][question]["score"] = -1
-            wrong_questions.append(question)
+            state["wrong_questions"].append(question)
+            state["retry_questions"].append(question)
+
+
+async def _await_verdicts(state: InterviewState) -> None:
+    """_reconcile_verdicts(wait=True) for coroutines"""
+    if not state["pending_answers"]:
+        return
+
+    futures = _pending_futures(state)
+    evaluator = _session_evaluators.get(state["session_id"])
+    if evaluator is not None:
+        evaluator.flush()
+
+    # batch verdicts arrive on worker threads, single ones as loop tasks
+    await asyncio.gather(
+        *(asyncio.wrap_future(futures[q]) for q in state["pending_answers"]),
+        return_exceptions=True)
+    _reconcile_verdicts(state, wait=True)
 
-            # second chance
-            print_bot("Please try again:")
-            retry_answer = input_user("Your answer: ")
-
-            if dontknow_pattern.search(retry_answer):
-                # pass = score -= 3, save the question
-                print_bot("✗ Passed on second chance.")
-                user_score -= 3
-                state["question_weights"][question]["score"] = -3
-            else:
-                # Evaluate second attempt
-                retry_prompt = f"""You are a VERY STRICT evaluator. Evaluate this {state['requirements']} retry answer:
-                
-                Question: {question}
-                User Answer: {retry_answer}
-                
-                Is this answer correct?
-                Reply with only "CORRECT" or "INCORRECT"."""
 
-                retry_response = safe_llm_invoke(llm, retry_prompt)
-                if retry_response is None:
-                    print_bot("✗ Evaluation failed.")
-                    continue
-
-                is_retry_correct = "CORRECT" in retry_response.content.upper()
-
-                if is_retry_correct:
-                    # correct = score += weight/2
-                    print_bot("✓ Correct! Good effort.")
-                    user_score += (weight / 2)
-                    state["question_weights"][question]["score"] = weight / 2
-                    # Remove since retry was correct
-                    wrong_questions.remove(question)
-                else:
-                    # incorrect = score -= 2
-                    print_bot("✗ Incorrect again.")
-                    user_score -= 2
-                    state["question_weights"][question]["score"] = -2
-
-        # original answer
+def _take_answer(state: InterviewState) -> Optional[bool]:
+    """
+    Records the latest answer and scores it when no LLM verdict is needed.
+    Returns None once the answer is handled, otherwise whether the verdict
+    still to be fetched is for a second chance.
+    """
+
+    question = state["current_question"]
+    user_answer = state["last_answer"]
+
+    # starting-questions : just record
+    if state["stage"] == "starting":
+        state["answers"].append(user_answer)
+        if state["question_index"] == len(STARTING_QUESTIONS):
+            _begin_questions(state)
+        return None
+
+    # second chance
+    if state["awaiting_retry"]:
+        state["awaiting_retry"] = False
+        if DONTKNOW_PATTERN.search(user_answer):
+            # pass = score -= 3, save the question
+            print_bot("✗ Passed on second chance.")
+            state["user_score"] -= 3
+            state["question_weights"][question]["score"] = -3
+            return None
+        return True
+
+    q_type = state["question_weights"].get(
+        question, {}).get("type", "unknown")
+
+    # pipelined mode : pick up verdicts that came back meanwhile
+    _reconcile_verdicts(state)
+
+    # technical section is over : grade what is still waiting
+    evaluator = _session_evaluators.get(state["session_id"])
+    if q_type == "personal" and evaluator is not None:
+        evaluator.flush()
+
+    # basic and personal questions : just record
+    if q_type in ["basic", "personal"]:
+        state["question_weights"][question]["score"] = 0
         state["answers"].append(user_answer)
+        return None
+
+    # original answer
+    state["answers"].append(user_answer)
+
+    # quick-skip if user explicitly says they don't know
+    if DONTKNOW_PATTERN.search(user_answer):
+        # pass = score -= 2, save the question
+        print_bot("✗ Moving to next question.")
+        state["user_score"] -= 2
+        state["question_weights"][question]["score"] = -2
+        state["wrong_questions"].append(question)
+        return None
+
+    # position-related questions : evaluate in background, show next question
+    if PIPELINED_EVALUATION:
+        _submit_evaluation(state, get_llm(), question, user_answer,
+                           history=state["answers"][:-1])
+        state["pending_answers"][question] = user_answer
+        print_bot("Answer noted.")
+        return None
+
+    return False
+
+
+def _score_second_chance(state: InterviewState, is_retry_correct) -> None:
+    """Scores the answer given on a second chance"""
+    question = state["current_question"]
+    weight = state["question_weights"].get(question, {}).get("weight", 0)
+
+    if is_retry_correct is None:
+        print_bot("✗ Evaluation failed.")
+        return
+
+    if is_retry_correct:
+        # correct = score += weight/2
+        print_bot("✓ Correct! Good effort.")
+        state["user_score"] += weight / 2
+        state["question_weights"][question]["score"] = weight / 2
+        # Remove since retry was correct
+        state["wrong_questions"].remove(question)
+    else:
+        # incorrect = score -= 2
+        print_bot("✗ Incorrect again.")
+        state["user_score"] -= 2
+        state["question_weights"][question]["score"] = -2
+
+
+def _score_answer(state: InterviewState, is_correct) -> None:
+    """Scores a first answer from its LLM verdict"""
+    question = state["current_question"]
+    weight = state["question_weights"].get(question, {}).get("weight", 0)
+
+    if is_correct is None:
+        print_bot("✗ Evaluation failed. Skipping.")
+        state["wrong_questions"].append(question)
+        return
 
-    state["user_score"] = user_score
-    state["wrong_questions"] = wrong_questions
+    if is_correct:
+        # correct = score += weight
+        print_bot("✓ Correct! Well done.")
+        state["user_score"] += weight
+        state["question_weights"][question]["score"] = weight
+    else:
+        # incorrect = score -= 1
+        print_bot("✗ Incorrect.")
+        state["user_score"] -= 1
+        state["question_weights"][question]["score"] = -1
+        state["wrong_questions"].append(question)
+
+        # second chance : the same question gets one more answer
+        print_bot("Please try again:")
+        state["awaiting_retry"] = True
+
+
+def _prescore_answer(state: InterviewState, retry: bool) -> Optional[bool]:
+    # a second chance is compared with the first answer too
+    history = state["answers"] if retry else state["answers"][:-1]
+    return _local_verdict(state, state["current_question"],
+                          state["last_answer"], history)
+
+
+def _defer_evaluation(state: InterviewState) -> None:
+    """The verdict timed out : the answer is graded later, like a pipelined one"""
+    state["pending_answers"][state["current_question"]] = state["last_answer"]
+    print_bot("⏳ Evaluation is taking longer than expected; "
+              "your answer will be graded later.")
 
-    print_bot(f"\nEvaluation complete. Total score: {user_score}")
 
+def _score_verdict(state: InterviewState, is_correct, retry: bool) -> None:
+    if retry:
+        _score_second_chance(state, is_correct)
+    else:
+        _score_answer(state, is_correct)
+
+
+# node-2 : Answer-Evaluator
+def node_2_evaluate_answers(state: InterviewState):
+    """Evaluates the latest answer using LLM evaluation"""
+    retry = _take_answer(state)
+    if retry is None:
+        return state
+
+    # position-related questions : clear cases locally, the rest by LLM
+    is_correct = _prescore_answer(state, retry)
+    if is_correct is None:
+        try:
+            is_correct = yield from _evaluation_steps(
+                get_llm(), state["requirements"], state["current_question"],
+                state["last_answer"], retry=retry)
+        except TimeoutError:
+            # a second chance comes last : nothing to wait for
+            if not retry:
+                _defer_evaluation(state)
+                return state
+    _score_verdict(state, is_correct, retry)
     return state
 
 
-# node-3 : Feedback-Provider
-def node_3_provide_feedback(state: InterviewState) -> InterviewState:
-    """Provides feedback based on performance"""
+def _release_session(state: InterviewState) -> None:
+    # drop the session's background work
+    _question_feeds.pop(state.get("session_id", ""), None)
+    _pending_evaluations.pop(state.get("session_id", ""), None)
+    _session_evaluators.pop(state.get("session_id", ""), None)
+    # the node keeps the bound budget for the feedback call
+    _drop_budget(state.get("session_id", ""))
+
 
+def _show_score(state: InterviewState) -> None:
     user_score = state.get("user_score", 0)
     wrong_questions = state.get("wrong_questions", [])
-    requirements = state.get("requirements", "")
     total_possible_score = state.get("total_possible_score", 0)
 
     print_bot("\n" + "="*50)
     print_bot("           INTERVIEW FEEDBACK")
     print_bot("="*50)
 
-    # congratulate if score >= 80%
+    # congratulate if score >= 80% (PASS_RATIO)
     if total_possible_score > 0:
         percentage = (user_score / total_possible_score) * 100
         print_bot(
             f"Your Score: {user_score:.1f}/{total_possible_score} ({percentage:.1f}%)")
 
-        if percentage >= 80:
+        if percentage >= PASS_RATIO * 100:
             print_bot("\n🎉 CONGRATULATIONS! 🎉")
             print_bot("We look forward to working with you!")
         else:
@@ -405,75 +1656,378 @@ def node_3_provide_feedback(state: InterviewState) -> InterviewState:
     else:
         print_bot("No scored questions available for evaluation.")
 
-    # not enough score: generate feedback with questions of wrong answers
     if wrong_questions:
         print_bot(
             f"\nAreas for Improvement ({len(wrong_questions)} questions):")
         print_bot("-" * 40)
 
-        # llm = ChatGroq(model="llama-3.1-8b-instant",
-        #                api_key=os.getenv("GROQ_API_KEY"))
-
-        llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-lite",
-                                     api_key=os.getenv("GEMINI_API_KEY"))
 
-        feedback_prompt = f"""Generate a short study feedback for someone who couldn't answer these {requirements} questions:
+def _feedback_prompt(state: InterviewState) -> str:
+    return f"""Generate a short study feedback for someone who couldn't answer these {state.get("requirements", "")} questions:
 
-{chr(10).join(f"- {q}" for q in wrong_questions)}
+{chr(10).join(f"- {q}" for q in state.get("wrong_questions", []))}
 
 Provide study tips."""
 
-        feedback_response = safe_llm_invoke(llm, feedback_prompt)
 
-        if feedback_response:
-            print_bot("\n" + feedback_response.content)
-        else:
-            print_bot("\nReview these topics:")
-            for i, question in enumerate(wrong_questions, 1):
-                print_bot(f"{i}. {question}")
+def _show_study_feedback(state: InterviewState, feedback_response) -> None:
+    if feedback_response:
+        print_bot("\n" + feedback_response.content)
+    else:
+        print_bot("\nReview these topics:")
+        for i, question in enumerate(state.get("wrong_questions", []), 1):
+            print_bot(f"{i}. {question}")
+
+
+def _brief_feedback(state: InterviewState) -> bool:
+    """LLM saturated : the topics to review stand in for generated feedback"""
+    if not degradation.active("brief_feedback"):
+        return False
+    metrics.llm_call_saved(state["session_id"], "brief_feedback")
+    return True
+
+
+def _study_feedback(state: InterviewState):
+    """The LLM's study feedback, None if it timed out"""
+    try:
+        return (yield from _invoke_steps(
+            get_llm(), _feedback_prompt(state), priority=PRIORITY_FEEDBACK))
+    except TimeoutError:
+        return None
 
+
+def _show_closing() -> None:
     print_bot("\n" + "="*50)
     print_bot("Thank you for taking the interview!")
     print_bot("="*50)
 
+
+# node-3 : Feedback-Provider
+def node_3_provide_feedback(state: InterviewState):
+    """Provides feedback based on performance"""
+    _release_session(state)
+    _show_score(state)
+
+    # not enough score: generate feedback with questions of wrong answers
+    if state.get("wrong_questions"):
+        feedback_response = None
+        if not _brief_feedback(state):
+            # timed out : the topic list instead
+            feedback_response = yield from _study_feedback(state)
+        _show_study_feedback(state, feedback_response)
+
+    _show_closing()
     return state
 
 
-def create_interview_graph():
-    """Create and configure the LangGraph workflow"""
+def _time_node(state: InterviewState, config: RunnableConfig, node,
+               started: float) -> None:
+    # await_answer ends in the interrupt that suspends the graph : timed too
+    name = (config.get("metadata") or {}).get("langgraph_node", node.__name__)
+    metrics.node(state.get("session_id", ""), name, time.monotonic() - started)
+
+
+def _state_update(before: dict, state: InterviewState) -> dict:
+    """
+    The keys a node changed. Nodes edit the state in place; returning only
+    these keeps the other channels at their version, so LangGraph doesn't
+    treat them as written. The checkpointer still saves the whole state.
+    """
+    return {key: value for key, value in state.items()
+            if key not in before or before[key] != value}
+
+
+def _bind_budget(state: InterviewState) -> None:
+    """The session's budget, with the deadline the state carries, for this node"""
+    budget = _session_budget(state.get("session_id", ""))
+    budget.deadline = state.get("deadline", 0.0)
+    _current_budget.set(budget)
+    budget.check()
+
+
+@contextmanager
+def _node_scope(state: InterviewState, config: RunnableConfig, node):
+    """Binds the session channel and time budget; yields the state before"""
+    token = current_io.set(session_io_from_config(config))
+    _current_session.set(state.get("session_id", ""))
+    started = time.monotonic()
+    try:
+        before = copy.deepcopy(dict(state))
+        _bind_budget(state)
+        yield before
+    finally:
+        _time_node(state, config, node, started)
+        current_io.reset(token)
+
+
+def _session_node(node):
+    """
+    Runs a node with the session channel and time budget bound.
+    A node that waits on LLM calls is written as steps : they are made
+    by blocking the graph's thread.
+    """
+    def run(state: InterviewState, config: RunnableConfig) -> dict:
+        with _node_scope(state, config, node) as before:
+            result = node(state)
+            if inspect.isgenerator(result):
+                result = run_steps(result, _ThreadCalls)
+            return _state_update(before, result)
+
+    run.__name__ = node.__name__
+    return run
+
+
+def _asession_node(node):
+    """_session_node() for the async graph : the steps' calls are awaited"""
+    async def run(state: InterviewState, config: RunnableConfig) -> dict:
+        with _node_scope(state, config, node) as before:
+            result = node(state)
+            if inspect.isgenerator(result):
+                result = await arun_steps(result, _LoopCalls)
+            return _state_update(before, result)
+
+    run.__name__ = node.__name__
+    return run
+
+
+def _route_after_question(state: InterviewState) -> str:
+    return "await_answer" if state["current_question"] else "provide_feedback"
+
+
+def _route_after_answer(state: InterviewState) -> str:
+    return "await_answer" if state["awaiting_retry"] else "ask_question"
+
+
+# interviews suspend between turns; their state waits here, not in a thread.
+# With CHECKPOINT_DB it is a SQLite file : interviews survive restarts and
+# resume by id on any worker sharing the file
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "")
+checkpointer = (SqliteCheckpointer(CHECKPOINT_DB) if CHECKPOINT_DB
+                else InMemorySaver())
+
+
+def create_interview_graph(checkpointer=checkpointer, use_async: bool = False):
+    """
+    Create and configure the LangGraph workflow.
+    With `use_async`, nodes are coroutines meant for ainvoke : LLM calls
+    and waits don't hold a thread, so one event loop runs many interviews.
+    """
+
+    wrap = _asession_node if use_async else _session_node
 
     workflow = StateGraph(InterviewState)
 
-    # add nodes
-    workflow.add_node("generate_questions", node_1_generate_questions)
-    workflow.add_node("evaluate_answers", node_2_evaluate_answers)
-    workflow.add_node("provide_feedback", node_3_provide_feedback)
+    # add nodes : every question/answer turn is its own graph step
+    workflow.add_node("generate_questions", wrap(node_1_generate_questions))
+    workflow.add_node("ask_question", wrap(node_ask_question))
+    workflow.add_node("await_answer", wrap(node_await_answer))
+    workflow.add_node("evaluate_answers", wrap(node_2_evaluate_answers))
+    workflow.add_node("provide_feedback", wrap(node_3_provide_feedback))
 
     # define flow
     workflow.set_entry_point("generate_questions")
-    workflow.add_edge("generate_questions", "evaluate_answers")
-    workflow.add_edge("evaluate_answers", "provide_feedback")
+    workflow.add_edge("generate_questions", "ask_question")
+    workflow.add_conditional_edges("ask_question", _route_after_question,
+                                   ["await_answer", "provide_feedback"])
+    workflow.add_edge("await_answer", "evaluate_answers")
+    workflow.add_conditional_edges("evaluate_answers", _route_after_answer,
+                                   ["await_answer", "ask_question"])
     workflow.add_edge("provide_feedback", END)
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 
-if __name__ == "__main__":
-    # initialize state
-    initial_state: InterviewState = {
-        "role": "",
-        "questions": [],
-        "answers": [],
-        "requirements": "",
-        "greeting_shown": False,
-        "question_weights": {},
-        "user_score": 0.0,
-        "wrong_questions": [],
-        "total_possible_score": 0.0
-    }
+# compiled once, shared by every interview; both share the checkpointer
+_interview_graph = None
+_async_interview_graph = None
+_turn_locks: Dict[str, threading.Lock] = {}
+_turn_locks_guard = threading.Lock()
+_async_turn_locks: Dict[str, asyncio.Lock] = {}
+
+
+def get_interview_graph(use_async: bool = False):
+    global _interview_graph, _async_interview_graph
+    if use_async:
+        if _async_interview_graph is None:
+            _async_interview_graph = create_interview_graph(use_async=True)
+        return _async_interview_graph
+    if _interview_graph is None:
+        _interview_graph = create_interview_graph()
+    return _interview_graph
+
+
+class InterviewNotFound(LookupError):
+    """No suspended interview waits for an answer under this id"""
+
+
+def _admission_timeout(budget: SessionBudget) -> Optional[float]:
+    """
+    How long a turn waits in line : until the session's deadline, without
+    one as long as an idle interview keeps its slot
+    """
+    remaining = budget.remaining()
+    if remaining is not None:
+        return max(0.0, remaining)
+    return admission.idle_timeout or None
+
+
+def _turn_steps(graph, thread_id: str, session_io, answer: Optional[str]):
+    """One turn as steps, under the interview's turn lock : (result, suspended)"""
+    config = {"configurable": {"thread_id": thread_id,
+                               "session_io": session_io}}
+    if answer is not None:
+        # unknown, finished or discarded : nothing to resume, no slot to take
+        if not (yield ("graph_state", graph, config)).interrupts:
+            raise InterviewNotFound(f"No interview {thread_id} waits for an answer")
+    budget = _session_budget(thread_id)
+    position = admission.touch(thread_id)
+    if position:
+        # lost its slot while idle and every slot is taken : wait in line
+        queued = time.monotonic()
+        if session_io is not None:
+            session_io.send(f"⏳ All interviewers are busy. You are number "
+                            f"{position} in line; your interview continues "
+                            "automatically.")
+        admitted = yield ("admitted", thread_id, _admission_timeout(budget))
+        budget.check()
+        if not admitted:
+            # timed out : give the place in line back
+            admission.release(thread_id)
+            raise Cancelled(f"interview {thread_id} left the waiting line")
+        metrics.queue_wait(thread_id, "admission", time.monotonic() - queued)
+    metrics.turn_started(thread_id)
+    graph_input = (new_interview_state(thread_id) if answer is None
+                   else Command(resume=answer))
+    try:
+        result = yield ("run_graph", graph, graph_input, config)
+    finally:
+        _end_cancelled_turn(graph.checkpointer, thread_id, budget)
+    budget.check()
+    suspended = bool((yield ("graph_state", graph, config)).next)
+    if suspended and isinstance(graph.checkpointer, SqliteCheckpointer):
+        # the file keeps the latest checkpoint only, a finished interview none
+        yield ("prune", graph.checkpointer, thread_id)
+    metrics.turn_finished(thread_id, suspended)
+    return result, suspended
+
+
+def _end_turn(thread_id: str, result, suspended: bool) -> Optional[InterviewState]:
+    if suspended:
+        return None
+
+    discard_interview(thread_id)
+    return result
+
+
+def advance_interview(thread_id: str, session_io=None,
+                      answer: Optional[str] = None) -> Optional[InterviewState]:
+    """
+    Runs the interview until it needs the next answer.
+    Starts a new interview when `answer` is None, otherwise resumes it
+    with the answer. Returns None while the interview waits for the
+    candidate, and the final state once it is over. Raises Cancelled if
+    the interview is discarded during the turn, InterviewNotFound for an
+    answer no interview waits for.
+    """
+    graph = get_interview_graph()
+
+    with _turn_locks_guard:
+        lock = _turn_locks.setdefault(thread_id, threading.Lock())
+
+    # one turn at a time per interview
+    with lock:
+        result, suspended = run_steps(
+            _turn_steps(graph, thread_id, session_io, answer), _ThreadCalls)
+    return _end_turn(thread_id, result, suspended)
 
-    # create and run LangGraph workflow
-    app = create_interview_graph()
-    result = app.invoke(initial_state)
+
+async def aadvance_interview(thread_id: str, session_io=None,
+                             answer: Optional[str] = None) -> Optional[InterviewState]:
+    """
+    advance_interview() for coroutines, on the async graph.
+    Pair it with an AsyncSessionIO; many interviews can advance
+    concurrently on the same event loop.
+    """
+    graph = get_interview_graph(use_async=True)
+
+    lock = _async_turn_locks.setdefault(thread_id, asyncio.Lock())
+
+    # one turn at a time per interview
+    async with lock:
+        result, suspended = await arun_steps(
+            _turn_steps(graph, thread_id, session_io, answer), _LoopCalls)
+    return _end_turn(thread_id, result, suspended)
+
+
+def _end_cancelled_turn(checkpointer, thread_id: str,
+                        budget: SessionBudget) -> None:
+    if budget.cancelled:
+        # discarded during the turn : drop what the turn saved since
+        checkpointer.delete_thread(thread_id)
+        _drop_budget(thread_id)
+
+
+def interview_prompt(thread_id: str) -> Optional[dict]:
+    """
+    What a suspended interview waits for : {"question", "retry"}.
+    None when there is no such interview (unknown, finished or discarded).
+    With CHECKPOINT_DB this works for interviews started by another worker
+    or before a restart; advance_interview() with the answer resumes them.
+    """
+    snapshot = get_interview_graph().get_state(
+        {"configurable": {"thread_id": thread_id}})
+    for pending in snapshot.interrupts:
+        return pending.value
+    return None
+
+
+def _cancel_session(thread_id: str) -> None:
+    """
+    Stops the session's LLM work : rate-limit waits give up, no new call
+    is sent, and the turn's waits on generation or verdicts end. A request
+    already sent ends at its timeout (loop tasks are cancelled at once).
+    """
+    with _session_budgets_guard:
+        budget = _session_budgets.get(thread_id)
+    if budget is not None:
+        budget.cancel()
+
+    feed = _question_feeds.pop(thread_id, None)
+    if feed is not None:
+        feed.finish(failed=True)
+    evaluator = _session_evaluators.pop(thread_id, None)
+    if evaluator is not None:
+        evaluator.close()
+    for future in (_pending_evaluations.pop(thread_id, None) or {}).values():
+        if isinstance(future, asyncio.Future):
+            # loop tasks are cancelled from their own loop
+            future.get_loop().call_soon_threadsafe(future.cancel)
+        else:
+            future.cancel()
+
+
+def discard_interview(thread_id: str) -> None:
+    """
+    Forgets a finished or abandoned interview. A turn still running is
+    cancelled : it raises Cancelled once its current call returns.
+    """
+    _cancel_session(thread_id)
+    get_interview_graph().checkpointer.delete_thread(thread_id)
+    admission.release(thread_id)
+    metrics.finish_session(thread_id)
+    with _turn_locks_guard:
+        lock = _turn_locks.pop(thread_id, None)
+    async_lock = _async_turn_locks.pop(thread_id, None)
+    # a running turn keeps the cancelled budget until it ends
+    if not any(held is not None and held.locked() for held in (lock, async_lock)):
+        _drop_budget(thread_id)
+
+
+if __name__ == "__main__":
+    # create and run LangGraph workflow, one turn per answer
+    thread_id = uuid.uuid4().hex
+    result = advance_interview(thread_id)
+    while result is None:
+        result = advance_interview(thread_id, answer=input_user())
 
     print_bot("\n🏁 Interview process completed!")
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteMiss(LookupError):
+    """Raised when a replayed prompt was never recorded"""
+
+
+def _prompt_text(prompt) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(str(getattr(m, "content", m)) for m in prompt)
+
+
+def prompt_key(prompt) -> str:
+    return hashlib.sha1(_prompt_text(prompt).encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    LLM responses recorded per prompt, for reproducible runs.
+    In "record" mode calls reach the model and every response is stored
+    with its observed latency; in "replay" mode responses are served from
+    memory in recorded order, optionally after the recorded latency.
+    Prompts missing from the cassette are kept in `missing`.
+    """
+
+    def __init__(self, path: str, mode: str = "replay",
+                 reproduce_latency: bool = False, passthrough: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.reproduce_latency = reproduce_latency
+        self.passthrough = passthrough
+        self._entries: Dict[str, List[dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.recorded = 0
+        self.missing: Dict[str, str] = {}
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            self._entries = data.get("entries", {})
+            self._cursor.clear()
+
+    def save(self) -> None:
+        """Writes the cassette atomically"""
+        with self._lock:
+            data = {"version": 1, "entries": self._entries}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+
+    def record(self, prompt, content: str, latency: float,
+               first_chunk: Optional[float] = None, usage=None) -> None:
+        entry = {"content": content, "latency": round(latency, 4)}
+        if first_chunk is not None:
+            entry["first_chunk"] = round(first_chunk, 4)
+        if usage:
+            entry["usage"] = dict(usage)
+        with self._lock:
+            self._entries.setdefault(prompt_key(prompt), []).append(entry)
+            self.recorded += 1
+
+    def lookup(self, prompt) -> Optional[dict]:
+        """Next recorded response for the prompt; repeats cycle through them"""
+        key = prompt_key(prompt)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                if key not in self.missing:
+                    self.missing[key] = _prompt_text(prompt)[:200]
+                    logger.warning("Cassette miss: %r", self.missing[key])
+                return None
+            cursor = self._cursor.get(key, 0)
+            self._cursor[key] = cursor + 1
+            self.hits += 1
+            return entries[cursor % len(entries)]
+
+    def wrap(self, llm) -> "CassetteLLM":
+        return CassetteLLM(llm, self)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"prompts": len(self._entries), "hits": self.hits,
+                    "recorded": self.recorded, "missing": len(self.missing)}
+
+
+def _message(entry: dict, chunk: bool = False):
+    cls = AIMessageChunk if chunk else AIMessage
+    if entry.get("usage"):
+        return cls(content=entry["content"], usage_metadata=entry["usage"])
+    return cls(content=entry["content"])
+
+
+class CassetteLLM:
+    """
+    Chat-model stand-in recording to or replaying from a cassette.
+    Supports the invoke/ainvoke/stream/astream calls the nodes make;
+    call options (timeout) go to the wrapped model.
+    """
+
+    def __init__(self, llm, cassette: Cassette):
+        self.llm = llm
+        self.cassette = cassette
+
+    def _replay(self, prompt) -> Optional[dict]:
+        entry = self.cassette.lookup(prompt)
+        if entry is None and not (self.cassette.passthrough and self.llm is not None):
+            raise CassetteMiss(
+                f"Prompt not in cassette: {_prompt_text(prompt)[:80]!r}")
+        return entry
+
+    def _delay(self, entry: dict, key: str = "latency") -> float:
+        if not self.cassette.reproduce_latency:
+            return 0.0
+        return entry.get(key, entry.get("latency", 0.0))
+
+    def invoke(self, prompt, **kwargs):
+        if self.cassette.mode == "replay":
+            entry = self._replay(prompt)
+            if entry is not None:
+                time.sleep(self._delay(entry))
+                return _message(entry)
+
+        started = time.monotonic()
+        response = self.llm.invoke(prompt, **kwargs)
+        self.cassette.record(prompt, response.content, time.monotonic() - started,
+                             usage=getattr(response, "usage_metadata", None))
+        return response
+
+    async def ainvoke(self, prompt, **kwargs):
+        if self.cassette.mode == "replay":
+            entry = self._replay(prompt)
+            if entry is not None:
+                await asyncio.sleep(self._delay(entry))
+                return _message(entry)
+
+        started = time.monotonic()
+        response = await self.llm.ainvoke(prompt, **kwargs)
+        self.cassette.record(prompt, response.content, time.monotonic() - started,
+                             usage=getattr(response, "usage_metadata", None))
+        return response
+
+    def stream(self, prompt, **kwargs):
+        if self.cassette.mode == "replay":
+            entry = self._replay(prompt)
+            if entry is not None:
+                time.sleep(self._delay(entry, "first_chunk"))
+                yield _message(entry, chunk=True)
+                return
+
+        started = time.monotonic()
+        first_chunk = None
+        parts = []
+        try:
+            for chunk in self.llm.stream(prompt, **kwargs):
+                if first_chunk is None:
+                    first_chunk = time.monotonic() - started
+                parts.append(chunk.content)
+                yield chunk
+        finally:
+            # the consumer may stop early : keep what it has seen
+            if parts:
+                self.cassette.record(prompt, "".join(parts),
+                                     time.monotonic() - started, first_chunk)
+
+    async def astream(self, prompt, **kwargs):
+        if self.cassette.mode == "replay":
+            entry = self._replay(prompt)
+            if entry is not None:
+                await asyncio.sleep(self._delay(entry, "first_chunk"))
+                yield _message(entry, chunk=True)
+                return
+
+        started = time.monotonic()
+        first_chunk = None
+        parts = []
+        try:
+            async for chunk in self.llm.astream(prompt, **kwargs):
+                if first_chunk is None:
+                    first_chunk = time.monotonic() - started
+                parts.append(chunk.content)
+                yield chunk
+        finally:
+            if parts:
+                self.cassette.record(prompt, "".join(parts),
+                                     time.monotonic() - started, first_chunk)
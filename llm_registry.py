@@ -0,0 +1,83 @@
+import itertools
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_groq import ChatGroq
+
+
+logger = logging.getLogger(__name__)
+
+def _google(model: str, api_key: Optional[str]):
+    return ChatGoogleGenerativeAI(model=model, api_key=api_key)
+
+
+def _groq(model: str, api_key: Optional[str]):
+    return ChatGroq(model=model, api_key=api_key)
+
+
+class LLMRegistry:
+    """
+    Process-wide chat-model clients keyed by (provider, model, api key).
+    Clients are created once and shared by every session and thread, so
+    their HTTP connection pools and TLS sessions are reused. Each key
+    holds `pool_size` clients handed out round-robin.
+    """
+
+    def __init__(self, pool_size: int = 1):
+        self.pool_size = max(1, pool_size)
+        self._factories: Dict[str, Callable] = {"google": _google, "groq": _groq}
+        self._pools: Dict[Tuple[str, str, Optional[str]], List] = {}
+        self._turns: Dict[Tuple[str, str, Optional[str]], itertools.count] = {}
+        self._lock = threading.Lock()
+
+    def register(self, provider: str, factory: Callable) -> None:
+        """Adds or replaces the factory(model, api_key) for a provider"""
+        with self._lock:
+            self._factories[provider] = factory
+            for key in [k for k in self._pools if k[0] == provider]:
+                del self._pools[key]
+                del self._turns[key]
+
+    def _pool(self, provider: str, model: str, api_key: Optional[str]
+              ) -> Tuple[list, itertools.count]:
+        """The key's clients and their round-robin counter, taken together"""
+        key = (provider, model, api_key)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                factory = self._factories.get(provider)
+                if factory is None:
+                    raise ValueError(f"Unknown LLM provider: {provider}")
+                pool = [factory(model, api_key) for _ in range(self.pool_size)]
+                self._pools[key] = pool
+                self._turns[key] = itertools.count()
+            return pool, self._turns[key]
+
+    def get(self, provider: str, model: str, api_key: Optional[str] = None):
+        """Returns a shared client, creating the pool on first use"""
+        # a concurrent register() or clear() drops the pool from the
+        # registry, not from this call
+        pool, turns = self._pool(provider, model, api_key)
+        return pool[next(turns) % len(pool)]
+
+    def warm_up(self, provider: str, model: str, api_key: Optional[str] = None,
+                ping: bool = False) -> None:
+        """
+        Creates the clients ahead of the first interview.
+        With `ping`, each client also sends a tiny request so its
+        connection is already open.
+        """
+        pool, _ = self._pool(provider, model, api_key)
+        for llm in pool:
+            if ping:
+                try:
+                    llm.invoke("ping")
+                except Exception:
+                    logger.warning("LLM warm-up failed", exc_info=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pools.clear()
+            self._turns.clear()
@@ -0,0 +1,363 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+
+# histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0)
+# candidate think time and whole sessions
+HUMAN_BUCKETS = (1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0,
+                 3600.0)
+
+_HELP = {
+    "interview_node_duration_seconds": ("histogram", "Wall time of graph-node runs"),
+    "interview_llm_call_duration_seconds": ("histogram", "LLM call latency, without queueing"),
+    "interview_llm_calls_total": ("counter", "LLM calls by purpose and outcome"),
+    "interview_llm_retries_total": ("counter", "LLM calls retried after a rate-limit error"),
+    "interview_llm_calls_saved_total": ("counter", "LLM calls avoided by local verdicts and degradation modes, by rule"),
+    "interview_llm_tokens_total": ("counter", "Prompt and completion tokens"),
+    "interview_llm_cost_usd_total": ("counter", "LLM cost at the configured token prices"),
+    "interview_queue_wait_seconds": ("histogram", "Time spent queued before work started"),
+    "interview_bot_time_seconds": ("histogram", "Time the bot works per turn"),
+    "interview_think_time_seconds": ("histogram", "Time the candidate takes per answer"),
+    "interview_session_duration_seconds": ("histogram", "Wall time of finished interviews"),
+    "interview_sessions_active": ("gauge", "Interviews being tracked"),
+    "interview_sessions_finished_total": ("counter", "Interviews finished or discarded"),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus exposes it"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _new_session() -> dict:
+    return {
+        "started": time.time(),
+        "turns": 0,
+        "bot_seconds": 0.0,
+        "think_seconds": 0.0,
+        "queue_wait_seconds": defaultdict(float),
+        "nodes": {},
+        "llm": {},
+        "cost_usd": 0.0,
+        "llm_calls_saved": 0,
+        "_turn_started": None,
+        "_suspended_at": None,
+    }
+
+
+class InterviewMetrics:
+    """
+    Process-wide instrumentation of the interview engine.
+    Keeps Prometheus-style histograms and counters across all sessions,
+    plus a running summary per session that is handed out as JSON once
+    the session finishes (and written to `session_dir` when set).
+    Token prices are in USD per million tokens; 0 leaves cost at 0.
+    """
+
+    def __init__(self, session_dir: str = "", prompt_price: float = 0.0,
+                 completion_price: float = 0.0, max_sessions: int = 4096,
+                 keep_finished: int = 256):
+        self.session_dir = session_dir
+        self.prompt_price = prompt_price
+        self.completion_price = completion_price
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self._counters: Dict[Tuple[str, tuple], float] = defaultdict(float)
+        self._sessions: "OrderedDict[str, dict]" = OrderedDict()
+        self.finished: "OrderedDict[str, dict]" = OrderedDict()
+        self.keep_finished = keep_finished
+
+        if session_dir:
+            os.makedirs(session_dir, exist_ok=True)
+
+    # recording
+
+    def _observe(self, name: str, value: float, buckets=LATENCY_BUCKETS,
+                 **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def _inc(self, name: str, value: float = 1, **labels) -> None:
+        self._counters[(name, tuple(sorted(labels.items())))] += value
+
+    def _session(self, session: str, create: bool = True) -> Optional[dict]:
+        """Running summary of a session; called with the lock held"""
+        if not session:
+            return None
+        summary = self._sessions.get(session)
+        if summary is None and create:
+            if len(self._sessions) >= self.max_sessions:
+                # abandoned without being discarded
+                self._sessions.popitem(last=False)
+            summary = self._sessions[session] = _new_session()
+        return summary
+
+    def _llm_entry(self, summary: dict, purpose: str) -> dict:
+        return summary["llm"].setdefault(purpose, {
+            "calls": 0, "errors": 0, "retries": 0, "seconds": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0})
+
+    def node(self, session: str, node: str, seconds: float) -> None:
+        with self._lock:
+            self._observe("interview_node_duration_seconds", seconds, node=node)
+            summary = self._session(session)
+            if summary is not None:
+                entry = summary["nodes"].setdefault(
+                    node, {"runs": 0, "seconds": 0.0, "max": 0.0})
+                entry["runs"] += 1
+                entry["seconds"] += seconds
+                entry["max"] = max(entry["max"], seconds)
+
+    def llm_call(self, session: str, purpose: str, seconds: float,
+                 queue_wait: float = 0.0, prompt_tokens: int = 0,
+                 completion_tokens: int = 0, error: bool = False) -> None:
+        """One LLM request; failed attempts are recorded with `error`"""
+        cost = (prompt_tokens * self.prompt_price
+                + completion_tokens * self.completion_price) / 1e6
+        with self._lock:
+            self._observe("interview_llm_call_duration_seconds", seconds,
+                          purpose=purpose)
+            self._observe("interview_queue_wait_seconds", queue_wait,
+                          queue="rate_limit")
+            self._inc("interview_llm_calls_total", purpose=purpose,
+                      outcome="error" if error else "ok")
+            self._inc("interview_llm_tokens_total", prompt_tokens,
+                      purpose=purpose, type="prompt")
+            self._inc("interview_llm_tokens_total", completion_tokens,
+                      purpose=purpose, type="completion")
+            if cost:
+                self._inc("interview_llm_cost_usd_total", cost, purpose=purpose)
+
+            # background work may outlive its session : count it globally only
+            summary = self._session(session, create=False)
+            if summary is not None:
+                entry = self._llm_entry(summary, purpose)
+                entry["calls"] += 1
+                entry["errors"] += error
+                entry["seconds"] += seconds
+                entry["prompt_tokens"] += prompt_tokens
+                entry["completion_tokens"] += completion_tokens
+                summary["cost_usd"] += cost
+                summary["queue_wait_seconds"]["rate_limit"] += queue_wait
+
+    def retry(self, session: str, purpose: str) -> None:
+        with self._lock:
+            self._inc("interview_llm_retries_total", purpose=purpose)
+            summary = self._session(session, create=False)
+            if summary is not None:
+                self._llm_entry(summary, purpose)["retries"] += 1
+
+    def llm_call_saved(self, session: str, rule: str) -> None:
+        """An LLM call avoided : answer settled locally, or a degradation mode"""
+        with self._lock:
+            self._inc("interview_llm_calls_saved_total", rule=rule)
+            summary = self._session(session, create=False)
+            if summary is not None:
+                summary["llm_calls_saved"] += 1
+
+    def queue_wait(self, session: str, queue: str, seconds: float) -> None:
+        with self._lock:
+            self._observe("interview_queue_wait_seconds", seconds, queue=queue)
+            summary = self._session(session)
+            if summary is not None:
+                summary["queue_wait_seconds"][queue] += seconds
+
+    def turn_started(self, session: str) -> None:
+        """The bot starts working; ends the candidate's think time"""
+        now = time.monotonic()
+        with self._lock:
+            summary = self._session(session)
+            if summary is None:
+                return
+            suspended_at = summary["_suspended_at"]
+            if suspended_at is not None:
+                think = now - suspended_at
+                summary["think_seconds"] += think
+                summary["_suspended_at"] = None
+                self._observe("interview_think_time_seconds", think,
+                              buckets=HUMAN_BUCKETS)
+            summary["_turn_started"] = now
+
+    def turn_finished(self, session: str, suspended: bool = True) -> None:
+        """The bot is done with a turn; `suspended` while an answer is awaited"""
+        now = time.monotonic()
+        with self._lock:
+            summary = self._session(session, create=False)
+            if summary is None or summary["_turn_started"] is None:
+                return
+            bot = now - summary["_turn_started"]
+            summary["bot_seconds"] += bot
+            summary["turns"] += 1
+            summary["_turn_started"] = None
+            summary["_suspended_at"] = now if suspended else None
+            self._observe("interview_bot_time_seconds", bot)
+
+    def finish_session(self, session: str) -> Optional[dict]:
+        """Closes a session's summary and returns it as JSON-ready data"""
+        with self._lock:
+            summary = self._sessions.pop(session, None)
+            if summary is None:
+                return None
+            result = self._export(session, summary)
+            self._observe("interview_session_duration_seconds",
+                          result["duration_seconds"], buckets=HUMAN_BUCKETS)
+            self._inc("interview_sessions_finished_total")
+            self.finished[session] = result
+            while len(self.finished) > self.keep_finished:
+                self.finished.popitem(last=False)
+
+        if self.session_dir:
+            path = os.path.join(self.session_dir, f"{session}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+        return result
+
+    # reading
+
+    def _export(self, session: str, summary: dict) -> dict:
+        return {
+            "session": session,
+            "started": summary["started"],
+            "duration_seconds": time.time() - summary["started"],
+            "turns": summary["turns"],
+            "bot_seconds": summary["bot_seconds"],
+            "think_seconds": summary["think_seconds"],
+            "queue_wait_seconds": dict(summary["queue_wait_seconds"]),
+            "nodes": {k: dict(v) for k, v in summary["nodes"].items()},
+            "llm": {k: dict(v) for k, v in summary["llm"].items()},
+            "cost_usd": summary["cost_usd"],
+            "llm_calls_saved": summary["llm_calls_saved"],
+        }
+
+    def session_summary(self, session: str) -> Optional[dict]:
+        """Summary of a running or recently finished session"""
+        with self._lock:
+            summary = self._sessions.get(session)
+            if summary is not None:
+                return self._export(session, summary)
+            return self.finished.get(session)
+
+    def llm_totals(self) -> Dict[str, Dict[str, float]]:
+        """Calls, errors, retries, tokens and cost per purpose, all sessions"""
+        totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        with self._lock:
+            for (name, labels), value in self._counters.items():
+                labels = dict(labels)
+                purpose = labels.get("purpose")
+                if purpose is None:
+                    continue
+                if name == "interview_llm_calls_total":
+                    totals[purpose]["calls"] += value
+                    if labels["outcome"] == "error":
+                        totals[purpose]["errors"] += value
+                elif name == "interview_llm_retries_total":
+                    totals[purpose]["retries"] += value
+                elif name == "interview_llm_tokens_total":
+                    totals[purpose][f"{labels['type']}_tokens"] += value
+                elif name == "interview_llm_cost_usd_total":
+                    totals[purpose]["cost_usd"] += value
+            for (name, labels), histogram in self._histograms.items():
+                if name == "interview_llm_call_duration_seconds":
+                    totals[dict(labels)["purpose"]]["seconds"] += histogram.sum
+        return {purpose: dict(values) for purpose, values in sorted(totals.items())}
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            series = defaultdict(list)
+            for (name, labels), histogram in self._histograms.items():
+                series[name].append((labels, histogram))
+            for (name, labels), value in self._counters.items():
+                series[name].append((labels, value))
+            series["interview_sessions_active"].append(((), len(self._sessions)))
+
+            for name in sorted(series):
+                kind, help_text = _HELP.get(name, ("untyped", ""))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(series[name], key=lambda s: s[0]):
+                    if isinstance(value, Histogram):
+                        for bound, count in value.cumulative():
+                            le = 'le="%s"' % bound
+                            lines.append(f"{name}_bucket{_labels(labels, le)} {count}")
+                        lines.append(f"{name}_sum{_labels(labels)} {value.sum}")
+                        lines.append(f"{name}_count{_labels(labels)} {value.count}")
+                    else:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """
+        Serves /metrics (Prometheus text) and /sessions (finished session
+        summaries as JSON) from a daemon thread
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics"):
+                    body = metrics.render().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path.startswith("/sessions"):
+                    with metrics._lock:
+                        finished = list(metrics.finished.values())
+                    body = json.dumps(finished).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http",
+                         daemon=True).start()
+        return server
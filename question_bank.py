@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+# (question, weight) pairs as parsed from the LLM response
+QuestionSet = List[Tuple[str, float]]
+
+
+def normalize_requirements(requirements: str) -> str:
+    """Folds a requirements answer into a stable cache key"""
+    # "Python, Django" / "django and python" / "PYTHON;Django" -> "django,python"
+    # symbols stay in their token : "C++", "C#", "R&D", ".NET", "Node.js"
+    parts = re.split(r"[,;\n]|\band\b", requirements.lower())
+    tokens = set()
+    for part in parts:
+        # a trailing full stop ends the sentence, it isn't part of the token
+        token = " ".join(part.split()).rstrip(".")
+        if token:
+            tokens.add(token)
+    return ",".join(sorted(tokens))
+
+
+class QuestionBank:
+    """
+    Caches parsed position-question sets per normalized requirements.
+    Keeps an LRU in memory (size + TTL limited) backed by one JSON file
+    per key on disk, so generated sets survive restarts.
+    """
+
+    def __init__(self, directory: str = "", max_entries: int = 128,
+                 ttl: float = 7 * 24 * 3600, variants: int = 3):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.variants = max(1, variants)
+        self._memory: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _fresh(self, variants: list) -> list:
+        now = time.time()
+        return [v for v in variants if now - v["created"] < self.ttl]
+
+    def _load(self, key: str) -> list:
+        # memory first, disk on miss
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        variants = []
+        if self.directory:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("key") == key:
+                    variants = data.get("variants", [])
+            except (OSError, ValueError):
+                variants = []
+
+        self._remember(key, variants)
+        return variants
+
+    def _remember(self, key: str, variants: list) -> None:
+        self._memory[key] = variants
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _store(self, key: str, variants: list) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # created on the first set stored, not on import
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "variants": variants}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # disk cache is best-effort; memory still holds the set
+            pass
+
+    def get(self, requirements: str) -> Optional[QuestionSet]:
+        """
+        Returns a random cached variant for these requirements.
+        Returns None while fewer than `variants` sets are cached, so
+        the first candidates for a key keep filling the bank.
+        """
+        cached = self.get_with_references(requirements)
+        return cached[0] if cached is not None else None
+
+    def get_with_references(self, requirements: str
+                            ) -> Optional[Tuple[QuestionSet, Dict[str, dict]]]:
+        """get(), plus the reference answers stored with the variant"""
+        key = normalize_requirements(requirements)
+        if not key:
+            return None
+
+        with self._lock:
+            variants = self._fresh(self._load(key))
+            self._remember(key, variants)
+
+        if len(variants) < self.variants:
+            return None
+
+        chosen = random.choice(variants)
+        return ([(q, float(w)) for q, w in chosen["questions"]],
+                chosen.get("references", {}))
+
+    def closest(self, requirements: str, min_overlap: float = 0.5
+                ) -> Optional[Tuple[QuestionSet, Dict[str, dict]]]:
+        """
+        Any cached set close enough, for serving under load : these
+        requirements' own sets even below `variants`, else the set of the
+        in-memory key sharing most requirement tokens (at least `min_overlap`
+        of their union).
+        """
+        key = normalize_requirements(requirements)
+        if not key:
+            return None
+        tokens = set(key.split(","))
+
+        with self._lock:
+            variants = self._fresh(self._load(key))
+            if not variants:
+                best = 0.0
+                for other, other_variants in self._memory.items():
+                    other_variants = self._fresh(other_variants)
+                    if not other_variants:
+                        continue
+                    other_tokens = set(other.split(","))
+                    overlap = (len(tokens & other_tokens)
+                               / len(tokens | other_tokens))
+                    if overlap >= min_overlap and overlap > best:
+                        best, variants = overlap, other_variants
+
+        if not variants:
+            return None
+        chosen = random.choice(variants)
+        return ([(q, float(w)) for q, w in chosen["questions"]],
+                chosen.get("references", {}))
+
+    def put(self, requirements: str, questions: QuestionSet,
+            references: Optional[Dict[str, dict]] = None) -> None:
+        """Adds a parsed question set as a new variant"""
+        key = normalize_requirements(requirements)
+        if not key or not questions:
+            return
+
+        with self._lock:
+            variants = self._fresh(self._load(key))
+            variants.append({
+                "created": time.time(),
+                "questions": [[q, w] for q, w in questions],
+                "references": references or {},
+            })
+            # keep only the newest variants
+            variants = variants[-self.variants:]
+            self._remember(key, variants)
+            self._store(key, variants)
@@ -0,0 +1,87 @@
+import asyncio
+import queue
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+
+_FINISHED = object()
+
+
+class QuestionFeed:
+    """
+    Hands position questions from a background generator to the
+    interview loop. Questions can be consumed as soon as they are put,
+    before generation has finished.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._finished = threading.Event()
+        self._drained = False
+        self.failed = False
+
+    def put(self, question: str, weight: float) -> None:
+        self._queue.put((question, weight))
+
+    def finish(self, failed: bool = False) -> None:
+        """Marks generation as done; consumers stop after the last question"""
+        if self._finished.is_set():
+            return
+        self.failed = failed
+        self._finished.set()
+        self._queue.put(_FINISHED)
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    @property
+    def drained(self) -> bool:
+        """True once every question has been handed out"""
+        return self._drained
+
+    def ready(self) -> bool:
+        """True when a question (or the end of the feed) is available now"""
+        return not self._queue.empty() or self._drained
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """
+        Blocks until the next question arrives.
+        Returns None once the feed is finished and drained.
+        Raises queue.Empty if `timeout` elapses first.
+        """
+        if self._drained:
+            return None
+        item = self._queue.get(timeout=timeout)
+        if item is _FINISHED:
+            self._drained = True
+            return None
+        return item
+
+    async def aget(self, poll: float = 0.05) -> Optional[Tuple[str, float]]:
+        """get() for coroutines : waits without blocking the event loop"""
+        while True:
+            try:
+                return self.get(timeout=0)
+            except queue.Empty:
+                await asyncio.sleep(poll)
+
+    def available(self) -> List[Tuple[str, float]]:
+        """Returns every question that has already arrived, without blocking"""
+        items = []
+        while True:
+            try:
+                item = self.get(timeout=0)
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            items.append(item)
+        return items
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        while True:
+            item = self.get()
+            if item is None:
+                return
+            yield item
@@ -0,0 +1,226 @@
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+
+DEFAULT_WEIGHT = 5
+MIN_WEIGHT, MAX_WEIGHT = 1, 10
+
+# one pass per line : "QUESTION: ...", "1. QUESTION: ... WEIGHT: 7", "ANSWER: ..."
+_FIELD = re.compile(
+    r"(QUESTION|ANSWER|KEY POINTS|WEIGHT)\s*:\**\s*(.*?)\s*"
+    r"(?=(?:QUESTION|ANSWER|KEY POINTS|WEIGHT)\s*:|$)")
+
+
+def _split_key_points(text: str) -> List[str]:
+    return [p.strip(" -•.") for p in text.split(";") if p.strip(" -•.")]
+
+
+def _parse_weight(text) -> float:
+    try:
+        weight = float(str(text).strip(" *"))
+        return max(MIN_WEIGHT, min(MAX_WEIGHT, weight))
+    except ValueError:
+        return DEFAULT_WEIGHT
+
+
+class QuestionStreamParser:
+    """
+    Incremental QUESTION/WEIGHT parser.
+    Feed it response chunks as they stream in; each (question, weight)
+    pair is emitted as soon as its WEIGHT line is complete.
+    Optional ANSWER / KEY POINTS lines between a question and its weight
+    are kept in `references`, keyed by question.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.count = 0
+        self._buffer = ""
+        # question waiting for its WEIGHT
+        self._pending: Optional[str] = None
+        self._reference: Dict[str, object] = {}
+        self.references: Dict[str, dict] = {}
+
+    @property
+    def done(self) -> bool:
+        return self.limit is not None and self.count >= self.limit
+
+    def _emit(self, weight: float, out: list) -> None:
+        question, self._pending = self._pending, None
+        # non-empty questions
+        if question and not self.done:
+            out.append((question, weight))
+            self.count += 1
+            if self._reference.get("answer"):
+                self.references[question] = {
+                    "answer": self._reference["answer"],
+                    "key_points": self._reference.get("key_points", [])}
+        self._reference = {}
+
+    def _field(self, name: str, value: str, out: list) -> None:
+        value = value.strip(" *")
+        if name == "QUESTION":
+            # a question without WEIGHT keeps the default
+            if self._pending is not None:
+                self._emit(DEFAULT_WEIGHT, out)
+            self._pending = value
+        elif self._pending is None:
+            return
+        elif name == "WEIGHT":
+            self._emit(_parse_weight(value), out)
+        elif name == "ANSWER":
+            self._reference["answer"] = value
+        else:
+            self._reference["key_points"] = _split_key_points(value)
+
+    def _line(self, line: str, out: list) -> None:
+        for match in _FIELD.finditer(line):
+            if self.done:
+                return
+            self._field(match.group(1), match.group(2), out)
+
+    def feed(self, chunk: str) -> List[Tuple[str, float]]:
+        """Consumes a chunk and returns the pairs completed by it"""
+        out: List[Tuple[str, float]] = []
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            if self.done:
+                break
+            self._line(line, out)
+        return out
+
+    def close(self) -> List[Tuple[str, float]]:
+        """Flushes the trailing line and any question still waiting for a weight"""
+        out: List[Tuple[str, float]] = []
+        if self._buffer:
+            self._line(self._buffer, out)
+            self._buffer = ""
+        if self._pending is not None:
+            self._emit(DEFAULT_WEIGHT, out)
+        return out
+
+
+def parse_position_questions(questions_text: str,
+                             limit: Optional[int] = None) -> List[Tuple[str, float]]:
+    """Parses QUESTION/WEIGHT pairs out of a complete LLM response"""
+    parser = QuestionStreamParser(limit)
+    return parser.feed(questions_text) + parser.close()
+
+
+# structured output
+
+class GeneratedQuestion(BaseModel):
+    """One position question as the LLM returns it in JSON mode"""
+
+    question: str = Field(min_length=5)
+    weight: float = DEFAULT_WEIGHT
+    answer: str = ""
+    key_points: List[str] = Field(default_factory=list)
+
+    @field_validator("question", "answer", mode="before")
+    @classmethod
+    def _strip(cls, value):
+        return value.strip() if isinstance(value, str) else value
+
+    @field_validator("weight", mode="before")
+    @classmethod
+    def _weight(cls, value):
+        return _parse_weight(value)
+
+    @field_validator("key_points", mode="before")
+    @classmethod
+    def _key_points(cls, value):
+        if isinstance(value, str):
+            return _split_key_points(value)
+        return value
+
+
+class GeneratedQuestionSet(BaseModel):
+    questions: List[GeneratedQuestion]
+
+
+class JsonQuestionStreamParser:
+    """
+    Incremental parser for JSON-mode generation.
+    Every object inside an array is validated as a GeneratedQuestion as
+    soon as its closing brace arrives; invalid items are skipped. Text
+    around the JSON (code fences, remarks) is ignored. Same interface
+    as QuestionStreamParser.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.count = 0
+        self.invalid = 0
+        self.references: Dict[str, dict] = {}
+        self._buffer = ""
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._item_start: Optional[int] = None
+        self._item_depth = 0
+
+    @property
+    def done(self) -> bool:
+        return self.limit is not None and self.count >= self.limit
+
+    def _item(self, text: str, out: list) -> None:
+        try:
+            item = GeneratedQuestion.model_validate(json.loads(text))
+        except (ValueError, ValidationError):
+            self.invalid += 1
+            return
+        if self.done:
+            return
+        out.append((item.question, item.weight))
+        self.count += 1
+        if item.answer:
+            self.references[item.question] = {
+                "answer": item.answer, "key_points": item.key_points}
+
+    def feed(self, chunk: str) -> List[Tuple[str, float]]:
+        out: List[Tuple[str, float]] = []
+        start = len(self._buffer)
+        self._buffer += chunk
+
+        for i in range(start, len(self._buffer)):
+            c = self._buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif not self._stack:
+                # outside the JSON document : only an opening bracket matters
+                if c in "[{":
+                    self._stack.append(c)
+            elif c == '"':
+                self._in_string = True
+            elif c in "[{":
+                if c == "{" and self._stack[-1] == "[" and self._item_start is None:
+                    self._item_start = i
+                    self._item_depth = len(self._stack)
+                self._stack.append(c)
+            elif c in "]}":
+                self._stack.pop()
+                if (c == "}" and self._item_start is not None
+                        and len(self._stack) == self._item_depth):
+                    self._item(self._buffer[self._item_start:i + 1], out)
+                    self._item_start = None
+
+        # nothing before an open item is needed any more
+        keep = self._item_start if self._item_start is not None else len(self._buffer)
+        self._buffer = self._buffer[keep:]
+        if self._item_start is not None:
+            self._item_start = 0
+        return out
+
+    def close(self) -> List[Tuple[str, float]]:
+        # an unfinished item is dropped : top-up asks for it again
+        return []
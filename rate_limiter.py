@@ -0,0 +1,186 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+# priority classes : lower is served first
+PRIORITY_EVALUATE = 0
+PRIORITY_GENERATE = 1
+PRIORITY_FEEDBACK = 2
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to `per_minute`; <= 0 disables"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity,
+                         self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available"""
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        # a request bigger than the bucket only needs a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.enabled:
+            self.level -= amount
+
+
+class RateLimitScheduler:
+    """
+    Process-wide admission for LLM calls sharing one API key.
+    Calls wait for request and token budget in priority order; within a
+    priority class the session served least recently goes first, so one
+    busy interview can't starve the others. A rate-limit error pauses
+    the whole scheduler once instead of every caller backing off alone.
+    """
+
+    def __init__(self, requests_per_minute: float = 0,
+                 tokens_per_minute: float = 0):
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        self._waiting: list = []
+        self._seq = itertools.count()
+        self._clock = 0
+        self._served: Dict[str, int] = {}
+        self._paused_until = 0.0
+
+        self.granted = 0
+        self.waited = 0
+        self.backoffs = 0
+
+    def acquire(self, priority: int = PRIORITY_EVALUATE, session: str = "",
+                tokens: float = 0, check: Optional[Callable[[], object]] = None,
+                poll: float = 0.25) -> float:
+        """
+        Blocks until the call may go out; returns seconds spent waiting.
+        `check` is called at least every `poll` seconds while waiting;
+        whatever it raises (a cancelled session) gives up the place.
+        """
+        started = time.monotonic()
+        # without a check nothing needs waking up
+        limit = poll if check is not None else None
+
+        with self._cond:
+            entry = (priority, self._served.get(session, 0),
+                     next(self._seq), session)
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    if check is not None:
+                        check()
+                    if self._waiting[0] is not entry:
+                        self._cond.wait(limit)
+                        continue
+
+                    now = time.monotonic()
+                    delay = max(self._paused_until - now,
+                                self._requests.wait_time(1, now),
+                                self._tokens.wait_time(tokens, now))
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay if limit is None else min(delay, limit))
+            except BaseException:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+
+            return self._grant(session, tokens, started)
+
+    async def aacquire(self, priority: int = PRIORITY_EVALUATE,
+                       session: str = "", tokens: float = 0,
+                       check: Optional[Callable[[], object]] = None,
+                       poll: float = 0.05) -> float:
+        """
+        acquire() for coroutines : same queue and budget, but waits with
+        asyncio.sleep so the event loop keeps serving other sessions
+        """
+        started = time.monotonic()
+
+        with self._cond:
+            entry = (priority, self._served.get(session, 0),
+                     next(self._seq), session)
+            heapq.heappush(self._waiting, entry)
+        try:
+            while True:
+                if check is not None:
+                    check()
+                with self._cond:
+                    delay = poll
+                    if self._waiting[0] is entry:
+                        now = time.monotonic()
+                        delay = max(self._paused_until - now,
+                                    self._requests.wait_time(1, now),
+                                    self._tokens.wait_time(tokens, now))
+                        if delay <= 0:
+                            return self._grant(session, tokens, started)
+                # threads waiting on the condition are notified on grant,
+                # coroutines re-check on their own
+                await asyncio.sleep(min(delay, poll))
+        except BaseException:
+            with self._cond:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            raise
+
+    def _grant(self, session: str, tokens: float, started: float) -> float:
+        """Lets the head of the queue go; called with the condition held"""
+        heapq.heappop(self._waiting)
+        self._requests.take(1)
+        self._tokens.take(tokens)
+
+        self._clock += 1
+        if len(self._served) > 4096:
+            self._served.clear()
+        self._served[session] = self._clock
+
+        self.granted += 1
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self.waited += 1
+
+        self._cond.notify_all()
+        return waited
+
+    @property
+    def backlog(self) -> int:
+        """Calls waiting for their turn"""
+        with self._cond:
+            return len(self._waiting)
+
+    def record(self, extra_tokens: float) -> None:
+        """Corrects the token budget once the real usage is known"""
+        with self._cond:
+            self._tokens.take(extra_tokens)
+
+    def backoff(self, seconds: float) -> None:
+        """Pauses every caller after the provider reported a rate limit"""
+        with self._cond:
+            self.backoffs += 1
+            self._paused_until = max(self._paused_until,
+                                     time.monotonic() + seconds)
+            self._cond.notify_all()
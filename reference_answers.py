@@ -0,0 +1,124 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from answer_triage import STOPWORDS
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SUFFIXES = ("ing", "ed", "es", "ly", "s")
+# stopwords to term overlap, yet they turn an answer around
+_NEGATION = re.compile(
+    r"\b(?:not|no|never|nor|none|neither|nothing|without|cannot)\b|n't\b")
+
+
+def _stem(word: str) -> str:
+    # crude suffix folding : "implementing" ~ "implements" ~ "implement"
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def content_terms(text: str) -> set:
+    return {_stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS}
+
+
+def negations(text: str) -> int:
+    return len(_NEGATION.findall(text.lower().replace("\u2019", "'")))
+
+
+def reference_similarity(answer: str, reference: dict) -> float:
+    """
+    0..1 : how much of the reference a candidate answer covers.
+    Key points count most (a point is covered when half its terms
+    appear); the rest is recall of the reference answer's terms.
+    """
+    terms = content_terms(answer)
+    if not terms:
+        return 0.0
+
+    expected = content_terms(reference.get("answer", ""))
+    points = [content_terms(p) for p in reference.get("key_points", [])]
+    points = [p for p in points if p]
+    for point in points:
+        expected |= point
+    if not expected:
+        return 0.0
+
+    recall = len(terms & expected) / len(expected)
+    if not points:
+        return recall
+    covered = sum(len(terms & p) * 2 >= len(p) for p in points) / len(points)
+    return 0.6 * covered + 0.4 * recall
+
+
+class ReferenceStore:
+    """
+    Reference answers and key points per question text, LRU bounded.
+    Filled by question generation, read when a question joins an interview.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, question: str, reference: Optional[dict]) -> None:
+        if not reference or not reference.get("answer"):
+            return
+        with self._lock:
+            self._memory[question] = reference
+            self._memory.move_to_end(question)
+            while len(self._memory) > self.capacity:
+                self._memory.popitem(last=False)
+
+    def update(self, references: Dict[str, dict]) -> None:
+        for question, reference in references.items():
+            self.put(question, reference)
+
+    def get(self, question: str) -> Optional[dict]:
+        with self._lock:
+            reference = self._memory.get(question)
+            if reference is not None:
+                self._memory.move_to_end(question)
+            return reference
+
+
+class ReferenceScorer:
+    """
+    Pre-scores answers against their reference locally.
+    Term overlap can only vouch for an answer : at or above `high` it is
+    correct, unless it negates more than the reference does ("it never
+    wraps a function" shares the terms of "it wraps a function"). Anything
+    else, a paraphrase with little overlap included, goes to the LLM judge.
+    """
+
+    def __init__(self, high: float = 0.8):
+        self.high = high
+        self.correct = 0
+        self.negated = 0
+        self.ambiguous = 0
+        self._lock = threading.Lock()
+
+    def verdict(self, answer: str, reference: Optional[dict]) -> Optional[bool]:
+        if not reference:
+            return None
+        score = reference_similarity(answer, reference)
+        expected = " ".join([reference.get("answer", ""),
+                             *reference.get("key_points", [])])
+        with self._lock:
+            if score < self.high:
+                self.ambiguous += 1
+            elif negations(answer) > negations(expected):
+                self.negated += 1
+            else:
+                self.correct += 1
+                return True
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"correct": self.correct, "negated": self.negated,
+                    "ambiguous": self.ambiguous}
@@ -0,0 +1,53 @@
+from typing import Iterable, Optional, Tuple
+
+
+# share of the possible score needed to pass
+PASS_RATIO = 0.8
+
+# lowest a question can still add under the scoring rules : a first answer
+# incorrect (-1) then passed on the second chance (-3), a second chance passed
+FIRST_ANSWER_WORST = -4
+SECOND_CHANCE_WORST = -3
+
+
+def reachable_margins(score: float, total: float, open_answers: Iterable[float],
+                      open_second_chances: Iterable[float], unseen: int = 0,
+                      max_weight: float = 10,
+                      pass_ratio: float = PASS_RATIO) -> Tuple[float, float]:
+    """
+    (worst, best) final score minus the pass mark. `open_answers` are the
+    weights of the questions whose first answer is still to come (not
+    asked yet, or waiting for its verdict), `open_second_chances` those of
+    the second chances still to be asked. `unseen` questions aren't
+    generated yet : their weight, up to `max_weight`, raises the total too.
+    """
+    open_answers = list(open_answers)
+    open_second_chances = list(open_second_chances)
+    margin = score - pass_ratio * total
+    best = (margin + sum(open_answers)
+            + sum(w / 2 for w in open_second_chances)
+            + unseen * (1 - pass_ratio) * max_weight)
+    worst = (margin + FIRST_ANSWER_WORST * len(open_answers)
+             + SECOND_CHANCE_WORST * len(open_second_chances)
+             + unseen * (FIRST_ANSWER_WORST - pass_ratio * max_weight))
+    return worst, best
+
+
+def settled_outcome(score: float, total: float, open_answers: Iterable[float],
+                    open_second_chances: Iterable[float], unseen: int = 0,
+                    max_weight: float = 10,
+                    pass_ratio: float = PASS_RATIO) -> Optional[bool]:
+    """
+    True once the candidate passes whatever the open answers get, False
+    once they can no longer pass, None while the outcome is still open.
+    """
+    if total <= 0 and not unseen:
+        return None
+    worst, best = reachable_margins(score, total, open_answers,
+                                    open_second_chances, unseen, max_weight,
+                                    pass_ratio)
+    if worst >= 0:
+        return True
+    if best < 0:
+        return False
+    return None
@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+import queue
+from typing import Optional
+
+
+# put on the output queue when the interview starts waiting for an answer
+AWAITING_ANSWER = object()
+
+
+class SessionIO:
+    """
+    Output channel of a single interview.
+    The bot sends its messages on the output queue, which the UI reads;
+    answers reach the interview through advance_interview().
+    """
+
+    def __init__(self, output_queue: Optional[queue.Queue] = None):
+        self.output_queue = output_queue if output_queue is not None else queue.Queue()
+
+    def send(self, message: str) -> None:
+        self.output_queue.put(message)
+
+    def await_answer(self) -> None:
+        """Tells the UI that the interview is suspended until the next answer"""
+        self.output_queue.put(AWAITING_ANSWER)
+
+
+class AsyncSessionIO:
+    """
+    Output channel of an interview driven by an event loop, read by
+    awaiting its queue. send() never blocks and may be called from
+    worker threads too.
+    """
+
+    def __init__(self):
+        self.output_queue: asyncio.Queue = asyncio.Queue()
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    def send(self, message: str) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self._loop is not None and running is not self._loop:
+            # from another thread : let the owning loop enqueue it
+            self._loop.call_soon_threadsafe(self.output_queue.put_nowait, message)
+        else:
+            self.output_queue.put_nowait(message)
+
+
+# channel of the interview running in the current context
+current_io: contextvars.ContextVar = contextvars.ContextVar(
+    "current_io", default=None)
+
+
+def session_io_from_config(config) -> Optional[SessionIO]:
+    """Reads the session channel passed as configurable["session_io"]"""
+    if not config:
+        return None
+    return config.get("configurable", {}).get("session_io")
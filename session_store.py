@@ -0,0 +1,285 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+from session_io import AWAITING_ANSWER
+
+
+class SessionStore(ABC):
+    """
+    Per-session data the UI needs to pick a session up again (transcript,
+    flags), keyed by interview id. Values must be JSON-serializable.
+    """
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def save(self, session_id: str, data: dict) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+
+class MessageBus(ABC):
+    """
+    FIFO topics of string messages; a session's input and output channels
+    are two topics. consume() takes a message off the topic, so each
+    message is delivered once even with several readers.
+    """
+
+    @abstractmethod
+    def publish(self, topic: str, message: str) -> None:
+        """Appends a message; dropped when the topic was purged"""
+
+    @abstractmethod
+    def consume(self, topic: str, timeout: Optional[float] = None) -> str:
+        """Next message; waits up to `timeout` (None : forever), then raises queue.Empty"""
+
+    @abstractmethod
+    def pending(self, topic: str) -> int:
+        ...
+
+    @abstractmethod
+    def purge(self, topic: str) -> None:
+        """
+        Drops the topic's messages. A finished session's topic stays closed
+        for `purged_ttl` seconds : a late publish (a turn still ending)
+        doesn't bring it back.
+        """
+
+
+# in-process backends : the default, one worker
+
+class MemorySessionStore(SessionStore):
+
+    def __init__(self):
+        self._sessions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            data = self._sessions.get(session_id)
+        return json.loads(data) if data is not None else None
+
+    def save(self, session_id: str, data: dict) -> None:
+        # stored serialized : same copy semantics as a shared store
+        data = json.dumps(data)
+        with self._lock:
+            self._sessions[session_id] = data
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class MemoryMessageBus(MessageBus):
+
+    def __init__(self, purged_ttl: float = 3600):
+        self.purged_ttl = purged_ttl
+        self._topics: Dict[str, queue.Queue] = {}
+        # purged topic -> when, oldest first
+        self._purged: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _topic(self, topic: str) -> Optional[queue.Queue]:
+        """The topic's queue, None once it was purged"""
+        with self._lock:
+            if topic in self._purged:
+                return None
+            if topic not in self._topics:
+                self._topics[topic] = queue.Queue()
+            return self._topics[topic]
+
+    def publish(self, topic: str, message: str) -> None:
+        channel = self._topic(topic)
+        if channel is not None:
+            channel.put(message)
+
+    def consume(self, topic: str, timeout: Optional[float] = None) -> str:
+        channel = self._topic(topic)
+        if channel is None:
+            # nothing will arrive on a purged topic
+            raise queue.Empty
+        if timeout is not None and timeout <= 0:
+            return channel.get_nowait()
+        return channel.get(timeout=timeout)
+
+    def pending(self, topic: str) -> int:
+        channel = self._topic(topic)
+        return channel.qsize() if channel is not None else 0
+
+    def purge(self, topic: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._topics.pop(topic, None)
+            self._purged.pop(topic, None)
+            self._purged[topic] = now
+            # expired first : insertion order is purge order
+            for old, purged in list(self._purged.items()):
+                if now - purged < self.purged_ttl:
+                    break
+                del self._purged[old]
+
+
+# SQLite backends : one file shared by every worker process
+
+def _connect(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                         timeout=30)
+    # readers on other workers don't block the writer
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+class SqliteSessionStore(SessionStore):
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = _connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+            "updated REAL NOT NULL)")
+
+    def load(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM sessions WHERE session_id = ?",
+                (session_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def save(self, session_id: str, data: dict) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, updated) "
+                "VALUES (?, ?, ?)", (session_id, json.dumps(data), time.time()))
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+
+class SqliteMessageBus(MessageBus):
+    """
+    Topics as rows of one table. Other processes can't wake a waiting
+    reader, so consume() polls every `poll_interval` seconds; messages
+    published from this process wake it at once.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05,
+                 purged_ttl: float = 3600):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.purged_ttl = purged_ttl
+        self._lock = threading.Lock()
+        self._published = threading.Condition()
+        self._db = _connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL, "
+            "message TEXT NOT NULL)")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS messages_topic ON messages (topic, id)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS purged_topics ("
+            "topic TEXT PRIMARY KEY, purged REAL NOT NULL)")
+
+    def publish(self, topic: str, message: str) -> None:
+        with self._lock:
+            # one statement : a purge by another worker can't slip in between
+            self._db.execute(
+                "INSERT INTO messages (topic, message) SELECT ?, ? WHERE NOT "
+                "EXISTS (SELECT 1 FROM purged_topics WHERE topic = ?)",
+                (topic, message, topic))
+        with self._published:
+            self._published.notify_all()
+
+    def _pop(self, topic: str) -> Optional[str]:
+        # select and delete in one statement : a message goes to one reader
+        with self._lock:
+            row = self._db.execute(
+                "DELETE FROM messages WHERE id = (SELECT id FROM messages "
+                "WHERE topic = ? ORDER BY id LIMIT 1) RETURNING message",
+                (topic,)).fetchone()
+        return row[0] if row is not None else None
+
+    def consume(self, topic: str, timeout: Optional[float] = None) -> str:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            message = self._pop(topic)
+            if message is not None:
+                return message
+            wait = self.poll_interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise queue.Empty
+                wait = min(wait, remaining)
+            with self._published:
+                self._published.wait(wait)
+
+    def pending(self, topic: str) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM messages WHERE topic = ?",
+                (topic,)).fetchone()[0]
+
+    def purge(self, topic: str) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM messages WHERE topic = ?", (topic,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO purged_topics (topic, purged) "
+                "VALUES (?, ?)", (topic, now))
+            self._db.execute("DELETE FROM purged_topics WHERE purged <= ?",
+                             (now - self.purged_ttl,))
+
+
+class BusQueue:
+    """
+    queue.Queue view of a bus topic, so SessionIO and the UI use a shared
+    bus unchanged. AWAITING_ANSWER survives the trip.
+    """
+
+    _AWAITING = json.dumps({"awaiting": True})
+
+    def __init__(self, bus: MessageBus, topic: str):
+        self.bus = bus
+        self.topic = topic
+
+    def put(self, item) -> None:
+        if item is AWAITING_ANSWER:
+            self.bus.publish(self.topic, self._AWAITING)
+        else:
+            self.bus.publish(self.topic, json.dumps({"text": item}))
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        message = json.loads(self.bus.consume(self.topic, timeout if block else 0))
+        return AWAITING_ANSWER if message.get("awaiting") else message["text"]
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def empty(self) -> bool:
+        return self.bus.pending(self.topic) == 0
+
+
+def session_output(bus: MessageBus, session_id: str) -> BusQueue:
+    """Output queue of an interview on the bus; answers go through advance_interview()"""
+    return BusQueue(bus, f"{session_id}:output")
+
+
+def purge_session(bus: MessageBus, session_id: str) -> None:
+    bus.purge(session_output(bus, session_id).topic)
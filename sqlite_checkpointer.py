@@ -0,0 +1,82 @@
+import asyncio
+import sqlite3
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+
+class SqliteCheckpointer(SqliteSaver):
+    """
+    LangGraph's SqliteSaver on one local SQLite file (WAL mode).
+    A suspended interview survives a restart and can be resumed by its
+    thread id from any worker (or process) opening the same file.
+
+    The sync and async interview graphs share this checkpointer, and sync
+    calls (discard_interview) also happen on the event loop's thread.
+    SqliteSaver has no async methods and AsyncSqliteSaver refuses sync
+    calls from its loop, so the async methods here run the sync ones on a
+    worker thread : the event loop keeps running during disk I/O.
+    """
+
+    def __init__(self, path: str, *, serde=None):
+        # SqliteSaver serializes access to the connection with its lock
+        super().__init__(sqlite3.connect(path, check_same_thread=False),
+                         serde=serde)
+        self.path = path
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def prune(self, thread_id: str) -> None:
+        """
+        Drops the thread's checkpoints but the latest, with their writes.
+        Every checkpoint holds the whole state : the latest alone resumes
+        the interview.
+        """
+        with self.cursor() as cur:
+            for table in ("checkpoints", "writes"):
+                cur.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id < "
+                    "(SELECT MAX(checkpoint_id) FROM checkpoints AS latest "
+                    f"WHERE latest.thread_id = {table}.thread_id "
+                    f"AND latest.checkpoint_ns = {table}.checkpoint_ns)",
+                    (str(thread_id),))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *,
+                    filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None,
+                    limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        found = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before,
+                                   limit=limit)))
+        for item in found:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint,
+                   metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig,
+                          writes: Sequence[tuple], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(
+            self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def aprune(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.prune, thread_id)
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, DegradationPolicy
+
+
+def test_past_the_cap_interviews_wait_in_fifo_order():
+    admission = AdmissionController(max_active=1)
+    assert admission.request("a") == 0
+    assert admission.request("b") == 1
+    assert admission.request("c") == 2
+    admission.release("a")
+    assert admission.position("b") == 0
+    assert admission.position("c") == 1
+    assert admission.stats()["active"] == 1
+
+
+def test_touch_keeps_an_active_slot():
+    admission = AdmissionController(max_active=1)
+    admission.request("a")
+    assert admission.touch("a") == 0
+    assert admission.stats()["active"] == 1
+
+
+def test_touch_respects_the_cap():
+    admission = AdmissionController(max_active=1, idle_timeout=0.01)
+    admission.request("a")
+    time.sleep(0.02)
+    # "a" lost its slot while idle; "b" took it
+    assert admission.request("b") == 0
+    assert admission.touch("a") == 1
+    assert admission.stats()["active"] == 1
+    admission.release("b")
+    assert admission.position("a") == 0
+
+
+def test_touch_readmits_when_there_is_room():
+    admission = AdmissionController(max_active=2)
+    # resumed on this worker : unknown until now
+    assert admission.touch("resumed") == 0
+    assert admission.stats()["active"] == 1
+
+
+def test_waiting_entry_expires_unless_polled():
+    admission = AdmissionController(max_active=1, wait_timeout=0.01)
+    admission.request("a")
+    admission.request("b")
+    time.sleep(0.02)
+    # another candidate's request drops the silent one
+    assert admission.request("c") == 1
+    assert admission.position("b") is None
+    assert admission.stats()["expired"] == 1
+
+
+def test_wait_blocks_until_admitted():
+    admission = AdmissionController(max_active=1)
+    admission.request("a")
+    admission.request("b")
+    threading.Timer(0.05, admission.release, ["a"]).start()
+    assert admission.wait("b", timeout=5)
+
+
+def test_idle_slot_frees_up_for_a_waiting_turn():
+    admission = AdmissionController(max_active=1, idle_timeout=0.2)
+    admission.request("a")
+    assert admission.touch("b") == 1
+    # "a" never takes another turn : its slot goes to "b"
+    assert admission.wait("b", timeout=3)
+    stats = admission.stats()
+    assert (stats["active"], stats["waiting"], stats["expired"]) == (1, 0, 1)
+
+
+def test_wait_times_out():
+    admission = AdmissionController(max_active=1)
+    admission.request("a")
+    admission.request("b")
+    started = time.monotonic()
+    assert not admission.wait("b", timeout=0.1)
+    assert time.monotonic() - started < 1
+
+
+def test_await_admission_times_out():
+    admission = AdmissionController(max_active=1)
+    admission.request("a")
+    admission.request("b")
+    assert not asyncio.run(admission.await_admission("b", timeout=0.05, poll=0.01))
+
+
+def test_wait_ends_when_released():
+    admission = AdmissionController(max_active=1)
+    admission.request("a")
+    admission.request("b")
+    threading.Timer(0.05, admission.release, ["b"]).start()
+    assert not admission.wait("b", timeout=5)
+
+
+def test_await_admission():
+    admission = AdmissionController(max_active=1)
+    admission.request("a")
+    admission.request("b")
+
+    async def run():
+        asyncio.get_running_loop().call_later(0.05, admission.release, "a")
+        return await admission.await_admission("b", poll=0.01)
+
+    assert asyncio.run(run())
+
+
+def test_no_cap_admits_everyone():
+    admission = AdmissionController()
+    assert [admission.request(s) for s in "abc"] == [0, 0, 0]
+
+
+def test_degradation_follows_the_backlog():
+    backlog = {"value": 0}
+    policy = DegradationPolicy(lambda: backlog["value"],
+                               {"brief_feedback": 5, "cached_questions": 0})
+    assert not policy.active("brief_feedback")
+    backlog["value"] = 5
+    assert policy.active("brief_feedback")
+    # threshold 0 : never
+    assert not policy.active("cached_questions")
+    assert policy.stats() == {"brief_feedback": 1, "cached_questions": 0}
+    with pytest.raises(ValueError):
+        DegradationPolicy(lambda: 0, {"nonsense": 1})
@@ -0,0 +1,65 @@
+import pytest
+
+from answer_triage import TRIAGE_RULES, AnswerTriage
+
+
+@pytest.fixture
+def triage():
+    return AnswerTriage()
+
+
+@pytest.mark.parametrize("question, answer", [
+    ("Which HTTP status code means the resource was not found?", "404"),
+    ("What is the average lookup complexity of a Python dict?", "O(1)"),
+    ("Which protocol should a login form be served over?", "HTTPS"),
+    ("Which keyword turns a function into a generator?", "yield"),
+    ("Is Python dynamically typed?", "Yes"),
+    ("Is Python dynamically typed?", "Yes, Python is dynamically typed."),
+    ("Is a tuple immutable?", "Yes, a tuple is immutable"),
+    ("In Python, can a dict key be a list?", "No, a list can't be a dict key"),
+])
+def test_short_correct_answers_are_left_to_the_llm(triage, question, answer):
+    assert triage.check(question, answer) is None
+
+
+def test_one_word_is_opt_in():
+    assert "one_word" not in TRIAGE_RULES
+    triage = AnswerTriage(rules=["one_word"], min_words=2)
+    assert triage.check("Name a sorting algorithm.", "quicksort") == "one_word"
+    assert triage.check("Name a sorting algorithm.", "merge sort") is None
+
+
+@pytest.mark.parametrize("answer, rule", [
+    ("", "empty"),
+    ("?!", "empty"),
+    ("asdfgh jkl qwerty", "keyboard_mash"),
+    ("dfghjk sdfgsdfg", "keyboard_mash"),
+    ("a python decorator wraps a function", "repeats_question"),
+])
+def test_certainly_incorrect_answers(triage, answer, rule):
+    question = "What does a Python decorator do when it wraps a function?"
+    assert triage.check(question, answer) == rule
+    assert triage.stats()[rule] == 1
+
+
+def test_answer_adding_its_own_terms_is_left_to_the_llm(triage):
+    question = "What does a Python decorator do when it wraps a function?"
+    assert triage.check(question, "It wraps a function to add logging") is None
+
+
+def test_pasted_answer_is_a_duplicate(triage):
+    pasted = "It stores values in a hash table keyed by the hash"
+    assert triage.check("How does a set work?", pasted, [pasted]) == "duplicate"
+    # short answers may rightly repeat
+    assert triage.check("Complexity of a set lookup?", "O(1)", ["O(1)"]) is None
+
+
+def test_registered_rule_runs_after_builtins(triage):
+    triage.register("too_long", lambda q, a, h: len(a) > 20)
+    assert triage.rules[-1] == "too_long"
+    assert triage.check("Explain REST.", "x " * 30) == "too_long"
+
+
+def test_unknown_rule_is_rejected():
+    with pytest.raises(ValueError):
+        AnswerTriage(rules=["nonsense"])
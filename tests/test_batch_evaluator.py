@@ -0,0 +1,95 @@
+import logging
+from concurrent.futures import Executor, Future
+
+import pytest
+
+from batch_evaluator import BatchEvaluator, build_batch_prompt, parse_batch_verdicts
+
+
+class InlineExecutor(Executor):
+    """Runs submitted work at once, on the calling thread"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def make_evaluator(reply, fallback=None, batch_size=2):
+    calls = {"fallback": []}
+
+    def invoke(prompt):
+        calls["prompt"] = prompt
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def default_fallback(question, answer):
+        calls["fallback"].append(question)
+        return answer == "right"
+
+    evaluator = BatchEvaluator("Python", invoke, fallback or default_fallback,
+                               InlineExecutor(), batch_size=batch_size,
+                               flush_timeout=60)
+    return evaluator, calls
+
+
+def test_parse_batch_verdicts():
+    text = "1: CORRECT\n2. incorrect\n3) **CORRECT**\n9: CORRECT\n1: INCORRECT"
+    assert parse_batch_verdicts(text, 3) == {1: True, 2: False, 3: True}
+
+
+def test_batch_prompt_numbers_items():
+    prompt = build_batch_prompt("Go", [("Q1?", "a1"), ("Q2?", "a2")])
+    assert "1. Question: Q1?" in prompt and "2. Question: Q2?" in prompt
+
+
+def test_full_batch_is_graded_in_one_call():
+    evaluator, calls = make_evaluator("1: CORRECT\n2: INCORRECT")
+    first = evaluator.submit("Q1?", "a")
+    second = evaluator.submit("Q2?", "b")
+    assert (first.result(), second.result()) == (True, False)
+    assert evaluator.llm_calls == 1 and evaluator.fallback_calls == 0
+    assert calls["fallback"] == []
+
+
+def test_missing_items_fall_back_one_by_one():
+    evaluator, calls = make_evaluator("1: CORRECT")
+    first = evaluator.submit("Q1?", "wrong")
+    second = evaluator.submit("Q2?", "right")
+    assert (first.result(), second.result()) == (True, True)
+    assert calls["fallback"] == ["Q2?"]
+
+
+def test_flush_sends_a_partial_batch():
+    evaluator, calls = make_evaluator("unused", batch_size=5)
+    future = evaluator.submit("Q1?", "right")
+    assert not future.done()
+    evaluator.flush()
+    # a single answer goes straight to the per-item evaluation
+    assert future.result() is True
+    assert evaluator.llm_calls == 0 and calls["fallback"] == ["Q1?"]
+
+
+def test_timeout_fails_the_whole_batch():
+    evaluator, calls = make_evaluator(TimeoutError("slow"))
+    futures = [evaluator.submit("Q1?", "a"), evaluator.submit("Q2?", "b")]
+    for future in futures:
+        with pytest.raises(TimeoutError):
+            future.result()
+    assert calls["fallback"] == []
+
+
+def test_failed_batch_is_logged_and_falls_back(caplog):
+    evaluator, calls = make_evaluator(RuntimeError("boom"))
+    with caplog.at_level(logging.ERROR, logger="batch_evaluator"):
+        futures = [evaluator.submit("Q1?", "right"), evaluator.submit("Q2?", "no")]
+    assert [f.result() for f in futures] == [True, False]
+    assert "Batch evaluation failed" in caplog.text
+
+
+def test_close_cancels_waiting_answers():
+    evaluator, _ = make_evaluator("unused", batch_size=5)
+    future = evaluator.submit("Q1?", "a")
+    evaluator.close()
+    assert future.cancelled()
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from call_steps import arun_steps, run_steps
+
+
+class Calls:
+    @staticmethod
+    def double(value):
+        return value * 2
+
+    @staticmethod
+    def fail(message):
+        raise TimeoutError(message)
+
+
+class AsyncCalls:
+    @staticmethod
+    async def double(value):
+        await asyncio.sleep(0)
+        return value * 2
+
+    @staticmethod
+    async def fail(message):
+        raise TimeoutError(message)
+
+
+def doubled_twice(value):
+    value = yield ("double", value)
+    return (yield ("double", value))
+
+
+def recovering():
+    try:
+        yield ("fail", "slow")
+    except TimeoutError as e:
+        return f"recovered from {e}"
+
+
+def nested():
+    first = yield from doubled_twice(1)
+    second = yield from recovering()
+    return first, second
+
+
+def unhandled():
+    yield ("fail", "slow")
+
+
+def test_run_steps_sends_results_back():
+    assert run_steps(doubled_twice(3), Calls) == 12
+    assert run_steps(nested(), Calls) == (4, "recovered from slow")
+
+
+def test_arun_steps_awaits_each_call():
+    assert asyncio.run(arun_steps(doubled_twice(3), AsyncCalls)) == 12
+    assert asyncio.run(arun_steps(nested(), AsyncCalls)) == (4, "recovered from slow")
+
+
+def test_unhandled_failure_propagates():
+    with pytest.raises(TimeoutError):
+        run_steps(unhandled(), Calls)
+    with pytest.raises(TimeoutError):
+        asyncio.run(arun_steps(unhandled(), AsyncCalls))
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from hedging import HedgedLLM, call_purpose
+
+
+class Client:
+    def __init__(self, name, delay):
+        self.name = name
+        self.delay = delay
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return AIMessage(content=self.name)
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return AIMessage(content=self.name)
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def hedged(primary, secondary, executor):
+    return HedgedLLM([("primary", lambda: primary), ("secondary", lambda: secondary)],
+                     executor, initial_delay=0.05, min_delay=0.0, min_samples=3)
+
+
+def warm_up(llm, purpose, seconds):
+    for _ in range(3):
+        llm.latency["primary"][purpose].record(seconds)
+
+
+def test_hedge_delay_is_kept_per_purpose(executor):
+    llm = hedged(Client("primary", 0), Client("secondary", 0), executor)
+    warm_up(llm, "generate", 0.5)
+    warm_up(llm, "evaluate", 0.01)
+    assert llm.hedge_delay("generate") == 0.5
+    assert llm.hedge_delay("evaluate") == 0.01
+    # no samples yet for this purpose
+    assert llm.hedge_delay("feedback") == 0.05
+
+
+def test_long_call_is_not_hedged_against_short_ones(executor):
+    primary, secondary = Client("primary", 0.1), Client("secondary", 0.5)
+    llm = hedged(primary, secondary, executor)
+    warm_up(llm, "generate", 0.3)
+    warm_up(llm, "evaluate", 0.01)
+
+    with call_purpose("generate"):
+        assert llm.invoke("prompt").content == "primary"
+    assert secondary.calls == 0 and llm.hedges == 0
+    assert len(llm.latency["primary"]["generate"]) == 4
+
+
+def test_slow_primary_is_hedged(executor):
+    primary, secondary = Client("primary", 0.5), Client("secondary", 0.0)
+    llm = hedged(primary, secondary, executor)
+    warm_up(llm, "evaluate", 0.01)
+
+    with call_purpose("evaluate"):
+        assert llm.invoke("prompt").content == "secondary"
+    assert llm.hedges == 1
+
+
+def test_async_calls_use_their_purpose(executor):
+    primary, secondary = Client("primary", 0.1), Client("secondary", 0.5)
+    llm = hedged(primary, secondary, executor)
+    warm_up(llm, "generate", 0.3)
+
+    async def run():
+        with call_purpose("generate"):
+            return await llm.ainvoke("prompt")
+
+    assert asyncio.run(run()).content == "primary"
+    assert secondary.calls == 0
+    assert "generate" in llm.stats()["providers"]["primary"]
@@ -0,0 +1,50 @@
+import pytest
+
+import benchmark
+import interview_bot
+from session_io import SessionIO
+
+
+def run_benchmark(*flags):
+    args = benchmark.parse_args(["--sessions", "2", "--latency", "0",
+                                 "--no-triage", *flags])
+    return benchmark.run(args)
+
+
+# 23 questions weighted 2..10, 1, 2..10, 1, 2, 3 by the stub
+TOTAL = sum(i % 10 + 1 for i in range(1, 24))
+
+
+@pytest.mark.parametrize("flags", [[], ["--sequential"], ["--async"],
+                                   ["--async", "--sequential"]])
+@pytest.mark.parametrize("profile, score, passed", [
+    # correct : +weight each
+    ("correct", TOTAL, 2),
+    # incorrect (-1), then incorrect again on the second chance (-2)
+    ("wrong", -3 * 23, 0),
+    # passed : -2 each
+    ("idk", -2 * 23, 0),
+])
+def test_scoring(flags, profile, score, passed):
+    report = run_benchmark("--profile", profile, *flags)
+    assert report["scores"] == [(score, 2)]
+    assert report["passed"] == passed
+
+
+def test_pipelined_answers_are_graded_in_batches():
+    report = run_benchmark("--profile", "correct")
+    assert report["llm_calls"].get("batch-evaluate", 0) > 0
+
+
+def test_sequential_answers_are_graded_one_by_one():
+    report = run_benchmark("--profile", "correct", "--sequential")
+    assert "batch-evaluate" not in report["llm_calls"]
+
+
+def test_answer_without_a_waiting_interview_is_refused():
+    session_io = SessionIO()
+    with pytest.raises(interview_bot.InterviewNotFound):
+        interview_bot.advance_interview("finished", session_io, "late answer")
+    # no new interview started, no slot taken
+    assert session_io.output_queue.empty()
+    assert interview_bot.admission.position("finished") is None
@@ -0,0 +1,28 @@
+import logging
+
+import pytest
+
+from llm_cassette import Cassette, CassetteMiss
+
+
+def test_replay_cycles_through_recorded_responses(tmp_path):
+    path = str(tmp_path / "cassette.json")
+    recording = Cassette(path, mode="record")
+    recording.record("prompt", "first", 0.1)
+    recording.record("prompt", "second", 0.1)
+    recording.save()
+
+    llm = Cassette(path).wrap(None)
+    assert [llm.invoke("prompt").content for _ in range(3)] == [
+        "first", "second", "first"]
+
+
+def test_miss_is_logged_once(tmp_path, caplog):
+    cassette = Cassette(str(tmp_path / "cassette.json"))
+    llm = cassette.wrap(None)
+    with caplog.at_level(logging.WARNING, logger="llm_cassette"):
+        for _ in range(2):
+            with pytest.raises(CassetteMiss):
+                llm.invoke("unrecorded")
+    assert [r.getMessage() for r in caplog.records] == ["Cassette miss: 'unrecorded'"]
+    assert cassette.missing
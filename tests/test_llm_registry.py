@@ -0,0 +1,56 @@
+import threading
+
+from llm_registry import LLMRegistry
+
+
+def counting_factory():
+    created = []
+
+    def factory(model, api_key):
+        client = object()
+        created.append(client)
+        return client
+
+    return factory, created
+
+
+def test_clients_are_shared_round_robin():
+    registry = LLMRegistry(pool_size=2)
+    factory, created = counting_factory()
+    registry.register("fake", factory)
+
+    picked = [registry.get("fake", "m") for _ in range(4)]
+    assert len(created) == 2
+    assert picked == [created[0], created[1], created[0], created[1]]
+
+
+def test_register_replaces_existing_clients():
+    registry = LLMRegistry()
+    registry.register("fake", lambda model, api_key: "old")
+    assert registry.get("fake", "m") == "old"
+    registry.register("fake", lambda model, api_key: "new")
+    assert registry.get("fake", "m") == "new"
+
+
+def test_get_survives_concurrent_clear():
+    registry = LLMRegistry(pool_size=3)
+    registry.register("fake", lambda model, api_key: object())
+    errors = []
+    stop = threading.Event()
+
+    def getter():
+        try:
+            while not stop.is_set():
+                registry.get("fake", "m")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=getter) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(2000):
+        registry.clear()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from question_bank import QuestionBank, normalize_requirements
+
+
+@pytest.mark.parametrize("requirements, key", [
+    ("Python, Django", "django,python"),
+    ("django and python", "django,python"),
+    ("PYTHON;Django", "django,python"),
+    ("Python\nDjango.", "django,python"),
+    ("C++", "c++"),
+    ("C#, F#", "c#,f#"),
+    ("R&D", "r&d"),
+    (".NET", ".net"),
+    ("Node.js", "node.js"),
+])
+def test_normalize_requirements(requirements, key):
+    assert normalize_requirements(requirements) == key
+
+
+def test_symbols_keep_languages_apart():
+    assert normalize_requirements("C++") != normalize_requirements("C")
+    assert normalize_requirements("C#") != normalize_requirements("C")
+
+
+def test_directory_created_on_first_store(tmp_path):
+    directory = tmp_path / "bank"
+    bank = QuestionBank(directory=str(directory), variants=1)
+    assert not directory.exists()
+
+    bank.put("Python", [("What is a decorator?", 6.0)])
+    assert len(os.listdir(directory)) == 1
+
+    reloaded = QuestionBank(directory=str(directory), variants=1)
+    assert reloaded.get("python") == [("What is a decorator?", 6.0)]
+
+
+def test_get_waits_for_enough_variants():
+    bank = QuestionBank(variants=2)
+    bank.put("Go", [("What is a goroutine?", 5.0)])
+    assert bank.get("Go") is None
+    assert bank.closest("Go") is not None
@@ -0,0 +1,55 @@
+import logging
+
+import interview_bot
+from langchain_core.messages import AIMessage
+from question_bank import QuestionBank
+
+
+class BrokenLLM:
+    def invoke(self, prompt, **kwargs):
+        raise RuntimeError("provider down")
+
+    def stream(self, prompt, **kwargs):
+        raise RuntimeError("provider down")
+        yield
+
+
+class ShortLLM:
+    """Answers the first request with two questions, fails the top-ups"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls > 1:
+            raise RuntimeError("provider down")
+        return AIMessage(content="QUESTION: What is a list?\nWEIGHT: 3\n"
+                                 "QUESTION: What is a dict?\nWEIGHT: 4\n")
+
+
+def generate(monkeypatch, llm):
+    monkeypatch.setattr(interview_bot, "question_bank", QuestionBank(directory=""))
+    monkeypatch.setattr(interview_bot, "QUESTION_STREAMING", False)
+    feed = interview_bot.start_question_generation("session", llm, "Python")
+    items = []
+    while (item := feed.get(timeout=5)) is not None:
+        items.append(item)
+    return feed, items
+
+
+def test_failed_generation_is_logged(monkeypatch, caplog):
+    with caplog.at_level(logging.WARNING, logger="interview_bot"):
+        feed, items = generate(monkeypatch, BrokenLLM())
+    assert feed.failed and items == []
+    [record] = caplog.records
+    assert record.getMessage() == "Question generation failed"
+    assert "provider down" in record.exc_text
+
+
+def test_failed_top_up_keeps_the_short_set(monkeypatch, caplog):
+    with caplog.at_level(logging.WARNING, logger="interview_bot"):
+        feed, items = generate(monkeypatch, ShortLLM())
+    assert not feed.failed
+    assert items == [("What is a list?", 3), ("What is a dict?", 4)]
+    assert [r.getMessage() for r in caplog.records] == ["Question top-up failed"]
@@ -0,0 +1,79 @@
+import json
+
+from question_parser import (DEFAULT_WEIGHT, JsonQuestionStreamParser,
+                             QuestionStreamParser, parse_position_questions)
+
+
+def test_pairs_are_emitted_when_their_weight_line_completes():
+    parser = QuestionStreamParser()
+    assert parser.feed("QUESTION: What is a list?\nWEI") == []
+    assert parser.feed("GHT: 7\nQUESTION: What is a dict?") == [("What is a list?", 7)]
+    # the trailing question has no weight yet
+    assert parser.close() == [("What is a dict?", DEFAULT_WEIGHT)]
+
+
+def test_numbered_lines_and_weights():
+    text = ("1. QUESTION: What is a tuple?\nWEIGHT: 12\n"
+            "2. QUESTION: What is a set?\nWEIGHT: high\n")
+    # clamped to 1..10, unreadable weights get the default
+    assert parse_position_questions(text) == [("What is a tuple?", 10),
+                                              ("What is a set?", DEFAULT_WEIGHT)]
+
+
+def test_inline_and_bold_fields():
+    text = ("1. QUESTION: What is a tuple? WEIGHT: 7\n"
+            "**QUESTION:** What is a set?\n**WEIGHT:** 4\n")
+    assert parse_position_questions(text) == [("What is a tuple?", 7),
+                                              ("What is a set?", 4)]
+
+
+def test_limit_stops_the_parser():
+    parser = QuestionStreamParser(limit=2)
+    pairs = parser.feed("".join(f"QUESTION: Question {i}?\nWEIGHT: {i}\n"
+                                for i in range(1, 4)))
+    assert pairs == [("Question 1?", 1), ("Question 2?", 2)]
+    assert parser.done
+    assert parser.close() == []
+
+
+def test_references_are_kept_by_question():
+    parser = QuestionStreamParser()
+    pairs = parser.feed("QUESTION: What is a list?\nANSWER: An ordered sequence\n"
+                        "KEY POINTS: ordered; - mutable\nWEIGHT: 3\n"
+                        "QUESTION: What is a dict?\nWEIGHT: 4\n")
+    assert pairs == [("What is a list?", 3), ("What is a dict?", 4)]
+    assert parser.references == {"What is a list?": {
+        "answer": "An ordered sequence", "key_points": ["ordered", "mutable"]}}
+
+
+RESPONSE = "```json\n" + json.dumps({"questions": [
+    {"question": "What is a list?", "weight": 3, "answer": "A sequence",
+     "key_points": "ordered; mutable"},
+    {"question": "Hi", "weight": 2},
+    {"question": 'What does "yield" do?', "weight": "7"},
+]}) + "\n```"
+
+
+def test_json_items_are_emitted_as_their_braces_close():
+    parser = JsonQuestionStreamParser()
+    emitted = [(i, pair) for i, c in enumerate(RESPONSE) for pair in parser.feed(c)]
+    first_item_end = RESPONSE.index("}")
+    assert emitted[0] == (first_item_end, ("What is a list?", 3))
+    assert [pair for _, pair in emitted] == [("What is a list?", 3),
+                                             ('What does "yield" do?', 7)]
+    # "Hi" fails validation and is skipped
+    assert parser.invalid == 1
+    assert parser.references == {"What is a list?": {
+        "answer": "A sequence", "key_points": ["ordered", "mutable"]}}
+    assert parser.close() == []
+
+
+def test_json_limit_and_unfinished_item():
+    parser = JsonQuestionStreamParser(limit=1)
+    assert parser.feed(RESPONSE) == [("What is a list?", 3)]
+    assert parser.done
+
+    parser = JsonQuestionStreamParser()
+    assert parser.feed('[{"question": "What is a list?", "wei') == []
+    # dropped : top-up asks for it again
+    assert parser.close() == []
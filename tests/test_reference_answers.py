@@ -0,0 +1,81 @@
+import pytest
+
+from reference_answers import (ReferenceScorer, ReferenceStore, negations,
+                               reference_similarity)
+
+
+DECORATOR = {
+    "answer": "A decorator wraps a function to extend its behavior, "
+              "applied with the @ syntax.",
+    "key_points": ["wraps a function", "extends behavior", "@ syntax"],
+}
+
+FAITHFUL = "A decorator wraps a function and extends its behavior; you apply it with @ syntax."
+PARAPHRASE = ("It is a callable taking another callable and returning a "
+              "replacement that adds logic around the original, put above the def.")
+NEGATED = ("Not a decorator; it never wraps a function nor extends behavior, "
+           "no @ syntax")
+
+
+def test_similarity_rewards_covered_key_points():
+    assert reference_similarity(FAITHFUL, DECORATOR) >= 0.8
+    assert reference_similarity(PARAPHRASE, DECORATOR) < 0.1
+    assert reference_similarity("", DECORATOR) == 0.0
+    assert reference_similarity(FAITHFUL, {"answer": ""}) == 0.0
+
+
+def test_negations_are_counted():
+    assert negations(NEGATED) == 4
+    assert negations("It doesn’t copy and can't fail") == 2
+    assert negations(DECORATOR["answer"]) == 0
+
+
+def test_matching_answer_is_correct():
+    scorer = ReferenceScorer()
+    assert scorer.verdict(FAITHFUL, DECORATOR) is True
+    assert scorer.stats() == {"correct": 1, "negated": 0, "ambiguous": 0}
+
+
+def test_paraphrase_is_never_failed_locally():
+    scorer = ReferenceScorer()
+    assert scorer.verdict(PARAPHRASE, DECORATOR) is None
+    assert scorer.stats()["ambiguous"] == 1
+
+
+def test_negated_answer_goes_to_the_llm():
+    scorer = ReferenceScorer()
+    # the overlap alone would pass it
+    assert reference_similarity(NEGATED, DECORATOR) >= scorer.high
+    assert scorer.verdict(NEGATED, DECORATOR) is None
+    assert scorer.stats()["negated"] == 1
+
+
+def test_negation_the_reference_shares_is_allowed():
+    reference = {"answer": "Tuples are immutable : they cannot be changed.",
+                 "key_points": ["immutable", "cannot be changed"]}
+    assert ReferenceScorer().verdict(
+        "Tuples are immutable, so they cannot be changed.", reference) is True
+
+
+def test_without_reference_the_llm_decides():
+    assert ReferenceScorer().verdict(FAITHFUL, None) is None
+
+
+def test_store_is_lru_bounded():
+    store = ReferenceStore(capacity=2)
+    store.put("q1", DECORATOR)
+    store.put("q2", DECORATOR)
+    store.get("q1")
+    store.put("q3", DECORATOR)
+    assert store.get("q2") is None
+    assert store.get("q1") is DECORATOR
+    # answerless references are not kept
+    store.put("q4", {"answer": ""})
+    assert store.get("q4") is None
+
+
+@pytest.mark.parametrize("reference", [None, {}, {"key_points": ["x"]}])
+def test_store_ignores_empty_references(reference):
+    store = ReferenceStore()
+    store.put("q", reference)
+    assert store.get("q") is None
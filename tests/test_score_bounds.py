@@ -0,0 +1,35 @@
+import pytest
+
+from score_bounds import reachable_margins, settled_outcome
+
+
+def test_margins_of_an_open_question():
+    # 0 of 10 so far, the only question still open : 8 is the pass mark
+    assert reachable_margins(0, 10, [10], []) == (-12, 2)
+
+
+def test_second_chances_add_half_their_weight():
+    assert reachable_margins(0, 10, [], [10]) == (-11, -3)
+
+
+def test_unseen_questions_raise_the_total():
+    worst, best = reachable_margins(0, 0, [], [], unseen=1, max_weight=10)
+    assert worst == -12
+    assert best == pytest.approx(2)
+
+
+@pytest.mark.parametrize("score, total, open_answers, second_chances, outcome", [
+    (8, 10, [], [], True),
+    (7, 10, [], [], False),
+    (0, 10, [10], [], None),
+    (0, 10, [], [10], False),
+    # 4 above the pass mark : passes even if the last answer costs 4
+    (32, 35, [5], [], True),
+])
+def test_settled_outcome(score, total, open_answers, second_chances, outcome):
+    assert settled_outcome(score, total, open_answers, second_chances) is outcome
+
+
+def test_nothing_is_settled_before_the_first_question():
+    assert settled_outcome(0, 0, [], []) is None
+    assert settled_outcome(0, 0, [], [], unseen=3) is None
@@ -0,0 +1,88 @@
+import queue
+
+import pytest
+
+from session_io import AWAITING_ANSWER, SessionIO
+from session_store import (BusQueue, MemoryMessageBus, MemorySessionStore,
+                           MessageBus, SessionStore, SqliteMessageBus,
+                           SqliteSessionStore, purge_session, session_output)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def bus(request, tmp_path):
+    if request.param == "memory":
+        return MemoryMessageBus()
+    return SqliteMessageBus(str(tmp_path / "bus.db"), poll_interval=0.01)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore()
+    return SqliteSessionStore(str(tmp_path / "sessions.db"))
+
+
+def test_interfaces_are_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+    with pytest.raises(TypeError):
+        MessageBus()
+
+    class Incomplete(MessageBus):
+        def publish(self, topic, message):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_store_round_trip(store):
+    assert store.load("s") is None
+    store.save("s", {"messages": [{"role": "assistant", "content": "Hi"}]})
+    assert store.load("s") == {"messages": [{"role": "assistant", "content": "Hi"}]}
+    store.delete("s")
+    assert store.load("s") is None
+
+
+def test_topics_are_fifo(bus):
+    bus.publish("t", "first")
+    bus.publish("t", "second")
+    assert bus.pending("t") == 2
+    assert [bus.consume("t", 0), bus.consume("t", 0)] == ["first", "second"]
+    with pytest.raises(queue.Empty):
+        bus.consume("t", timeout=0.05)
+
+
+def test_publish_after_purge_is_ignored(bus):
+    bus.publish("t", "shown")
+    bus.purge("t")
+    # a turn still ending writes to the finished session
+    bus.publish("t", "late")
+    assert bus.pending("t") == 0
+    with pytest.raises(queue.Empty):
+        bus.consume("t", timeout=0.05)
+    # other topics are unaffected
+    bus.publish("other", "kept")
+    assert bus.consume("other", 0) == "kept"
+
+
+def test_purged_topic_reopens_after_ttl(bus):
+    bus.purged_ttl = 0
+    bus.purge("t")
+    bus.purge("another")
+    bus.publish("t", "new")
+    assert bus.consume("t", 0) == "new"
+
+
+def test_session_output_over_the_bus(bus):
+    output = session_output(bus, "s")
+    io = SessionIO(session_output(bus, "s"))
+    io.send("Hello")
+    io.await_answer()
+    assert not output.empty()
+    assert [output.get_nowait(), output.get_nowait()] == ["Hello", AWAITING_ANSWER]
+
+    purge_session(bus, "s")
+    io.send("late")
+    assert output.empty()
+    assert isinstance(output, BusQueue)
@@ -0,0 +1,81 @@
+import asyncio
+from typing import List, TypedDict
+
+from langgraph.graph import END, StateGraph
+from langgraph.types import Command, interrupt
+
+from sqlite_checkpointer import SqliteCheckpointer
+
+
+class State(TypedDict):
+    answers: List[str]
+
+
+def ask(state: State) -> dict:
+    return {"answers": state["answers"] + [interrupt(len(state["answers"]))]}
+
+
+def graph(checkpointer):
+    workflow = StateGraph(State)
+    workflow.add_node("ask", ask)
+    workflow.set_entry_point("ask")
+    workflow.add_conditional_edges(
+        "ask", lambda state: END if len(state["answers"]) >= 2 else "ask")
+    return workflow.compile(checkpointer=checkpointer)
+
+
+CONFIG = {"configurable": {"thread_id": "interview"}}
+
+
+def test_interview_resumes_after_reopening_the_file(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    first = SqliteCheckpointer(path)
+    graph(first).invoke({"answers": []}, CONFIG)
+    graph(first).invoke(Command(resume="a"), CONFIG)
+    first.close()
+
+    # a restarted worker : only the file is shared
+    second = SqliteCheckpointer(path)
+    resumed = graph(second)
+    [pending] = resumed.get_state(CONFIG).interrupts
+    assert pending.value == 1
+    assert resumed.invoke(Command(resume="b"), CONFIG) == {"answers": ["a", "b"]}
+    assert not resumed.get_state(CONFIG).next
+
+    second.delete_thread("interview")
+    assert second.get_tuple(CONFIG) is None
+    assert list(second.list(CONFIG)) == []
+
+
+def test_prune_keeps_what_resumes_the_interview(tmp_path):
+    checkpointer = SqliteCheckpointer(str(tmp_path / "checkpoints.db"))
+    interview = graph(checkpointer)
+    interview.invoke({"answers": []}, CONFIG)
+    interview.invoke(Command(resume="a"), CONFIG)
+    assert len(list(checkpointer.list(CONFIG))) > 1
+
+    checkpointer.prune("interview")
+    assert len(list(checkpointer.list(CONFIG))) == 1
+    [pending] = interview.get_state(CONFIG).interrupts
+    assert pending.value == 1
+    assert interview.invoke(Command(resume="b"), CONFIG) == {"answers": ["a", "b"]}
+
+
+def test_async_graph_shares_the_checkpointer(tmp_path):
+    checkpointer = SqliteCheckpointer(str(tmp_path / "checkpoints.db"))
+
+    async def run():
+        async_graph = graph(checkpointer)
+        await async_graph.ainvoke({"answers": []}, CONFIG)
+        await async_graph.ainvoke(Command(resume="a"), CONFIG)
+        state = await async_graph.aget_state(CONFIG)
+        # sync calls work from the loop's thread too
+        sync_state = graph(checkpointer).get_state(CONFIG)
+        history = [item async for item in checkpointer.alist(CONFIG, limit=2)]
+        await checkpointer.adelete_thread("interview")
+        return state, sync_state, history, await checkpointer.aget_tuple(CONFIG)
+
+    state, sync_state, history, deleted = asyncio.run(run())
+    assert state.values == sync_state.values == {"answers": ["a"]}
+    assert len(history) == 2
+    assert deleted is None
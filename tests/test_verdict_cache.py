@@ -0,0 +1,50 @@
+import sqlite3
+
+from verdict_cache import VerdictCache, answer_fingerprint
+
+
+def test_fingerprint_folds_case_and_punctuation():
+    assert answer_fingerprint("  A List, not a TUPLE! ") == "a list not a tuple"
+
+
+def test_verdict_is_kept_per_requirements():
+    cache = VerdictCache()
+    cache.put("Python", "What is a decorator?", "A wrapper.", True)
+
+    assert cache.get("python", "What is a decorator?", "a wrapper") is True
+    # same question for another position : judged again
+    assert cache.get("TypeScript", "What is a decorator?", "a wrapper") is None
+
+
+def test_equivalent_requirements_share_verdicts():
+    cache = VerdictCache()
+    cache.put("Python, Django", "Q?", "answer", False)
+    assert cache.get("django and python", "Q?", "answer") is False
+
+
+def test_empty_answers_are_not_cached():
+    cache = VerdictCache()
+    cache.put("Python", "Q?", "...", True)
+    assert cache.get("Python", "Q?", "...") is None
+
+
+def test_persisted_verdicts_survive_a_restart(tmp_path):
+    path = str(tmp_path / "verdicts.db")
+    VerdictCache(path=path).put("Go", "Q?", "channels", True)
+    assert VerdictCache(path=path).get("Go", "Q?", "channels") is True
+
+
+def test_verdicts_stored_without_requirements_are_dropped(tmp_path):
+    path = str(tmp_path / "verdicts.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE verdicts (question TEXT NOT NULL, "
+               "fingerprint TEXT NOT NULL, verdict INTEGER NOT NULL, "
+               "PRIMARY KEY (question, fingerprint))")
+    db.execute("INSERT INTO verdicts VALUES ('Q?', 'channels', 1)")
+    db.commit()
+    db.close()
+
+    cache = VerdictCache(path=path)
+    assert cache.get("Go", "Q?", "channels") is None
+    cache.put("Go", "Q?", "channels", False)
+    assert cache.get("Go", "Q?", "channels") is False
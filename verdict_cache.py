@@ -0,0 +1,98 @@
+import re
+import sqlite3
+import string
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from question_bank import normalize_requirements
+
+
+_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+
+
+def answer_fingerprint(answer: str) -> str:
+    """Folds case, whitespace and punctuation so near-identical answers match"""
+    return " ".join(_PUNCTUATION.sub(" ", answer.lower()).split())
+
+
+class VerdictCache:
+    """
+    Memoizes LLM verdicts per (requirements, question, answer fingerprint) :
+    the same question asked for another position is judged again.
+    LRU in memory, optionally persisted to a SQLite file.
+    """
+
+    def __init__(self, capacity: int = 4096, path: str = ""):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[Tuple[str, str, str], bool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            columns = [row[1] for row in self._db.execute(
+                "PRAGMA table_info(verdicts)")]
+            if columns and "requirements" not in columns:
+                # verdicts stored without their position can't be told apart
+                self._db.execute("DROP TABLE verdicts")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                "requirements TEXT NOT NULL, question TEXT NOT NULL, "
+                "fingerprint TEXT NOT NULL, verdict INTEGER NOT NULL, "
+                "PRIMARY KEY (requirements, question, fingerprint))")
+            self._db.commit()
+
+    @staticmethod
+    def _key(requirements: str, question: str, answer: str) -> Tuple[str, str, str]:
+        return (normalize_requirements(requirements), question,
+                answer_fingerprint(answer))
+
+    def _remember(self, key: Tuple[str, str, str], verdict: bool) -> None:
+        self._memory[key] = verdict
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def get(self, requirements: str, question: str, answer: str) -> Optional[bool]:
+        key = self._key(requirements, question, answer)
+        if not key[2]:
+            return None
+
+        with self._lock:
+            verdict = self._memory.get(key)
+            if verdict is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT verdict FROM verdicts WHERE requirements = ? "
+                    "AND question = ? AND fingerprint = ?", key).fetchone()
+                if row is not None:
+                    verdict = bool(row[0])
+
+            if verdict is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._remember(key, verdict)
+            return verdict
+
+    def put(self, requirements: str, question: str, answer: str,
+            verdict: bool) -> None:
+        key = self._key(requirements, question, answer)
+        if not key[2]:
+            return
+
+        with self._lock:
+            self._remember(key, verdict)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO verdicts "
+                    "(requirements, question, fingerprint, verdict) "
+                    "VALUES (?, ?, ?, ?)", (*key, int(verdict)))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses,
+                "size": len(self._memory)}